@@ -0,0 +1,1764 @@
+"""Headless benchmarks for the keyboard navigation overlay.
+
+Runs on any platform under Qt's offscreen platform. The macOS-only modules
+(PyObjC, pynput, screeninfo) are replaced with small stand-ins before main.py
+is imported, so only the Qt and pure-Python paths are timed. Mouse events are
+recorded by RecordingSink instead of being posted.
+
+Usage:
+    python bench.py                          # run all benchmarks
+    python bench.py activation paint         # run selected benchmarks
+    python bench.py --save baseline.json     # record results
+    python bench.py --compare baseline.json  # fail (exit 1) on regression
+    python bench.py --repeat 3 --compare baseline.json  # best of 3, less noise
+
+Any non-zero correctness counter (errors, lost, order_violations,
+mismatches) also exits 1, with or without --compare.
+"""
+
+import argparse
+import atexit
+import enum
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import types
+from collections import Counter
+from contextlib import redirect_stderr, redirect_stdout
+from dataclasses import dataclass
+from io import StringIO
+from pathlib import Path
+
+
+@dataclass
+class FakeMonitor:
+    x: int
+    y: int
+    width: int
+    height: int
+    name: str = "FAKE-1"
+    is_primary: bool = True
+
+
+FAKE_MONITORS = [FakeMonitor(0, 0, 1920, 1080)]
+
+
+class _NativeMeta(type):
+    """Metaclass so stand-in classes answer class methods and OR like flags."""
+
+    def __getattr__(cls, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: _Native()
+
+    def __or__(cls, other):
+        return cls
+
+    __ror__ = __or__
+
+
+class _Native(metaclass=_NativeMeta):
+    """Stand-in for any PyObjC class, instance or constant.
+
+    Every attribute is a callable returning another (falsy) stand-in, and
+    init* methods return self so alloc().init() chains work.
+    """
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    @classmethod
+    def alloc(cls):
+        return cls()
+
+    def init(self):
+        return self
+
+    def __getattr__(self, name):
+        if name.startswith("init"):
+            return lambda *args, **kwargs: self
+        return lambda *args, **kwargs: _Native()
+
+    def __bool__(self):
+        return False
+
+    def __iter__(self):
+        return iter(())
+
+    def __len__(self):
+        return 0
+
+    def __or__(self, other):
+        return self
+
+    __ror__ = __or__
+
+
+def _native_module(name):
+    """Module whose every attribute is a (cached) stand-in class."""
+    module = types.ModuleType(name)
+    cache = {}
+
+    def __getattr__(attr):
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        if attr not in cache:
+            cache[attr] = _NativeMeta(attr, (_Native,), {})
+        return cache[attr]
+
+    module.__getattr__ = __getattr__
+    return module
+
+
+def _pynput_modules():
+    """Minimal pynput.keyboard replacement."""
+    keyboard = types.ModuleType("pynput.keyboard")
+    Key = enum.Enum("Key", [
+        "alt", "alt_l", "alt_r", "cmd", "cmd_l", "cmd_r",
+        "ctrl", "ctrl_l", "ctrl_r", "shift", "shift_l", "shift_r",
+        "enter", "esc", "tab", "space", "backspace",
+        "up", "down", "left", "right",
+    ])
+
+    class KeyCode:
+        def __init__(self, vk=None, char=None):
+            self.vk = vk
+            self.char = char
+
+        @classmethod
+        def from_char(cls, char):
+            return cls(char=char)
+
+        @classmethod
+        def from_vk(cls, vk):
+            return cls(vk=vk)
+
+        def __eq__(self, other):
+            if not isinstance(other, KeyCode):
+                return NotImplemented
+            if self.char is not None and other.char is not None:
+                return self.char == other.char
+            return self.vk == other.vk
+
+        def __hash__(self):
+            return hash(self.char) if self.char is not None else hash(self.vk)
+
+        def __repr__(self):
+            return repr(self.char) if self.char is not None else f"<{self.vk}>"
+
+    class Listener:
+        def __init__(self, on_press=None, on_release=None):
+            self.on_press = on_press
+            self.on_release = on_release
+
+        def start(self):
+            pass
+
+        def stop(self):
+            pass
+
+    keyboard.Key = Key
+    keyboard.KeyCode = KeyCode
+    keyboard.Listener = Listener
+
+    pynput = types.ModuleType("pynput")
+    pynput.keyboard = keyboard
+    return pynput, keyboard
+
+
+def install_stand_ins():
+    """Register the platform stand-ins in sys.modules."""
+    for name in ("Cocoa", "AppKit", "Quartz", "Foundation"):
+        sys.modules[name] = _native_module(name)
+
+    objc = types.ModuleType("objc")
+    objc.super = super
+    objc.python_method = lambda func: func
+    objc.objc_object = _Native
+    sys.modules["objc"] = objc
+
+    pynput, keyboard = _pynput_modules()
+    sys.modules["pynput"] = pynput
+    sys.modules["pynput.keyboard"] = keyboard
+
+    screeninfo = types.ModuleType("screeninfo")
+    screeninfo.get_monitors = lambda: list(FAKE_MONITORS)
+    sys.modules["screeninfo"] = screeninfo
+
+
+class RecordingSink:
+    """Input sink that records mouse events (with perf_counter() times) instead of posting them."""
+
+    def __init__(self):
+        self.cursor = (0, 0)
+        self.events = []
+
+    def position(self):
+        return self.cursor
+
+    def move(self, x, y):
+        self.cursor = (x, y)
+        self.events.append((time.perf_counter(), "move", x, y))
+
+    def button(self, x, y, button, down, click_state, modifiers):
+        self.events.append((time.perf_counter(), "down" if down else "up", button, click_state, modifiers))
+
+    def drag(self, x, y, button, modifiers):
+        self.cursor = (x, y)
+        self.events.append((time.perf_counter(), "drag", x, y, button, modifiers))
+
+
+class SyntheticFrameSource:
+    """Frame source returning a generated test pattern at scale x the monitor size."""
+
+    def __init__(self, scale=1):
+        self.scale = scale
+        self.frames = {}
+        self.grabs = 0
+
+    def grab(self, monitor, window=None):
+        from PyQt5.QtGui import QColor, QImage, QPainter
+        self.grabs += 1
+        size = (monitor.width * self.scale, monitor.height * self.scale)
+        frame = self.frames.get(size)
+        if frame is None:
+            frame = QImage(size[0], size[1], QImage.Format_ARGB32_Premultiplied)
+            frame.fill(QColor(240, 240, 240))
+            painter = QPainter(frame)
+            rng = random.Random(size[0])
+            for _ in range(400):
+                painter.fillRect(rng.randrange(size[0]), rng.randrange(size[1]), rng.randint(4, 300),
+                                 rng.randint(4, 40), QColor(rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+            painter.end()
+            self.frames[size] = frame
+        return frame
+
+
+def setup(verbose=False):
+    """Import main.py against the stand-ins and start an offscreen QApplication."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    install_stand_ins()
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import main
+    # Keep bookmarks and click history out of the user's data directory. The
+    # directory is removed at exit, after journals flushed on exit (registered later)
+    data_dir = tempfile.TemporaryDirectory(prefix="kbnav-bench-", ignore_cleanup_errors=True)
+    atexit.register(data_dir.cleanup)
+    main.DATA_DIR = Path(data_dir.name)
+    # Record mouse events instead of posting them through CoreGraphics, and
+    # capture a test pattern instead of the screen
+    main.QuartzEventSink = RecordingSink
+    main.QuartzFrameSource = SyntheticFrameSource
+    if verbose:
+        main.configure_logging("debug")
+    from PyQt5.QtCore import qInstallMessageHandler
+    from PyQt5.QtWidgets import QApplication
+    if not verbose:
+        # Offscreen platform warnings (e.g. "does not support raise()")
+        qInstallMessageHandler(lambda *args: None)
+    app = QApplication.instance() or QApplication([])
+    return main, app
+
+
+class FakeMonitorProvider:
+    """Monitor provider whose layout is set directly; set_monitors() notifies like a hot-plug."""
+
+    def __init__(self, monitors=None):
+        self.layout = list(monitors or FAKE_MONITORS)
+        self.callbacks = []
+        self.reads = 0
+
+    def monitors(self):
+        import main
+        self.reads += 1
+        return [main.MonitorInfo(m.x, m.y, m.width, m.height, m.name, m.is_primary)
+                for m in self.layout]
+
+    def watch(self, callback):
+        self.callbacks.append(callback)
+
+    def set_monitors(self, monitors):
+        self.layout = list(monitors)
+        for callback in self.callbacks:
+            callback()
+
+
+def make_manager(main, monitors=None):
+    """OverlayManager over a fake monitor topology."""
+    return main.OverlayManager(main.MonitorTopology(FakeMonitorProvider(monitors)))
+
+
+def first_overlay(manager):
+    return next(iter(manager.overlays.values()))
+
+
+def wait_for(app, predicate, timeout=2.0):
+    """Process Qt events until predicate() is true or timeout expires."""
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("condition not reached")
+        app.processEvents()
+
+
+def summarize(samples):
+    """Milliseconds summary of a list of second-valued samples."""
+    samples = sorted(samples)
+    return {
+        "n": len(samples),
+        "median_ms": statistics.median(samples) * 1000,
+        "p95_ms": samples[int(0.95 * (len(samples) - 1))] * 1000,
+        "max_ms": samples[-1] * 1000,
+    }
+
+
+def bench_activation(main, app, rounds=30):
+    """Hotkey signal to first paintEvent, cold (new window) vs warm (reused)."""
+    monitor = FAKE_MONITORS[0]
+
+    cold = []
+    for _ in range(rounds):
+        requested_at = time.perf_counter()
+        overlay = main.GridOverlay(monitor, main.HotkeySignals())
+        overlay.activate(requested_at)
+        wait_for(app, lambda: overlay.last_activation_latency is not None)
+        cold.append(overlay.last_activation_latency)
+        overlay.deactivate()
+        overlay.deleteLater()
+        app.processEvents()
+
+    manager = make_manager(main)
+    warm = []
+    for _ in range(rounds):
+        overlay = first_overlay(manager)
+        overlay.last_activation_latency = None
+        manager.signals.create_and_show_overlay.emit(time.perf_counter())
+        wait_for(app, lambda: overlay.last_activation_latency is not None)
+        warm.append(overlay.last_activation_latency)
+        manager.signals.cancel.emit()
+        app.processEvents()
+
+    return {"cold": summarize(cold), "warm": summarize(warm)}
+
+
+class FakeWindowPlatform:
+    """Window platform that counts native calls and can simulate demotions."""
+
+    TARGET_LEVEL = 1000
+
+    def __init__(self, hide_delay=0.0):
+        self.calls = Counter()
+        self.level = 0
+        self.callback = None
+        self.hide_delay = hide_delay  # Seconds a hidden window stays on screen, like the window server
+        self.hidden_at = None
+
+    def resolve_window(self, win_id):
+        self.calls["resolve_window"] += 1
+        return win_id
+
+    def is_at_target_level(self, window):
+        self.calls["is_at_target_level"] += 1
+        self.hidden_at = None  # Checked on every show
+        return self.level >= self.TARGET_LEVEL
+
+    def raise_window(self, window):
+        self.calls["raise_window"] += 1
+        self.level = self.TARGET_LEVEL
+
+    def is_on_screen(self, window):
+        from PyQt5.QtWidgets import QWidget
+        self.calls["is_on_screen"] += 1
+        widget = QWidget.find(window)
+        if widget is not None and widget.isVisible():
+            self.hidden_at = None
+            return True
+        if self.hidden_at is None:
+            self.hidden_at = time.perf_counter()
+        return time.perf_counter() - self.hidden_at < self.hide_delay
+
+    def watch_demotions(self, window, callback):
+        self.calls["watch_demotions"] += 1
+        self.callback = callback
+        return callback
+
+    def unwatch(self, token):
+        self.calls["unwatch"] += 1
+        self.callback = None
+
+    def demote(self):
+        """Simulate e.g. a space change that drops the window level."""
+        self.level = 0
+        if self.callback:
+            self.callback()
+
+
+def bench_window_level(main, app, seconds=1.0, demotions=3):
+    """Wakeups and native calls per second while the overlay is visible."""
+    from PyQt5.QtCore import QEvent, QObject
+
+    class TimerEvents(QObject):
+        def __init__(self):
+            super().__init__()
+            self.count = 0
+
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Timer:
+                self.count += 1
+            return False
+
+    platform = FakeWindowPlatform()
+    overlay = main.GridOverlay(FAKE_MONITORS[0], main.HotkeySignals(), platform)
+    overlay.activate()
+    wait_for(app, lambda: overlay.last_activation_latency is not None)
+    platform.calls.clear()
+
+    timers = TimerEvents()
+    app.installEventFilter(timers)
+    start = time.perf_counter()
+    next_demotion = 0
+    while (elapsed := time.perf_counter() - start) < seconds:
+        if next_demotion < demotions and elapsed >= (next_demotion + 0.5) * seconds / demotions:
+            platform.demote()
+            next_demotion += 1
+        app.processEvents()
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    app.removeEventFilter(timers)
+    overlay.deactivate()
+
+    return {
+        "timer_wakeups_per_s": timers.count / elapsed,
+        "native_calls_per_s": sum(platform.calls.values()) / elapsed,
+        "reasserts": platform.calls["raise_window"],
+        "demotions": next_demotion,
+        # Every demotion re-asserted exactly once
+        "errors": abs(platform.calls["raise_window"] - next_demotion),
+    }
+
+
+def synthetic_windows(count, width=5120, height=2880, seed=1):
+    """Front-to-back window list in CGWindowListCopyWindowInfo format."""
+    rng = random.Random(seed)
+    windows = []
+    for i in range(count):
+        w = rng.randint(80, width // 2)
+        h = rng.randint(40, height // 2)
+        windows.append({
+            "kCGWindowOwnerPID": 1000 + i % 200,
+            "kCGWindowOwnerName": f"App{i % 200}",
+            "kCGWindowBounds": {
+                "X": rng.randint(-w // 2, width - w // 2),
+                "Y": rng.randint(0, height - h // 2),
+                "Width": w,
+                "Height": h,
+            },
+        })
+    return windows
+
+
+def linear_window_at(window_list, x, y):
+    """The pre-index lookup: scan every window, building bounds each time."""
+    for window in window_list:
+        bounds = window.get("kCGWindowBounds", {})
+        win_x = bounds.get("X", 0)
+        win_y = bounds.get("Y", 0)
+        if (win_x <= x <= win_x + bounds.get("Width", 0) and
+                win_y <= y <= win_y + bounds.get("Height", 0)):
+            return window
+    return None
+
+
+def bench_window_index(main, app, sizes=(100, 1000, 5000), queries=2000):
+    """Snapshot build cost and point-query cost vs a linear scan."""
+    rng = random.Random(2)
+    points = [(rng.uniform(0, 5120), rng.uniform(0, 2880)) for _ in range(queries)]
+    results = {}
+    for count in sizes:
+        window_list = synthetic_windows(count)
+        service = main.WindowSnapshotService(
+            window_source=lambda: window_list,
+            app_lookup=lambda pid: FakeApp(pid),
+        )
+
+        start = time.perf_counter()
+        service.refresh()
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for x, y in points:
+            service.app_at_point(x, y)
+        indexed = (time.perf_counter() - start) / queries
+
+        start = time.perf_counter()
+        for x, y in points:
+            linear_window_at(window_list, x, y)
+        linear = (time.perf_counter() - start) / queries
+
+        results[f"{count}_windows"] = {
+            "build_ms": build * 1000,
+            "query_us": indexed * 1e6,
+            "linear_us": linear * 1e6,
+        }
+    return results
+
+
+class FakeApp:
+    """Running-application stand-in that becomes active activation_delay s after activation."""
+
+    def __init__(self, pid, activation_delay=0.0):
+        self.pid = pid
+        self.activation_delay = activation_delay
+        self.activated_at = None
+
+    def isTerminated(self):
+        return False
+
+    def activateWithOptions_(self, options):
+        self.activated_at = time.perf_counter()
+        return True
+
+    def isActive(self):
+        return (self.activated_at is not None and
+                time.perf_counter() - self.activated_at >= self.activation_delay)
+
+
+def bench_confirm(main, app, rounds=20, activation_delay=0.01, hide_delay=0.004):
+    """Confirm-to-click latency and main-thread blocking per confirm.
+
+    The fake window server keeps a hidden overlay on screen for hide_delay,
+    so overlay_hidden_ms should be at least that.
+    """
+    monitor = FAKE_MONITORS[0]
+    target = FakeApp(1234, activation_delay)
+    window_list = [{
+        "kCGWindowOwnerPID": target.pid,
+        "kCGWindowOwnerName": "Target",
+        "kCGWindowBounds": {"X": 0, "Y": 0, "Width": monitor.width, "Height": monitor.height},
+    }]
+    service = main.WindowSnapshotService(
+        window_source=lambda: window_list,
+        app_lookup=lambda pid: target,
+    )
+    signals = main.HotkeySignals()
+    overlay = main.GridOverlay(monitor, signals, FakeWindowPlatform(hide_delay), service)
+    clicks = []
+    overlay.click_pipeline.post_click = lambda x, y, *click: clicks.append(time.perf_counter())
+
+    blocked, totals = [], []
+    for _ in range(rounds):
+        overlay.activate()
+        wait_for(app, lambda: overlay.last_activation_latency is not None)
+        overlay.last_activation_latency = None
+        target.activated_at = None
+        clicks.clear()
+
+        start = time.perf_counter()
+        signals.confirm.emit(0)
+        blocked.append(time.perf_counter() - start)
+        wait_for(app, lambda: clicks)
+        totals.append(clicks[0] - start)
+
+    return {
+        "main_thread_blocked": summarize(blocked),
+        "confirm_to_click": summarize(totals),
+        "last_stages": overlay.click_pipeline.last_timings,
+    }
+
+
+def expected_click_events(x, y, button, count, modifiers):
+    """Event sequence InputInjector.click should post, without timestamps."""
+    events = [("move", x, y)]
+    for state in range(1, count + 1):
+        events += [("down", button, state, modifiers), ("up", button, state, modifiers)]
+    return events
+
+
+def bench_input(main, app, rounds=2000):
+    """Mouse events posted per click: order, click states, modifier flags and time per click."""
+    sink = RecordingSink()
+    injector = main.InputInjector(sink)
+    modifier_sets = (0, main.MOD_CMD, main.MOD_SHIFT | main.MOD_ALT, main.MOD_CTRL)
+
+    # Every button, count and modifier combination posts exactly the expected sequence
+    errors = 0
+    for button in main.MOUSE_BUTTONS:
+        for count in range(1, main.MAX_CLICK_COUNT + 1):
+            for modifiers in modifier_sets:
+                sink.events.clear()
+                injector.click(100, 200, button, count, modifiers)
+                if [event[1:] for event in sink.events] != expected_click_events(100, 200, button, count, modifiers):
+                    errors += 1
+
+    results = {}
+    for name, count in (("single", 1), ("triple", 3)):
+        samples, spans = [], []
+        for i in range(rounds):
+            sink.events.clear()
+            start = time.perf_counter()
+            injector.click(i % 1000, 500, "left", count)
+            samples.append(time.perf_counter() - start)
+            spans.append(sink.events[-1][0] - sink.events[0][0])
+        samples.sort()
+        spans.sort()
+        results[name] = {
+            "post_us": statistics.median(samples) * 1e6,
+            "first_to_last_event_us": spans[int(0.99 * (len(spans) - 1))] * 1e6,
+        }
+
+    # Through the overlay: Right, Up (right double click), then Cmd+Enter
+    monitor = FAKE_MONITORS[0]
+    signals = main.HotkeySignals()
+    overlay = main.GridOverlay(monitor, signals, FakeWindowPlatform(), injector=injector)
+    overlay.activate()
+    wait_for(app, lambda: overlay.last_activation_latency is not None)
+    signals.click_mode.emit(1, 0)
+    signals.click_mode.emit(0, 1)
+    x, y = sink.cursor
+    sink.events.clear()
+    signals.confirm.emit(main.MOD_CMD)
+    wait_for(app, lambda: overlay.click_pipeline.last_timings is not None)
+    posted = [event[1:] for event in sink.events]
+    expected = expected_click_events(x, y, "right", 2, main.MOD_CMD)
+
+    return {
+        "combinations": len(main.MOUSE_BUTTONS) * main.MAX_CLICK_COUNT * len(modifier_sets),
+        "errors": errors,
+        **results,
+        "overlay_click_errors": int(posted != expected),
+    }
+
+
+def bench_drag(main, app, rounds=3):
+    """Drag event order and pacing precision: how late each move (and the mouse-up) is posted."""
+    sink = RecordingSink()
+    injector = main.InputInjector(sink)
+    results = {}
+    for interval_ms in (2, 8, 16):
+        pacing = main.DragPacing(hold_ms=20, interval_ms=interval_ms, duration_ms=200)
+        late, gaps, order_errors = [], [], 0
+        for _ in range(rounds):
+            sink.events.clear()
+            injector.drag((100, 100), (700, 400), "left", 0, pacing)
+            injector.drag_thread.join()
+            kinds = [event[1] for event in sink.events]
+            if kinds != ["move", "down"] + ["drag"] * pacing.steps + ["up"]:
+                order_errors += 1
+            late += [posted - scheduled for scheduled, posted in injector.last_drag]
+            posted = [event[0] for event in sink.events[2:]]
+            gaps += [later - earlier for earlier, later in zip(posted, posted[1:])]
+        late.sort()
+        gaps.sort()
+        results[f"{interval_ms}ms"] = {
+            "moves": pacing.steps,
+            "order_errors": order_errors,
+            "late_p50_ms": statistics.median(late) * 1000,
+            "late_p99_ms": late[int(0.99 * (len(late) - 1))] * 1000,
+            "interval_min_ms": gaps[0] * 1000,
+            "interval_max_ms": gaps[-1] * 1000,
+        }
+
+    # Through the overlay: mark the start, select a cell, confirm
+    monitor = FAKE_MONITORS[0]
+    signals = main.HotkeySignals()
+    overlay = main.GridOverlay(monitor, signals, FakeWindowPlatform(), injector=injector)
+    injector.drag_pacing = main.DragPacing(hold_ms=0, interval_ms=1, duration_ms=10)
+    overlay.activate()
+    wait_for(app, lambda: overlay.last_activation_latency is not None)
+    start = sink.cursor
+    signals.mark_drag.emit()
+    overlay.subdivide_to_cell(2, 2)
+    end = sink.cursor
+    sink.events.clear()
+    signals.confirm.emit(0)
+    wait_for(app, lambda: overlay.click_pipeline.last_timings is not None)
+    injector.drag_thread.join()
+    down = next(event for event in sink.events if event[1] == "down")
+    up = sink.events[-1]
+    results["overlay_drag_errors"] = int(sink.events[0][2:] != start or down[1:] != ("down", "left", 1, 0)
+                                         or up[1] != "up" or sink.cursor != end)
+    return results
+
+
+RESOLUTIONS = {"1080p": (1920, 1080), "4K": (3840, 2160), "5K": (5120, 2880)}
+
+# Keystroke path used by the navigation benchmarks: 5 levels down, then back up
+KEY_PATH = [(0, 2), (1, 1), (2, 0), (1, 2), (0, 1)]
+
+
+def bench_paint(main, app, rounds=3):
+    """Pixels touched and paint time per keystroke: full uncached repaint vs dirty rect + layer cache."""
+    from PyQt5.QtCore import QPoint, QRect, Qt
+    from PyQt5.QtGui import QImage, QPainter, QRegion
+    from PyQt5.QtWidgets import QWidget
+
+    results = {}
+    for label, (width, height) in RESOLUTIONS.items():
+        monitor = FakeMonitor(0, 0, width, height)
+        overlay = main.GridOverlay(monitor, main.HotkeySignals(), FakeWindowPlatform())
+        overlay.activate()
+        wait_for(app, lambda: overlay.last_activation_latency is not None)
+
+        # Capture the update rects the overlay requests per keystroke
+        requested = []
+        overlay.update = lambda *args: requested.append(args[0] if args else None)
+
+        image = QImage(width, height, QImage.Format_ARGB32_Premultiplied)
+        full_rect = QRect(0, 0, width, height)
+        default_cache = main.GridOverlay.LAYER_CACHE_PIXELS
+
+        def run(dirty):
+            overlay.LAYER_CACHE_PIXELS = default_cache if dirty else 0
+            overlay.layer_cache.clear()
+            overlay.layer_cache_pixels = 0
+            pixels, elapsed, keystrokes = 0, 0.0, 0
+            for _ in range(rounds):
+                steps = [lambda r=r, c=c: overlay.subdivide_to_cell(r, c) for r, c in KEY_PATH]
+                steps += [overlay.go_back] * len(KEY_PATH)
+                for step in steps:
+                    requested.clear()
+                    step()
+                    rect = QRect()
+                    for update in requested:
+                        rect = rect.united(update if dirty and update is not None else full_rect)
+                    rect = rect.intersected(full_rect)
+                    start = time.perf_counter()
+                    # A translucent window's backing store clears the dirty rect before painting
+                    painter = QPainter(image)
+                    painter.setCompositionMode(QPainter.CompositionMode_Clear)
+                    painter.fillRect(rect, Qt.transparent)
+                    painter.end()
+                    overlay.render(image, QPoint(), QRegion(rect), QWidget.RenderFlags(QWidget.DrawChildren))
+                    elapsed += time.perf_counter() - start
+                    pixels += rect.width() * rect.height()
+                    keystrokes += 1
+            return {"pixels": pixels // keystrokes, "paint_ms": elapsed / keystrokes * 1000}
+
+        results[label] = {"full": run(dirty=False), "dirty": run(dirty=True)}
+        del overlay.update
+        overlay.deactivate()
+        overlay.deleteLater()
+    return results
+
+
+def bench_inset(main, app, activations=5):
+    """Zoom inset: screen grabs per activation and inset resampling cost per level (Retina frames).
+
+    Also compares minified previews served from the frame pyramid with the
+    same previews resampled from the full-resolution frame.
+    """
+    from PyQt5.QtCore import Qt
+    results = {}
+    for label, (width, height) in RESOLUTIONS.items():
+        monitor = FakeMonitor(0, 0, width, height)
+        source = SyntheticFrameSource(scale=2)
+        overlay = main.GridOverlay(monitor, main.HotkeySignals(), FakeWindowPlatform(), frame_source=source)
+
+        inset_ms, shown_at = [], None
+        for _ in range(activations):
+            overlay.activate()
+            wait_for(app, lambda: overlay.frame is not None)
+            for depth, (row, col) in enumerate(KEY_PATH, 1):
+                overlay.subdivide_to_cell(row, col)
+                rect = overlay.inset_rect()
+                if rect.isEmpty():
+                    continue
+                shown_at = shown_at or depth
+                start = time.perf_counter()
+                overlay.inset_image(rect.width() * 2, rect.height() * 2)
+                inset_ms.append(time.perf_counter() - start)
+            overlay.cancel_selection()
+            app.processEvents()
+
+        grabs = source.grabs
+
+        # Previews of each level's region at INSET_SIZE, minified where the region is larger
+        frame = main.FramePyramid(source.grab(monitor))
+        full = frame.levels[0]
+        regions = [(0, 0, full.width(), full.height())]
+        for row, col in KEY_PATH[:3]:
+            x, y, w, h = regions[-1]
+            regions.append((x + col * w / 3, y + row * h / 3, w / 3, h / 3))
+        pyramid, direct = [], []
+        for x, y, w, h in regions:
+            out_w, out_h = main.GridOverlay.INSET_SIZE, round(main.GridOverlay.INSET_SIZE * h / w)
+            frame.level(4)  # Built once per activation in real use
+            start = time.perf_counter()
+            frame.crop(x, y, w, h, out_w, out_h)
+            pyramid.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            full.copy(int(x), int(y), int(w), int(h)).scaled(out_w, out_h, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+            direct.append(time.perf_counter() - start)
+
+        results[label] = {
+            "grabs_per_activation": grabs / activations,
+            "shown_from_depth": shown_at,
+            "inset": summarize(inset_ms),
+            "preview_pyramid_ms": sum(pyramid) / len(pyramid) * 1000,
+            "preview_direct_ms": sum(direct) / len(direct) * 1000,
+        }
+        overlay.deleteLater()
+    return results
+
+
+def synthetic_screen(np, width, height, seed=7):
+    """Grayscale test screenshot and the (x, y, width, height) of its controls.
+
+    Light background with a few slightly darker panels (not clickable), and
+    buttons (bordered, filled), icons (solid squares) and words (runs of
+    small glyph blocks) scattered over it.
+    """
+    rng = random.Random(seed)
+    screen = np.full((height, width), 236, np.uint8)
+    for _ in range(6):
+        x, y = rng.randrange(width - 400), rng.randrange(height - 300)
+        screen[y:y + rng.randint(150, 300), x:x + rng.randint(200, 400)] = 226
+    controls = []
+    for _ in range(300):
+        kind = rng.choice(("button", "icon", "word"))
+        if kind == "button":
+            w, h = rng.randint(50, 110), rng.randint(20, 28)
+        elif kind == "icon":
+            w = h = rng.randint(12, 24)
+        else:
+            w, h = rng.randint(24, 70), 10
+        x, y = rng.randrange(8, width - w - 8), rng.randrange(8, height - h - 8)
+        if any(x < cx + cw + 8 and cx < x + w + 8 and y < cy + ch + 8 and cy < y + h + 8
+               for cx, cy, cw, ch in controls):
+            continue
+        if kind == "button":
+            screen[y:y + h, x:x + w] = 120
+            screen[y + 1:y + h - 1, x + 1:x + w - 1] = 250
+            glyphs = x + w // 4
+            while glyphs < x + 3 * w // 4 - 5:
+                screen[y + h // 2 - 3:y + h // 2 + 4, glyphs:glyphs + 5] = 40
+                glyphs += 7
+        elif kind == "icon":
+            screen[y:y + h, x:x + w] = rng.choice((30, 70, 160))
+        else:
+            glyph = x
+            while glyph < x + w - 5:
+                screen[y:y + h, glyph:glyph + 5] = 30
+                glyph += rng.choice((7, 7, 7, 12))
+        controls.append((x, y, w, h))
+    return screen, controls
+
+
+def bench_snap(main, app, regions=300):
+    """Content-aware snap on synthetic screenshots: hit rate vs the region center, and latency vs budget."""
+    try:
+        snap = main.ContentSnap()
+    except ImportError:
+        return {"skipped": "numpy not installed"}
+    np = snap.np
+    screen, controls = synthetic_screen(np, 1920, 1080)
+    rng = random.Random(8)
+
+    # Regions the size of a 1080p cell four levels deep (71x40) containing a control off-center
+    hits = {"snap": 0, "center": 0}
+    samples = []
+    tested = 0
+    for x, y, w, h in controls[:regions]:
+        rw, rh = max(71, w + 8), max(40, h + 8)
+        rx = min(max(0, x + w // 2 - rng.randint(rw // 5, rw // 2)), 1920 - rw)
+        ry = min(max(0, y + h // 2 - rng.randint(-rh // 3, rh // 3)), 1080 - rh)
+        center = (rx + rw / 2, ry + rh / 2)
+        start = time.perf_counter()
+        point = snap.find(screen[ry:ry + rh, rx:rx + rw])
+        samples.append(time.perf_counter() - start)
+        point = (rx + point[0], ry + point[1]) if point is not None else center
+        for name, (px, py) in (("snap", point), ("center", center)):
+            if x <= px < x + w and y <= py < y + h:
+                hits[name] += 1
+        tested += 1
+
+    # Through the overlay: every keystroke of the navigation path, with a Retina 5K capture
+    monitor = FakeMonitor(0, 0, 5120, 2880)
+    snap = main.ContentSnap()
+    overlay = main.GridOverlay(monitor, main.HotkeySignals(), FakeWindowPlatform(),
+                               frame_source=SyntheticFrameSource(scale=2), snap=snap)
+    keystrokes = []
+    for _ in range(10):
+        overlay.activate()
+        wait_for(app, lambda: overlay.frame is not None)
+        for row, col in KEY_PATH:
+            start = time.perf_counter()
+            overlay.subdivide_to_cell(row, col)
+            keystrokes.append(time.perf_counter() - start)
+        overlay.cancel_selection()
+        app.processEvents()
+    overlay.deleteLater()
+
+    return {
+        "regions": tested,
+        "snap_hit_rate": hits["snap"] / tested,
+        "center_hit_rate": hits["center"] / tested,
+        "find": summarize(samples),
+        "budget_ms": snap.budget_ms,
+        "over_budget": snap.over_budget,
+        "keystroke_5k": summarize(keystrokes),
+        "snapped_keystrokes": snap.runs,
+    }
+
+
+def keys_to_hit(overlay, x, y, target, max_depth=12):
+    """Grid keys until the cursor (the cell's center) lands inside target (x, y, width, height)."""
+    overlay.activate()
+    tx, ty, tw, th = target
+    for depth in range(1, max_depth + 1):
+        xs, ys = overlay.region_edges()
+        col = min(max(sum(edge <= x for edge in xs) - 1, 0), len(xs) - 2)
+        row = min(max(sum(edge <= y for edge in ys) - 1, 0), len(ys) - 2)
+        overlay.enter_cell(row, col)
+        cx = overlay.region_x + overlay.region_width / 2
+        cy = overlay.region_y + overlay.region_height / 2
+        if tx <= cx < tx + tw and ty <= cy < ty + th:
+            return depth
+    return max_depth
+
+
+def bench_adaptive(main, app, train=400, test=300, size=24):
+    """Adaptive grid: keys to reach frequently clicked vs novel targets, even vs density-weighted cells."""
+    monitor = FAKE_MONITORS[0]
+    rng = random.Random(9)
+    hotspots = [(rng.randrange(monitor.width - size), rng.randrange(monitor.height - size)) for _ in range(12)]
+    popularity = [1 / (rank + 1) for rank in range(len(hotspots))]  # Zipf
+
+    now = [1_000_000.0]
+    path = main.DATA_DIR / "adaptive-clicks.jsonl"
+    model = main.ClickFrequencyModel(path, clock=lambda: now[0])
+    for _ in range(train):
+        x, y = rng.choices(hotspots, popularity)[0]
+        model.record("bench", x + rng.uniform(4, size - 4), y + rng.uniform(4, size - 4))
+        now[0] += 600
+    reloaded = main.ClickFrequencyModel(path, clock=lambda: now[0])
+    density = reloaded.weights("bench")
+
+    overlay = main.GridOverlay(monitor, main.HotkeySignals(), FakeWindowPlatform())
+    frequent = [rng.choices(hotspots, popularity)[0] for _ in range(test)]
+    novel = [(rng.randrange(monitor.width - size), rng.randrange(monitor.height - size)) for _ in range(test)]
+    results = {}
+    for mode, points in (("even", []), ("adaptive", density)):
+        overlay.click_density = points
+        results[mode] = {
+            name: statistics.mean(keys_to_hit(overlay, x + size / 2, y + size / 2, (x, y, size, size))
+                                  for x, y in targets)
+            for name, targets in (("frequent_keys", frequent), ("novel_keys", novel))
+        }
+
+    # Layout cost with a full scope of history, edge cache cleared each time
+    overlay.click_density = density
+    overlay.activate()
+    layout = []
+    for _ in range(500):
+        overlay.edge_cache.clear()
+        start = time.perf_counter()
+        overlay.region_edges()
+        layout.append(time.perf_counter() - start)
+    overlay.deactivate()
+    overlay.deleteLater()
+
+    return {
+        "history_targets": len(density),
+        "persisted": int(sorted(density) == sorted(model.weights("bench"))),
+        **results,
+        "layout_us": statistics.median(layout) * 1e6,
+    }
+
+
+def bench_optimize(main, app, clicks=1_000_000, layouts=200, checked=20, sample=20000):
+    """Layout optimizer: click evaluations per second, and agreement with the direct simulation."""
+    try:
+        import numpy as np
+        import optimize_layout
+    except ImportError:
+        return {"skipped": "numpy not installed"}
+    rng = np.random.default_rng(4)
+    sizes = ((1920, 1080), (2560, 1440))
+    data = {}
+    for width, height in sizes:
+        # Clustered clicks (toolbars, buttons) plus uniform background clicks
+        hot = rng.uniform((0, 0), (width - 24, height - 24), size=(60, 2))
+        picks = rng.zipf(1.5, clicks // len(sizes)) % len(hot)
+        points = hot[picks] + rng.uniform(0, 24, size=(picks.size, 2))
+        spread = rng.random(picks.size) < 0.2
+        points[spread] = rng.uniform((0, 0), (width, height), size=(spread.sum(), 2))
+        xs, ys = np.floor(points.T) + 0.5
+        data[(width, height)] = (xs, ys, np.ones(picks.size))
+
+    candidates = optimize_layout.candidate_layouts()
+    chosen = [candidates[i] for i in random.Random(6).sample(range(len(candidates)), layouts)]
+    evaluator = optimize_layout.LayoutEvaluator(data, 16)
+    start = time.perf_counter()
+    for layout in chosen:
+        evaluator.histogram(layout)
+    elapsed = time.perf_counter() - start
+
+    # The bitmask engine against the direct simulation, and even layouts against keystroke_cost
+    errors = 0
+    subset = {size: tuple(column[:sample] for column in columns) for size, columns in data.items()}
+    reference = optimize_layout.LayoutEvaluator(subset, 16)
+    start = time.perf_counter()
+    for layout in chosen[:checked]:
+        expected = np.zeros(optimize_layout.MAX_DEPTH + 2)
+        for (width, height), (xs, ys, weights) in subset.items():
+            keys = optimize_layout.simulate(layout, xs, ys, width, height, 16)
+            expected += np.bincount(keys, weights=weights, minlength=expected.size)
+        errors += not np.array_equal(expected, reference.histogram(layout))
+    direct = time.perf_counter() - start
+    for layout in candidates:
+        if optimize_layout.exportable(layout):
+            grid = tuple((rows, cols) for rows, cols, _ in layout)
+            worst = max(main.keystroke_cost(width, height, grid, 16)[0] for width, height in sizes)
+            errors += optimize_layout.summarize(reference.histogram(layout))["max"] > worst
+
+    return {
+        "clicks": clicks,
+        "layouts": layouts,
+        "evals_per_s": layouts * clicks / elapsed,
+        "direct_per_s": checked * sample * len(sizes) / direct,
+        "errors": errors,
+    }
+
+
+def bench_journal(main, app, records=2_000_000, burst=1000, max_bytes=4 << 20):
+    """Event journal: record() cost, writes with rotation, and report throughput over millions of records."""
+    import journal_report
+    from journal import JOURNAL_ACTIVATE, JOURNAL_BACK, JOURNAL_CELL, JOURNAL_CONFIRM, JOURNAL_KINDS, EventJournal
+
+    # The records of two overlay sessions driven by keys through the manager
+    keyboard = sys.modules["pynput.keyboard"]
+    Key = keyboard.Key
+    temporary = tempfile.TemporaryDirectory(prefix="kbnav-journal-", ignore_cleanup_errors=True)
+    directory = Path(temporary.name)
+    journal = EventJournal(directory / "session.bin")
+    manager = main.OverlayManager(main.MonitorTopology(FakeMonitorProvider()), journal=journal)
+    cell_keys = manager.bindings.cell_keys
+    sessions = (
+        # 3 cells, go_back, a cell, click-mode Right and Left, confirm: 8 keys
+        [cell_keys[(1, 1)]] * 3 + [Key.esc, cell_keys[(0, 2)], Key.right, Key.left, Key.enter],
+        # A cell and go_back, then cancelled
+        [cell_keys[(2, 0)], Key.esc],
+    )
+    for keys in sessions:
+        manager.create_and_show_overlay()
+        for key in keys:
+            manager.on_press(key)
+            manager.on_release(key)
+            app.processEvents()
+        if manager.overlay is not None:
+            manager.signals.cancel.emit()
+        wait_for(app, lambda: manager.overlay is None)
+    journal.close()
+    session_records = list(journal.records())
+    kinds = [JOURNAL_KINDS[record[2]] for record in session_records]
+    expected = ["activate", "cell", "cell", "cell", "back", "cell", "confirm", "activate", "cell", "back", "cancel"]
+    session_stats = journal_report.JournalStats(journal.app_names())
+    session_stats.feed(session_records)
+    session_errors = int(kinds != expected) + (session_stats.keys != [len(sessions[0])])
+    errors = session_errors
+
+    # Millions of records in sessions of 4 cells, a go_back and a confirm, 30 ms apart
+    path = directory / "journal.bin"
+    now = [1_000_000.0]
+
+    def clock():
+        now[0] += 0.03
+        return now[0]
+
+    journal = EventJournal(path, clock=clock)
+    journal.MAX_BYTES = max_bytes
+    session = (JOURNAL_ACTIVATE,) + (JOURNAL_CELL,) * 4 + (JOURNAL_BACK, JOURNAL_CONFIRM)
+    samples = []
+    written = 0
+    while written < records:
+        start = time.perf_counter()
+        for i in range(burst):
+            kind = session[(written + i) % len(session)]
+            journal.keys += 1  # Reset by the activation
+            journal.record(kind, 1, 1, 1, 100, 200, "com.example.App%d" % (i % 3))
+        samples.append((time.perf_counter() - start) / burst)
+        written += burst
+    start = time.perf_counter()
+    journal.close()
+    flush = time.perf_counter() - start
+
+    per_file = (max_bytes - 32) // 32
+    retained = sum((f.stat().st_size - 32) // 32 for f in journal.files())
+    expected_retained = written if journal.rotations <= journal.BACKUPS else \
+        written - (journal.rotations - journal.BACKUPS) * per_file
+    errors += (retained != expected_retained) + (journal.failed > 0) + (len(journal.files()) > journal.BACKUPS + 1)
+
+    stats = journal_report.JournalStats(journal.app_names())
+    start = time.perf_counter()
+    stats.feed(journal.records())
+    elapsed = time.perf_counter() - start
+    errors += stats.records != retained
+    errors += any(keys != len(session) - 1 for keys in stats.keys)  # All but the activation
+    errors += len(stats.apps) > 3
+    temporary.cleanup()
+
+    return {
+        "session_errors": session_errors,
+        "record_us": statistics.median(samples) * 1e6,
+        "close_ms": flush * 1000,
+        "rotations": journal.rotations,
+        "retained": retained,
+        "report_events_per_s": stats.records / elapsed,
+        "errors": errors,
+    }
+
+
+def typing_events(keyboard, count=20000, seed=3):
+    """Press/release pairs resembling ordinary typing with some modifiers."""
+    rng = random.Random(seed)
+    Key, KeyCode = keyboard.Key, keyboard.KeyCode
+    keys = [KeyCode.from_char(c) for c in "abcdefghijklmnopqrstuvwxyz0123456789"]
+    keys += [Key.space, Key.enter, Key.backspace, Key.shift, Key.cmd, Key.ctrl_l, Key.esc]
+    return [rng.choice(keys) for _ in range(count)]
+
+
+def bench_dispatch(main, app, chunk=256):
+    """Key event throughput (events/s): listener callbacks queuing, and main-thread handling."""
+    keyboard = sys.modules["pynput.keyboard"]
+    manager = make_manager(main)
+    events = typing_events(keyboard)
+
+    def run():
+        on_press, on_release = manager.on_press, manager.on_release
+        listener = handled = 0.0
+        for offset in range(0, len(events), chunk):
+            start = time.perf_counter()
+            for key in events[offset:offset + chunk]:
+                on_press(key)
+                on_release(key)
+            listener += time.perf_counter() - start
+            start = time.perf_counter()
+            manager.drain_key_events()
+            handled += time.perf_counter() - start
+        app.processEvents()
+        return {"listener_events_per_s": 2 * len(events) / listener,
+                "handled_events_per_s": 2 * len(events) / handled}
+
+    idle = run()
+    # Mark an overlay visible without activating it, so emitted signals have no receivers
+    manager.overlay = first_overlay(manager)
+    visible = run()
+    manager.overlay = None
+    return {"idle": idle, "visible": visible}
+
+
+def bench_event_ring(main, app, threads=4, per_thread=50000, capacity=1024):
+    """Several threads flooding a KeyEventRing while the main thread drains it."""
+    import threading
+    signals = main.HotkeySignals()
+    ring = main.KeyEventRing(signals.key_events.emit, capacity)
+    last_seen = {}
+    violations = [0]
+
+    def drain():
+        for kind, producer, sequence in ring.drain():
+            if sequence <= last_seen.get(producer, -1):
+                violations[0] += 1
+            last_seen[producer] = sequence
+
+    signals.key_events.connect(drain)
+
+    def produce(index):
+        push = ring.push
+        for sequence in range(per_thread):
+            push(main.KEY_PRESS, index, sequence)
+            if sequence % 256 == 255:
+                time.sleep(0)  # let the main thread in, as real bursts would
+
+    workers = [threading.Thread(target=produce, args=(i,), name=f"producer-{i}") for i in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    while any(worker.is_alive() for worker in workers) or ring.events:
+        app.processEvents()
+    elapsed = time.perf_counter() - start
+    app.processEvents()
+
+    stats = ring.stats()
+    offered = threads * per_thread
+    return {
+        # Delivered to the main thread; dropped events are only counted
+        "events_per_s": stats["drained"] / elapsed,
+        "offered_per_s": offered / elapsed,
+        "pushed": stats["pushed"],
+        "dropped": stats["dropped"],
+        "dropped_share": stats["dropped"] / offered,
+        "overflows": stats["overflows"],
+        # Events neither dropped nor delivered (should be 0)
+        "lost": (offered - stats["pushed"] - stats["dropped"]) + (stats["pushed"] - stats["drained"]),
+        "order_violations": violations[0],
+        "batches": stats["batches"],
+        "max_batch": stats["max_batch"],
+    }
+
+
+def bench_typeahead(main, app, rounds=50):
+    """A typed-ahead path applied key by key vs as one burst: cursor moves, repaints, time."""
+    manager = make_manager(main)
+    manager.toggle_overlay(time.perf_counter())
+    overlay = first_overlay(manager)
+    wait_for(app, lambda: overlay.last_activation_latency is not None)
+    keys = [manager.bindings.cell_keys[cell] for cell in KEY_PATH]
+
+    counts = Counter()
+    move, update = overlay.move_mouse_to_region_center, overlay.update
+
+    def counting_move():
+        counts["moves"] += 1
+        move()
+
+    def counting_update(*args):
+        counts["updates"] += 1
+        update(*args)
+
+    overlay.move_mouse_to_region_center = counting_move
+    overlay.update = counting_update
+
+    def run(burst):
+        counts.clear()
+        regions = []
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for key in keys:
+                manager.on_press(key)
+                manager.on_release(key)
+                if not burst:
+                    app.processEvents()
+            app.processEvents()
+            regions.append((overlay.region_x, overlay.region_y, overlay.region_width, len(overlay.history)))
+            while overlay.history:
+                overlay.go_back()
+            app.processEvents()
+        elapsed = time.perf_counter() - start
+        return {
+            "ms_per_path": elapsed / rounds * 1000,
+            # Minus the go_backs (the last one restores the original position instead)
+            "moves_per_path": counts["moves"] / rounds - (len(KEY_PATH) - 1),
+            "updates_per_path": counts["updates"] / rounds - len(KEY_PATH),
+        }, regions
+
+    stepwise, step_regions = run(burst=False)
+    burst, burst_regions = run(burst=True)
+
+    # A held key: the OS repeats the press without releases
+    held = keys[0]
+    ignored = manager.repeats_ignored
+    for _ in range(30):
+        manager.on_press(held)
+    app.processEvents()
+    manager.on_release(held)
+    app.processEvents()
+    held_depth = len(overlay.history)
+
+    # Released with Shift down (q pressed, Q released): the next press still counts
+    keyboard = sys.modules["pynput.keyboard"]
+    press, release = (keyboard.KeyCode(vk=12, char=held.char), keyboard.KeyCode(vk=12, char=held.char.upper()))
+    depth = len(overlay.history)
+    for event in ((manager.on_press, press), (manager.on_press, keyboard.Key.shift),
+                  (manager.on_release, release), (manager.on_release, keyboard.Key.shift),
+                  (manager.on_press, press), (manager.on_release, press)):
+        event[0](event[1])
+        app.processEvents()
+    held_key_errors = int(len(overlay.history) != depth + 2)
+
+    # A held Escape keeps stepping back
+    depth = len(overlay.history)
+    for _ in range(2):
+        manager.on_press(keyboard.Key.esc)
+    manager.on_release(keyboard.Key.esc)
+    app.processEvents()
+    held_key_errors += len(overlay.history) != depth - 2
+
+    del overlay.move_mouse_to_region_center, overlay.update
+    manager.signals.cancel.emit()
+    app.processEvents()
+    return {
+        "stepwise": stepwise,
+        "burst": burst,
+        "region_mismatches": int(step_regions != burst_regions),
+        "held_key_depth": held_depth,
+        "repeats_ignored": manager.repeats_ignored - ignored,
+        "held_key_errors": held_key_errors,
+    }
+
+
+def bench_construction(main, app, rounds=5):
+    """GridOverlay construction cost (done once per monitor at startup)."""
+    results = {}
+    for label, (width, height) in RESOLUTIONS.items():
+        monitor = FakeMonitor(0, 0, width, height)
+        samples = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            overlay = main.GridOverlay(monitor, main.HotkeySignals(), FakeWindowPlatform())
+            samples.append(time.perf_counter() - start)
+            overlay.deleteLater()
+            app.processEvents()
+        results[label] = {"median_ms": statistics.median(samples) * 1000}
+    return results
+
+
+def bench_navigation(main, app, rounds=200):
+    """subdivide_to_cell / go_back throughput, and per-stage keypress latency."""
+    keyboard = sys.modules["pynput.keyboard"]
+    manager = make_manager(main)
+    manager.toggle_overlay(time.perf_counter())
+    overlay = first_overlay(manager)
+    wait_for(app, lambda: overlay.last_activation_latency is not None)
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for row, col in KEY_PATH:
+            overlay.subdivide_to_cell(row, col)
+        for _ in KEY_PATH:
+            overlay.go_back()
+    ops = 2 * len(KEY_PATH) * rounds / (time.perf_counter() - start)
+
+    # Full keypress path through the listener callback, including paint
+    cell_keys = manager.bindings.cell_keys
+    tracer = main.latency_tracer
+    for samples in tracer.samples.values():
+        samples.clear()
+    painted = lambda: tracer.trace is not None and "paint" in tracer.trace[1]
+    for _ in range(rounds // 10):
+        for row, col in KEY_PATH:
+            tracer.trace = None
+            manager.on_press(cell_keys[(row, col)])
+            manager.on_release(cell_keys[(row, col)])
+            wait_for(app, painted)
+        for _ in KEY_PATH:
+            tracer.trace = None
+            manager.on_press(keyboard.Key.esc)
+            manager.on_release(keyboard.Key.esc)
+            wait_for(app, painted)
+    manager.signals.cancel.emit()
+    app.processEvents()
+
+    stages = {stage: {"p50_ms": stats["p50_ms"], "p95_ms": stats["p95_ms"]}
+              for stage, stats in tracer.summary().items() if stage != "activation"}
+    return {"ops_per_s": ops, "stages": stages}
+
+
+def bench_hit_test(main, app, count=5000, queries=500):
+    """find_and_activate_app_at_point over a large synthetic window list."""
+    window_list = synthetic_windows(count)
+    service = main.WindowSnapshotService(
+        window_source=lambda: window_list,
+        app_lookup=lambda pid: FakeApp(pid),
+    )
+    monitor = FakeMonitor(0, 0, 5120, 2880)
+    overlay = main.GridOverlay(monitor, main.HotkeySignals(), FakeWindowPlatform(), service)
+    rng = random.Random(4)
+    points = [(rng.randint(0, 5119), rng.randint(0, 2879)) for _ in range(queries)]
+
+    start = time.perf_counter()
+    service.refresh()
+    refresh = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for x, y in points:
+        overlay.find_and_activate_app_at_point(x, y)
+    per_query = (time.perf_counter() - start) / queries
+    overlay.deleteLater()
+    return {"windows": count, "refresh_ms": refresh * 1000, "query_us": per_query * 1e6}
+
+
+class FakeTargetSource:
+    """Hint target source returning random rects, frontmost first."""
+
+    def __init__(self, count, width=1920, height=1080, seed=7):
+        rng = random.Random(seed)
+        self.boxes = []
+        for _ in range(count):
+            w, h = rng.randint(24, 300), rng.randint(24, 200)
+            x, y = rng.randrange(width - w), rng.randrange(height - h)
+            self.boxes.append((x, y, x + w, y + h))
+
+    def targets(self, left, top, right, bottom):
+        return [box for box in self.boxes
+                if box[0] >= left and box[1] >= top and box[2] <= right and box[3] <= bottom]
+
+
+def bench_hints(main, app, sizes=(100, 500, 2000), rounds=5):
+    """Hint labelling and painting cost vs number of targets, and keystrokes per target."""
+    from PyQt5.QtCore import QPoint
+    from PyQt5.QtGui import QImage
+    keyboard = sys.modules["pynput.keyboard"]
+    monitor = FAKE_MONITORS[0]
+
+    results = {}
+    for count in sizes:
+        source = FakeTargetSource(count, monitor.width, monitor.height)
+        overlay = main.GridOverlay(monitor, main.HotkeySignals(), FakeWindowPlatform(), target_source=source)
+        overlay.activate()
+        wait_for(app, lambda: overlay.last_activation_latency is not None)
+        image = QImage(monitor.width, monitor.height, QImage.Format_ARGB32_Premultiplied)
+
+        label_samples, paint_samples = [], []
+        for round_index in range(rounds):
+            start = time.perf_counter()
+            overlay.toggle_hints()
+            label_samples.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            overlay.render(image, QPoint())
+            elapsed = time.perf_counter() - start
+            if round_index == 0:
+                cold_paint = elapsed  # QStaticText layout for every label
+            else:
+                paint_samples.append(elapsed)
+            overlay.toggle_hints()
+
+        # Every label lands on its own target
+        overlay.toggle_hints()
+        hints = dict(overlay.hints)
+        label_errors = 0
+        for label, target in hints.items():
+            overlay.hint_mode, overlay.hint_typed = True, ""
+            overlay.history.clear()
+            for char in label:
+                overlay.select_key(keyboard.KeyCode.from_char(char))
+            if (overlay.region_x, overlay.region_y) != target[:2] or overlay.hint_mode:
+                label_errors += 1
+
+        results[f"{count}_targets"] = {
+            "label_ms": statistics.median(label_samples) * 1000,
+            "cold_paint_ms": cold_paint * 1000,
+            "paint_ms": statistics.median(paint_samples) * 1000,
+            "max_keys": max(map(len, hints)),
+            "label_errors": label_errors,
+        }
+        overlay.deactivate()
+        overlay.deleteLater()
+        app.processEvents()
+    return results
+
+
+def bench_config(main, app, rounds=200, reloads=10):
+    """Config file load (parse + validate) and save cost, and outside edit to applied latency."""
+    keyboard = sys.modules["pynput.keyboard"]
+    manager = make_manager(main)
+    store = manager.config_store
+    config = manager.current_config()
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        store.save(config)
+    save = (time.perf_counter() - start) / rounds
+
+    load = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        store.load()
+        load.append(time.perf_counter() - start)
+
+    # Outside edits (as deployment tooling would make), applied through the file watch
+    reload = []
+    keys = [keyboard.Key.backspace, keyboard.Key.enter]
+    for i in range(reloads):
+        key = keys[i % 2]
+        edited = main.HotkeyConfig(config.key_map, key, config.activation_modifiers,
+                                   config.activation_key, config.grid_layouts)
+        start = time.perf_counter()
+        main.write_atomic(store.path, edited.to_json())
+        wait_for(app, lambda: manager.bindings.overlay_actions.get(key) is main.ACTION_CONFIRM)
+        reload.append(time.perf_counter() - start)
+
+    # A selection key taken by a cell of a larger grid must be rejected
+    conflicting = main.HotkeyConfig(config.key_map, keyboard.KeyCode.from_char("1"), config.activation_modifiers,
+                                    config.activation_key, ((4, 4), (3, 3)))
+    try:
+        conflicting.validate()
+        errors = 1
+    except main.ConfigError:
+        errors = 0
+
+    return {
+        "load_us": statistics.median(load) * 1e6,
+        "save_us": save * 1e6,
+        "reload": summarize(reload),
+        "errors": errors,
+    }
+
+
+def hotplug_layouts(count, seed=5):
+    """Random sequence of 1-4 monitor layouts, as seen while docking/undocking."""
+    rng = random.Random(seed)
+    sizes = [(1920, 1080), (2560, 1440), (3840, 2160), (1512, 982)]
+    layouts = []
+    for _ in range(count):
+        x = 0
+        layout = []
+        for index in range(rng.randint(1, 4)):
+            width, height = rng.choice(sizes)
+            layout.append(FakeMonitor(x, 0, width, height, f"FAKE-{index + 1}", index == 0))
+            x += width
+        layouts.append(layout)
+    return layouts
+
+
+def bench_hotplug(main, app, bursts=20, burst_size=10, queries=20000):
+    """Topology refreshes and overlay rebuilds for hot-plug bursts, and monitor_at cost."""
+    provider = FakeMonitorProvider()
+    topology = main.MonitorTopology(provider)
+    manager = main.OverlayManager(topology)
+    built = []
+    original_sync = manager.sync_overlays
+
+    def counting_sync():
+        before = set(manager.overlays)
+        original_sync()
+        built.extend(set(manager.overlays) - before)
+
+    topology.changed.disconnect(manager.sync_overlays)
+    topology.changed.connect(counting_sync)
+
+    layouts = hotplug_layouts(bursts * burst_size)
+    provider.reads = 0
+    notifications = 0
+    for burst in range(bursts):
+        for layout in layouts[burst * burst_size:(burst + 1) * burst_size]:
+            provider.set_monitors(layout)
+            notifications += 1
+        wait_for(app, lambda: not topology.stale)
+
+    # Every activation lands on the overlay of the monitor under the cursor
+    mismatches = 0
+    for monitor in topology.monitors:
+        manager.mouse.position = (monitor.x + monitor.width // 2, monitor.y + monitor.height // 2)
+        manager.create_and_show_overlay()
+        if manager.overlay is not manager.overlays[monitor.key]:
+            mismatches += 1
+        manager.overlay.cancel_selection()
+        app.processEvents()
+    manager.mouse.position = (0, 0)
+
+    rng = random.Random(6)
+    width = max(m.x + m.width for m in topology.monitors)
+    points = [(rng.randrange(width), rng.randrange(2160)) for _ in range(queries)]
+    start = time.perf_counter()
+    for x, y in points:
+        topology.monitor_at(x, y)
+    query = (time.perf_counter() - start) / queries
+
+    return {
+        "notifications": notifications,
+        "refreshes": provider.reads,
+        "overlays_built": len(built),
+        "activation_mismatches": mismatches,
+        "query_us": query * 1e6,
+    }
+
+
+BENCHMARKS = {
+    "activation": bench_activation,
+    "construction": bench_construction,
+    "navigation": bench_navigation,
+    "window_level": bench_window_level,
+    "window_index": bench_window_index,
+    "hit_test": bench_hit_test,
+    "confirm": bench_confirm,
+    "input": bench_input,
+    "drag": bench_drag,
+    "paint": bench_paint,
+    "inset": bench_inset,
+    "snap": bench_snap,
+    "adaptive": bench_adaptive,
+    "optimize": bench_optimize,
+    "journal": bench_journal,
+    "dispatch": bench_dispatch,
+    "event_ring": bench_event_ring,
+    "typeahead": bench_typeahead,
+    "hotplug": bench_hotplug,
+    "hints": bench_hints,
+    "config": bench_config,
+}
+
+# Metric name suffix -> (higher_is_better, smallest change worth reporting).
+# Metrics not listed here (counts, max_ms, p95/p99 of small samples) are
+# informational and never fail a comparison.
+TRACKED_METRICS = {
+    "median_ms": (False, 0.05),
+    "p50_ms": (False, 0.05),
+    "paint_ms": (False, 0.05),
+    "label_ms": (False, 0.05),
+    "hit_rate": (True, 0.02),
+    "build_ms": (False, 0.5),
+    "refresh_ms": (False, 0.5),
+    "query_us": (False, 0.5),
+    "load_us": (False, 20),
+    "layout_us": (False, 5),
+    "post_us": (False, 2),
+    "record_us": (False, 0.2),
+    "errors": (False, 0),
+    "lost": (False, 0),
+    "order_violations": (False, 0),
+    "mismatches": (False, 0),
+    "dropped_share": (False, 0.05),
+    "pixels": (False, 0),
+    "refreshes": (False, 0),
+    "wakeups_per_s": (False, 0.5),
+    "calls_per_s": (False, 0.5),
+    "events_per_s": (True, 0),
+    "ops_per_s": (True, 0),
+    "evals_per_s": (True, 0),
+}
+
+
+# Correctness counters: any non-zero value fails the run, with or without
+# --compare, and repeated runs keep the worst value
+CORRECTNESS_COUNTERS = ("errors", "lost", "order_violations", "mismatches")
+
+
+def flatten(result, prefix=""):
+    """{"a": {"b": 1}} -> {"a.b": 1}, keeping only numbers."""
+    flat = {}
+    for key, value in result.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def metric_direction(name):
+    """(higher_is_better, min_delta) for a tracked metric, else None."""
+    suffix = next((s for s in TRACKED_METRICS if name.endswith(s)), None)
+    return TRACKED_METRICS.get(suffix)
+
+
+def best_of(runs):
+    """Merge repeated flat results, keeping each tracked metric's best value."""
+    merged = dict(runs[0])
+    for run in runs[1:]:
+        for name, value in run.items():
+            direction = metric_direction(name)
+            if direction is None or name not in merged:
+                continue
+            pick = max if direction[0] or name.endswith(CORRECTNESS_COUNTERS) else min
+            merged[name] = pick(merged[name], value)
+    return merged
+
+
+def compare(results, baseline, tolerance):
+    """List of (metric, baseline, current, change) for tracked regressions."""
+    regressions = []
+    for name, current in results.items():
+        old = baseline.get(name)
+        direction = metric_direction(name)
+        if old is None or direction is None:
+            continue
+        higher_is_better, min_delta = direction
+        worse_by = old - current if higher_is_better else current - old
+        if old == 0:
+            # No relative change from zero: any change beyond min_delta counts
+            change = float('inf') if current else 0.0
+            regressed = worse_by > min_delta
+        else:
+            change = (current - old) / abs(old)
+            regressed = worse_by / abs(old) > tolerance and worse_by > min_delta
+        if regressed:
+            regressions.append((name, old, current, change))
+    return regressions
+
+
+def correctness_failures(results):
+    """[(metric, value)] of non-zero correctness counters."""
+    return [(name, value) for name, value in results.items()
+            if name.endswith(CORRECTNESS_COUNTERS) and value]
+
+
+def format_value(value):
+    """Compact display of a (possibly nested) benchmark value."""
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    if isinstance(value, dict):
+        return ", ".join(
+            f"{k}({format_value(v)})" if isinstance(v, dict) else f"{k}={format_value(v)}"
+            for k, v in value.items()
+        )
+    return str(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("names", nargs="*", metavar="name",
+                        help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="show the app's debug output while benchmarking")
+    parser.add_argument("--save", metavar="PATH",
+                        help="write results to a JSON file")
+    parser.add_argument("--compare", metavar="PATH",
+                        help="compare against a saved JSON file and exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="relative slowdown allowed by --compare (default: 0.25)")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="run each benchmark N times and keep the best value of each metric")
+    args = parser.parse_args()
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+
+    main_module, app = setup(args.verbose)
+    runs = []
+    for _ in range(max(1, args.repeat)):
+        results = {}
+        for name in args.names or BENCHMARKS:
+            if args.verbose:
+                result = BENCHMARKS[name](main_module, app)
+            else:
+                with redirect_stdout(StringIO()), redirect_stderr(StringIO()):
+                    result = BENCHMARKS[name](main_module, app)
+            results[name] = result
+            print(f"{name}:")
+            for key, value in result.items():
+                print(f"  {key}: {format_value(value)}")
+        runs.append(flatten(results))
+
+    flat = best_of(runs)
+    failures = correctness_failures(flat)
+    if args.save:
+        data = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "metrics": flat,
+        }
+        with open(args.save, "w") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        print(f"\nSaved {len(flat)} metrics to {args.save}")
+
+    status = 0
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["metrics"]
+        regressions = compare(flat, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.compare}:")
+            for metric, old, new, change in regressions:
+                print(f"  {metric}: {old:.3f} -> {new:.3f} ({change:+.0%})")
+            status = 1
+        else:
+            print(f"\nNo regressions against {args.compare} (tolerance {args.tolerance:.0%})")
+
+    if failures:
+        print(f"\n{len(failures)} correctness failure(s):")
+        for metric, value in failures:
+            print(f"  {metric}: {value}")
+        status = 1
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
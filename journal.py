@@ -0,0 +1,230 @@
+"""The overlay's event journal: record format, writer and reader.
+
+Only the standard library is imported, so journal_report.py can read
+journals without the app's dependencies (PyQt5, pynput, AppKit).
+"""
+
+import logging
+import time
+from collections import deque
+from pathlib import Path
+
+from layout_config import DATA_DIR
+
+log_settings = logging.getLogger("kbnav.settings")  # main.log_settings
+
+# The app's journal
+JOURNAL_FILE = "journal.bin"
+DEFAULT_PATH = DATA_DIR / JOURNAL_FILE
+
+# Event journal record kinds
+JOURNAL_ACTIVATE = 1  # x, y: cursor; app: frontmost app
+JOURNAL_CELL = 2      # row, col of the cell entered; depth after it; x, y: region center
+JOURNAL_JUMP = 3      # zoom to a hint, likely target, bookmark or --start-at-recent region; depth after
+                      # it; x, y: region center
+JOURNAL_BACK = 4      # go_back; depth after it
+JOURNAL_CONFIRM = 5   # x, y: click (drag end); app: target app; row: button, col: count,
+                      # extra: main.MOD_* modifiers, flags: JOURNAL_DRAG
+JOURNAL_CANCEL = 6
+JOURNAL_KINDS = {JOURNAL_ACTIVATE: 'activate', JOURNAL_CELL: 'cell', JOURNAL_JUMP: 'jump',
+                 JOURNAL_BACK: 'back', JOURNAL_CONFIRM: 'confirm', JOURNAL_CANCEL: 'cancel'}
+JOURNAL_DRAG = 1
+
+# (t, session, kind, depth, row, col, x, y, app, keys, extra, flags): 32 bytes,
+# little-endian. keys counts the keys pressed in the session so far.
+JOURNAL_RECORD = '<dIBBBBiiHHHH'
+# Magic, version, record size; padded to one record so records stay aligned
+JOURNAL_HEADER = '<4sHH24x'
+JOURNAL_MAGIC = b'KBNJ'
+JOURNAL_VERSION = 2
+
+
+class EventJournal:
+    """Append-only binary journal of overlay activity, for journal_report.py.
+
+    Each activation, cell, jump, go_back, confirm and cancel is one
+    fixed-size JOURNAL_RECORD. record() only appends a tuple to a deque; a
+    background thread packs and appends them every FLUSH_INTERVAL seconds
+    (or once FLUSH_RECORDS are waiting), so the overlay never waits on the
+    disk. App ids are stored as indexes into a text file with one id per
+    line (at most 65,535). Each record also carries keys, the non-modifier
+    keys pressed since the activation, which OverlayManager counts. Once the
+    journal reaches MAX_BYTES it is rotated like a log: journal.bin becomes
+    journal.1.bin and so on, keeping BACKUPS old files. Records still
+    buffered when the app crashes are lost.
+    """
+
+    FLUSH_INTERVAL = 2.0
+    FLUSH_RECORDS = 1024
+    MAX_BYTES = 8 << 20  # 262,143 records per file
+    BACKUPS = 7
+
+    def __init__(self, path=None, clock=time.time):
+        import struct
+        self.path = Path(path) if path else DEFAULT_PATH
+        self.apps_path = self.path.with_name(self.path.stem + "-apps.txt")
+        self.clock = clock
+        self.record_struct = struct.Struct(JOURNAL_RECORD)
+        self.header = struct.Struct(JOURNAL_HEADER).pack(JOURNAL_MAGIC, JOURNAL_VERSION, self.record_struct.size)
+        self.pending = deque()
+        self.session = 0
+        self.keys = 0  # Keys pressed since the activation
+        self.thread = None
+        self.wake = None
+        self.lock = None
+        self.closed = False
+        self.apps = None  # app id -> index (1-based; 0 is no app), loaded by the writer
+        self.written = 0
+        self.rotations = 0
+        self.failed = 0  # Records lost to write errors
+
+    def record(self, kind, depth=0, row=0, col=0, x=0, y=0, app='', extra=0, flags=0):
+        """Queue one record (main thread); an activation starts a new session."""
+        if self.closed:
+            return
+        if kind == JOURNAL_ACTIVATE:
+            self.session += 1
+            self.keys = 0
+        pending = self.pending
+        pending.append((self.clock(), self.session, kind, depth, row, col, int(x), int(y), app, self.keys,
+                        extra, flags))
+        if self.thread is None:
+            self.start()
+        elif len(pending) == self.FLUSH_RECORDS:
+            self.wake.set()
+
+    def start(self):
+        import atexit
+        import threading
+        self.wake = threading.Event()
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.run, name="kbnav-journal", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def run(self):
+        while not self.closed:
+            self.wake.wait(self.FLUSH_INTERVAL)
+            self.wake.clear()
+            self.flush()
+
+    def close(self):
+        """Write what is buffered and stop the writer thread."""
+        self.closed = True
+        if self.thread is not None:
+            self.wake.set()
+            self.thread.join(timeout=1.0)
+            self.flush()
+
+    def flush(self):
+        """Pack and append all queued records (writer thread, or close())."""
+        with self.lock:
+            pending = self.pending
+            batch = []
+            while pending:
+                batch.append(pending.popleft())
+            if not batch:
+                return
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                indexes = self.app_indexes(batch)
+                size = self.record_struct.size
+                data = bytearray(size * len(batch))
+                pack_into = self.record_struct.pack_into
+                for i, (t, session, kind, depth, row, col, x, y, app, keys, extra, flags) in enumerate(batch):
+                    pack_into(data, i * size, t, session, kind, depth, row, col, x, y, min(indexes[app], 0xFFFF),
+                              min(keys, 0xFFFF), extra, flags)
+                self.append(data)
+                self.written += len(batch)
+            except OSError:
+                self.failed += len(batch)
+                log_settings.warning("Could not write event journal %s", self.path, exc_info=True)
+
+    def app_indexes(self, batch):
+        """{app id: index} for the apps in batch, adding new ones to the apps file."""
+        if self.apps is None:
+            try:
+                self.apps = {app: i for i, app in enumerate(self.apps_path.read_text().splitlines(), 1)}
+            except FileNotFoundError:
+                self.apps = {}
+            self.apps[''] = 0
+        new = [app for app in dict.fromkeys(record[8] for record in batch) if app not in self.apps]
+        if new:
+            with open(self.apps_path, 'a') as f:
+                f.write("".join(app.replace("\n", " ") + "\n" for app in new))
+            for app in new:
+                self.apps[app] = len(self.apps)
+        return self.apps
+
+    def append(self, data):
+        """Append packed records, rotating whenever a file would grow past MAX_BYTES."""
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        record_size = self.record_struct.size
+        while data:
+            if size and size + record_size > self.MAX_BYTES:
+                self.rotate()
+                size = 0
+            room = (self.MAX_BYTES - max(size, len(self.header))) // record_size * record_size
+            chunk, data = data[:max(room, record_size)], data[max(room, record_size):]
+            with open(self.path, 'ab') as f:
+                if not size:
+                    f.write(self.header)
+                    size = len(self.header)
+                f.write(chunk)
+            size += len(chunk)
+
+    def rotate(self):
+        for i in range(self.BACKUPS - 1, 0, -1):
+            older = self.backup_path(i)
+            if older.exists():
+                older.replace(self.backup_path(i + 1))
+        self.path.replace(self.backup_path(1))
+        self.rotations += 1
+
+    def backup_path(self, index):
+        return self.path.with_name(f"{self.path.stem}.{index}{self.path.suffix}")
+
+    def files(self):
+        """Journal files that exist, oldest first."""
+        paths = [self.backup_path(i) for i in range(self.BACKUPS, 0, -1)] + [self.path]
+        return [path for path in paths if path.exists()]
+
+    def app_names(self):
+        """App ids by index, as stored in records ('' at 0)."""
+        try:
+            return [''] + self.apps_path.read_text().splitlines()
+        except FileNotFoundError:
+            return ['']
+
+    def read(self, path):
+        """Records of one journal file, memory-mapped and unpacked as they are iterated.
+
+        Raises ValueError if the file isn't a journal of this version. A
+        record cut short by a crash at the end is skipped.
+        """
+        import mmap
+        with open(path, 'rb') as f:
+            size = f.seek(0, 2)
+            if not size:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                header = data[:len(self.header)]
+                if header != self.header:
+                    raise ValueError(f"{path} is not a version {JOURNAL_VERSION} event journal")
+                record_size = self.record_struct.size
+                end = size - (size - len(header)) % record_size
+                view = memoryview(data)[len(header):end]
+                records = self.record_struct.iter_unpack(view)
+                try:
+                    yield from records
+                finally:
+                    del records
+                    view.release()
+
+    def records(self):
+        """Records of all journal files, oldest first."""
+        for path in self.files():
+            yield from self.read(path)
@@ -0,0 +1,187 @@
+"""Report on the overlay's event journal (see EventJournal in journal.py).
+
+Streams every journal file (rotated ones first) through memory-mapped reads
+and reports, per activation session: keystrokes per click, time from
+activation to confirm, how often go_back is used and how often the overlay
+is cancelled, overall and per target app.
+
+Usage:
+    python journal_report.py                    # the app's journal
+    python journal_report.py --since 7          # the last 7 days
+    python journal_report.py --app Safari       # sessions in or clicking into matching apps
+    python journal_report.py path/to/journal.bin --top 20
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from journal import (JOURNAL_ACTIVATE, JOURNAL_BACK, JOURNAL_CANCEL, JOURNAL_CELL, JOURNAL_CONFIRM, JOURNAL_DRAG,
+                     JOURNAL_JUMP, EventJournal)
+
+
+class AppStats:
+    __slots__ = ('clicks', 'keys', 'backs', 'times')
+
+    def __init__(self):
+        self.clicks = 0
+        self.keys = 0
+        self.backs = 0
+        self.times = []
+
+
+class JournalStats:
+    """Totals over the sessions of a journal, built by feeding it records in order.
+
+    A session runs from an activation to its confirm or cancel. One cut
+    short by a crash (the next record is another activation) is counted
+    as abandoned; records before the first activation seen are skipped.
+    """
+
+    def __init__(self, app_names, since=None, app=None):
+        self.app_names = app_names
+        self.since = since
+        self.app = app
+        self.records = 0
+        self.activations = 0
+        self.clicks = 0
+        self.drags = 0
+        self.cancels = 0
+        self.abandoned = 0
+        self.selections = 0  # Cells and jumps in finished sessions
+        self.backs = 0
+        self.sessions_with_back = 0
+        self.keys = []  # Per confirm: keys pressed since the activation, the confirm included
+        self.times = []  # Per confirm: seconds since activation
+        self.apps = {}  # Target app index -> AppStats
+
+    def app_name(self, index):
+        return self.app_names[index] if index < len(self.app_names) else f"#{index}"
+
+    def matches(self, *indexes):
+        return self.app is None or any(self.app in self.app_name(index) for index in indexes)
+
+    def feed(self, records):
+        since, matches = self.since, self.matches
+        started = None  # Activation time of the open session
+        frontmost = cells = jumps = backs = 0
+        count = 0
+        for t, session, kind, depth, row, col, x, y, app, keys, extra, flags in records:
+            count += 1
+            if since is not None and t < since:
+                continue
+            if kind == JOURNAL_CELL:
+                cells += 1
+            elif kind == JOURNAL_BACK:
+                backs += 1
+            elif kind == JOURNAL_JUMP:
+                jumps += 1
+            elif kind == JOURNAL_ACTIVATE:
+                if started is not None and matches(frontmost):
+                    self.activations += 1
+                    self.abandoned += 1
+                started, frontmost = t, app
+                cells = jumps = backs = 0
+            elif started is None:
+                continue
+            elif kind == JOURNAL_CONFIRM:
+                if matches(frontmost, app):
+                    self.finish(cells + jumps, backs)
+                    if flags & JOURNAL_DRAG:
+                        self.drags += 1
+                    else:
+                        self.clicks += 1
+                    self.keys.append(keys)
+                    self.times.append(t - started)
+                    stats = self.apps.get(app)
+                    if stats is None:
+                        stats = self.apps[app] = AppStats()
+                    stats.clicks += 1
+                    stats.keys += keys
+                    stats.backs += backs
+                    stats.times.append(t - started)
+                started = None
+            elif kind == JOURNAL_CANCEL:
+                if matches(frontmost):
+                    self.finish(cells + jumps, backs)
+                    self.cancels += 1
+                started = None
+        self.records += count
+
+    def finish(self, selections, backs):
+        self.activations += 1
+        self.selections += selections
+        self.backs += backs
+        self.sessions_with_back += backs > 0
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of sorted values."""
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0
+
+
+def distribution(values, scale=1, unit=""):
+    values = sorted(values)
+    if not values:
+        return "n/a"
+    mean = sum(values) / len(values) * scale
+    return (f"mean {mean:.2f}{unit}, p50 {percentile(values, 0.5) * scale:g}{unit}, "
+            f"p90 {percentile(values, 0.9) * scale:g}{unit}, p99 {percentile(values, 0.99) * scale:g}{unit}, "
+            f"max {values[-1] * scale:g}{unit}")
+
+
+def share(count, total):
+    return f"{count / total:.1%}" if total else "n/a"
+
+
+def format_report(stats, top=10):
+    finished = stats.activations - stats.abandoned
+    confirms = stats.clicks + stats.drags
+    lines = [
+        f"{stats.records} records, {stats.activations} activations: {stats.clicks} clicks, {stats.drags} drags, "
+        f"{stats.cancels} cancelled, {stats.abandoned} abandoned",
+        f"  keystrokes per click: {distribution(stats.keys)}",
+        f"  time to target:       {distribution([round(t * 1000) for t in stats.times], unit=' ms')}",
+        f"  go_back rate:         {share(stats.backs, stats.selections + stats.backs)} of navigation keys, "
+        f"in {share(stats.sessions_with_back, finished)} of sessions",
+        f"  cancel rate:          {share(stats.cancels, finished)} of sessions",
+    ]
+    if confirms and stats.apps:
+        lines.append(f"\n  {'target app':<36}{'clicks':>8}{'keys':>7}{'backs':>7}{'p50 ms':>8}{'p90 ms':>8}")
+        ranked = sorted(stats.apps.items(), key=lambda item: -item[1].clicks)
+        for index, app in ranked[:top]:
+            times = sorted(app.times)
+            lines.append(f"  {stats.app_name(index) or '(unknown)':<36.36}{app.clicks:>8}"
+                         f"{app.keys / app.clicks:>7.2f}{app.backs / app.clicks:>7.2f}"
+                         f"{percentile(times, 0.5) * 1000:>8.0f}{percentile(times, 0.9) * 1000:>8.0f}")
+        if len(ranked) > top:
+            lines.append(f"  ... {len(ranked) - top} more")
+    return "\n".join(lines)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('journal', nargs='?', type=Path,
+                        help="journal file; rotated ones next to it are read too (default: the app's)")
+    parser.add_argument('--since', type=float, metavar='DAYS', help="only sessions of the last DAYS days")
+    parser.add_argument('--app', metavar='TEXT',
+                        help="only sessions whose frontmost or target app id contains TEXT")
+    parser.add_argument('--top', type=int, default=10, metavar='N', help="target apps to list (default: 10)")
+    args = parser.parse_args()
+
+    journal = EventJournal(args.journal)
+    if not journal.files():
+        parser.error(f"no journal at {journal.path}")
+    since = time.time() - args.since * 86400 if args.since is not None else None
+    stats = JournalStats(journal.app_names(), since, args.app)
+    started = time.perf_counter()
+    try:
+        stats.feed(journal.records())
+    except ValueError as e:
+        parser.error(str(e))
+    print(format_report(stats, args.top))
+    print(f"\nRead {len(journal.files())} file(s) in {time.perf_counter() - started:.2f} s")
+
+
+if __name__ == '__main__':
+    main_cli()
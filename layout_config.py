@@ -0,0 +1,61 @@
+"""Grid layouts and where the app keeps its files.
+
+Only the standard library is imported, so optimize_layout.py can score
+layouts without the app's dependencies (PyQt5, pynput, AppKit).
+"""
+
+import json
+from pathlib import Path
+
+# Where persistent state (bookmarks, ...) is kept
+DATA_DIR = Path.home() / "Library" / "Application Support" / "KeyboardNavigation"
+
+# Grid (rows, cols) per depth; the last entry repeats for deeper levels
+DEFAULT_GRID_LAYOUTS = ((3, 3),)
+
+# Character keys as they sit on the keyboard, used to lay out cell keys
+KEY_MATRIX = ("1234567890", "qwertyuiop", "asdfghjkl;", "zxcvbnm,./")
+
+
+def parse_grid_layouts(spec):
+    """Parse "5x5,3x3" into ((5, 5), (3, 3)); raises ValueError if invalid."""
+    layouts = []
+    for part in spec.split(','):
+        try:
+            rows, cols = (int(n) for n in part.lower().strip().split('x'))
+        except ValueError:
+            raise ValueError(f"invalid grid layout {part!r}, expected ROWSxCOLS") from None
+        if rows < 2 or cols < 2 or rows * cols > sum(map(len, KEY_MATRIX)):
+            raise ValueError(f"unsupported grid layout {part!r}")
+        layouts.append((rows, cols))
+    return tuple(layouts)
+
+
+def format_grid_layouts(grid_layouts):
+    return ",".join(f"{rows}x{cols}" for rows, cols in grid_layouts)
+
+
+def layout_at(grid_layouts, depth):
+    """Grid (rows, cols) used to subdivide a region at the given depth."""
+    return grid_layouts[min(depth, len(grid_layouts) - 1)]
+
+
+def read_grid_config(path=None):
+    """(grid layouts, {key spec: (row, col)} of the 3x3 cells) from a config file.
+
+    Missing entries, or a missing file, give the defaults. Unlike
+    main.ConfigStore this doesn't validate the bindings; raises ValueError
+    if the file can't be parsed.
+    """
+    path = Path(path) if path else DATA_DIR / "config.json"
+    try:
+        data = json.loads(path.read_text())
+    except FileNotFoundError:
+        data = {}
+    try:
+        grid_layouts = parse_grid_layouts(data.get('grid', format_grid_layouts(DEFAULT_GRID_LAYOUTS)))
+        cells = data.get('cells', [KEY_MATRIX[1 + row][:3] for row in range(3)])
+        key_map = {spec: (row, col) for row, keys in enumerate(cells) for col, spec in enumerate(keys)}
+    except (AttributeError, TypeError) as e:
+        raise ValueError(f"malformed config: {e}") from None
+    return grid_layouts, key_map
@@ -1,108 +1,1935 @@
-import sys
-import subprocess
 import time
-from ctypes import c_void_p
-from PyQt5 import QtCore, QtGui, QtWidgets
+STARTED_AT = time.perf_counter()  # process start, for the startup report
+
+import sys
+import logging
+from collections import OrderedDict, deque
+from pathlib import Path
+
+from journal import (JOURNAL_ACTIVATE, JOURNAL_BACK, JOURNAL_CANCEL, JOURNAL_CELL, JOURNAL_CONFIRM, JOURNAL_DRAG,
+                     JOURNAL_FILE, JOURNAL_JUMP, EventJournal)
+from layout_config import (DATA_DIR, DEFAULT_GRID_LAYOUTS, KEY_MATRIX, format_grid_layouts, layout_at,
+                           parse_grid_layouts)
+
+# Only what the hotkey listener, overlay and menu bar need is imported here;
+# Quartz and the settings popover classes load on first use.
+# Each eager group is timed for the startup report.
+IMPORT_TIMES = {}
+
+_started = time.perf_counter()
+from PyQt5 import QtCore, QtGui
 from PyQt5.QtWidgets import QMainWindow, QApplication
 from PyQt5.QtCore import Qt, pyqtSignal, QObject
 from PyQt5.QtGui import QPainter, QColor, QPen
+IMPORT_TIMES['PyQt5'] = time.perf_counter() - _started
+
+_started = time.perf_counter()
 from screeninfo import get_monitors
+IMPORT_TIMES['screeninfo'] = time.perf_counter() - _started
+
+_started = time.perf_counter()
 from pynput import keyboard
-from pynput.mouse import Controller as MouseController, Button
-import pyautogui
-from Cocoa import NSApp, NSWindow, NSObject
+IMPORT_TIMES['pynput'] = time.perf_counter() - _started
+
+_started = time.perf_counter()
 from AppKit import (
+    NSApp,
+    NSObject,
     NSWindowCollectionBehaviorCanJoinAllSpaces,
     NSWindowCollectionBehaviorStationary,
     NSApplicationActivationPolicyAccessory,
-    NSApplicationActivationPolicyRegular,
     NSStatusBar,
     NSMenu,
     NSMenuItem,
-    NSPopover,
-    NSViewController,
-    NSView,
-    NSButton,
-    NSTextField,
-    NSFont,
-    NSColor,
-    NSBorderlessWindowMask,
-    NSPopoverBehaviorTransient
-)
-from Quartz import (
-    CGWindowListCopyWindowInfo,
-    kCGWindowListOptionOnScreenOnly,
-    kCGNullWindowID,
-    CGWindowListCreateDescriptionFromArray,
-    CGEventCreateMouseEvent,
-    CGEventPost,
-    kCGEventLeftMouseDown,
-    kCGEventLeftMouseUp,
-    kCGHIDEventTap,
-    kCGMouseButtonLeft
+    NSWorkspace,
+    NSRunningApplication,
 )
-from AppKit import NSWorkspace, NSRunningApplication
-from Foundation import NSMakeRect, NSMakeSize
 import objc
+IMPORT_TIMES['AppKit'] = time.perf_counter() - _started
+
+
+def timed_import(name):
+    """Import a module on first use, recording its cost for the startup report."""
+    module = sys.modules.get(name)
+    if module is None:
+        import importlib
+        started = time.perf_counter()
+        module = importlib.import_module(name)
+        IMPORT_TIMES.setdefault(name, time.perf_counter() - started)
+    return module
+
+
+# Log categories, all children of "kbnav". Everything below WARNING is off
+# unless enabled with KBNAV_LOG (see configure_logging); disabled calls cost
+# one cached level check since arguments are formatted lazily.
+log = logging.getLogger("kbnav")
+log_window = logging.getLogger("kbnav.window")
+log_input = logging.getLogger("kbnav.input")
+log_hit = logging.getLogger("kbnav.hittest")
+log_settings = logging.getLogger("kbnav.settings")
+
+LOG_CATEGORIES = {
+    'window': log_window,
+    'input': log_input,
+    'hittest': log_hit,
+    'settings': log_settings,
+}
+
+
+def configure_logging(spec=None, log_file=None):
+    """Set log levels and sinks.
+
+    Args:
+        spec: a level for every category ("debug"), or comma-separated
+            "category=level" entries ("input=debug,window=info"); an entry
+            without a category sets the default. Defaults to $KBNAV_LOG.
+        log_file: path of an optional file sink. Records are handed to a
+            background thread through a queue, so file I/O never runs on
+            the Qt or listener threads. Defaults to $KBNAV_LOG_FILE.
+
+    Returns:
+        The QueueListener driving the file sink (already started), or None.
+    """
+    import os
+    import atexit
+    import queue
+    from logging.handlers import QueueHandler, QueueListener
+
+    if spec is None:
+        spec = os.environ.get('KBNAV_LOG', '')
+    if log_file is None:
+        log_file = os.environ.get('KBNAV_LOG_FILE')
+
+    default_level = logging.WARNING
+    category_levels = {}
+    for entry in filter(None, (part.strip() for part in spec.split(','))):
+        category, _, level = entry.rpartition('=')
+        level = logging.getLevelName(level.upper())
+        if not isinstance(level, int):
+            raise ValueError(f"Unknown log level in {entry!r}")
+        if not category:
+            default_level = level
+        elif category in LOG_CATEGORIES:
+            category_levels[category] = level
+        else:
+            raise ValueError(f"Unknown log category {category!r}, expected one of {', '.join(LOG_CATEGORIES)}")
+
+    log.setLevel(default_level)
+    for category, logger in LOG_CATEGORIES.items():
+        logger.setLevel(category_levels.get(category, logging.NOTSET))
+
+    log_format = "[%(levelname)s] %(name)s: %(message)s"
+    log.handlers.clear()
+    log.propagate = False
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(logging.Formatter(log_format))
+    log.addHandler(console)
+
+    if not log_file:
+        return None
+
+    file_handler = logging.FileHandler(log_file)
+    file_handler.setFormatter(logging.Formatter("%(asctime)s " + log_format))
+    records = queue.SimpleQueue()
+    log.addHandler(QueueHandler(records))
+    listener = QueueListener(records, file_handler)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+# Where exported data files are written
+LOG_DIR = Path.home() / "Library" / "Logs" / "KeyboardNavigation"
+
+def write_atomic(path, text):
+    """Write text to path via a temporary file, so readers never see a partial file."""
+    import os
+    import tempfile
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class LatencyTracer:
+    """Per-stage latency histograms for the keypress -> paint -> click path.
+
+    begin() is called with the time the pynput callback received the key,
+    before it was queued for the main thread; mark(stage) then records the
+    time elapsed since that keypress, once per stage per keypress. The last
+    max_samples values of each stage are kept and summarized as p50/p95/p99
+    on demand.
+    """
+
+    STAGES = ('signal', 'subdivide', 'snap', 'mouse_move', 'paint', 'click', 'activation')
+
+    def __init__(self, max_samples=4096):
+        self.samples = {stage: deque(maxlen=max_samples) for stage in self.STAGES}
+        # (keypress time, stages already recorded); replaced as a whole in begin()
+        self.trace = None
+
+    def begin(self, pressed_at):
+        self.trace = (pressed_at, set())
+
+    def mark(self, stage):
+        trace = self.trace
+        if trace is None or stage in trace[1]:
+            return
+        trace[1].add(stage)
+        self.samples[stage].append(time.perf_counter() - trace[0])
+
+    def record(self, stage, seconds):
+        """Record a latency measured elsewhere (e.g. activation)."""
+        self.samples[stage].append(seconds)
+
+    def summary(self):
+        """{stage: {'n', 'p50_ms', 'p95_ms', 'p99_ms'}} for stages with samples."""
+        result = {}
+        for stage, samples in self.samples.items():
+            values = sorted(samples)
+            if not values:
+                continue
+            last = len(values) - 1
+            result[stage] = {
+                'n': len(values),
+                'p50_ms': values[round(0.50 * last)] * 1000,
+                'p95_ms': values[round(0.95 * last)] * 1000,
+                'p99_ms': values[round(0.99 * last)] * 1000,
+            }
+        return result
+
+    def report(self):
+        """Human-readable table of the summary."""
+        summary = self.summary()
+        if not summary:
+            return "No samples yet."
+        lines = [f"{'stage':<12}{'n':>6}{'p50':>9}{'p95':>9}{'p99':>9}"]
+        for stage, stats in summary.items():
+            lines.append(
+                f"{stage:<12}{stats['n']:>6}{stats['p50_ms']:>9.2f}"
+                f"{stats['p95_ms']:>9.2f}{stats['p99_ms']:>9.2f}"
+            )
+        return "\n".join(lines)
+
+    def export(self, path=None):
+        """Write the summary plus environment versions to a JSON file.
+
+        Returns the path written (defaults to a timestamped file in LOG_DIR).
+        """
+        import json
+        import platform
+        if path is None:
+            LOG_DIR.mkdir(parents=True, exist_ok=True)
+            path = LOG_DIR / time.strftime("latency-%Y%m%d-%H%M%S.json")
+        data = {
+            'exported_at': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            'macos': platform.mac_ver()[0],
+            'python': platform.python_version(),
+            'qt': QtCore.QT_VERSION_STR,
+            'pyqt': QtCore.PYQT_VERSION_STR,
+            'stages': self.summary(),
+        }
+        Path(path).write_text(json.dumps(data, indent=2))
+        return path
+
+
+latency_tracer = LatencyTracer()
+
+
+# Modifier bitmask flags; left/right variants map to the same bit
+MOD_CTRL = 1
+MOD_ALT = 2  # Option on macOS
+MOD_SHIFT = 4
+MOD_CMD = 8
+
+MODIFIER_BITS = {
+    keyboard.Key.ctrl: MOD_CTRL, keyboard.Key.ctrl_l: MOD_CTRL, keyboard.Key.ctrl_r: MOD_CTRL,
+    keyboard.Key.alt: MOD_ALT, keyboard.Key.alt_l: MOD_ALT, keyboard.Key.alt_r: MOD_ALT,
+    keyboard.Key.shift: MOD_SHIFT, keyboard.Key.shift_l: MOD_SHIFT, keyboard.Key.shift_r: MOD_SHIFT,
+    keyboard.Key.cmd: MOD_CMD, keyboard.Key.cmd_l: MOD_CMD, keyboard.Key.cmd_r: MOD_CMD,
+}
+
+# Normalized (side-less) key for each modifier bit
+MODIFIER_KEYS = {
+    MOD_CTRL: keyboard.Key.ctrl,
+    MOD_ALT: keyboard.Key.alt,
+    MOD_SHIFT: keyboard.Key.shift,
+    MOD_CMD: keyboard.Key.cmd,
+}
+
+# Overlay actions; cell and hint keys are resolved on the main thread, where
+# the overlay's mode and depth (and so the grid layout in use) are known
+ACTION_SELECT = 'select'
+ACTION_CONFIRM = 'confirm'
+ACTION_BACK = 'back'
+ACTION_HINTS = 'hints'
+ACTION_CLICK_MODE = 'click_mode'
+ACTION_DRAG = 'drag'
+
+# Arrow keys adjusting the confirm click: (button step, click count step)
+CLICK_MODE_KEYS = {
+    keyboard.Key.left: (-1, 0), keyboard.Key.right: (1, 0),
+    keyboard.Key.down: (0, -1), keyboard.Key.up: (0, 1),
+}
+
+# Marks the cursor as the start of a drag; confirm then drags to the cursor
+DRAG_KEY = keyboard.Key.space
+
+# Bookmark actions: Cmd+Shift+key saves, Cmd+key jumps, Cmd+Option+key jumps and clicks
+BOOKMARK_SAVE = 'save'
+BOOKMARK_JUMP = 'jump'
+BOOKMARK_CLICK = 'click'
+
+# Side of the region saved when bookmarking a bare cursor position
+BOOKMARK_POINT_SIZE = 24
+
+# Keys recalling the most frequent click targets, best first; where cell
+# keys take number keys (4-row grids), the spare ones stand in
+LIKELY_TARGET_KEYS = "12345"
+LIKELY_TARGET_SPARE_KEYS = "67890"
+
+# Side of the region a likely target is zoomed to on recall
+LIKELY_TARGET_SIZE = 48
+
+# Hint label characters, home row first (same default as Vimium)
+HINT_CHARS = "sadfjklewcmpgh"
+
+# Layouts compared by the keystroke-cost calculator (--grid-cost)
+CANDIDATE_GRID_LAYOUTS = ("3x3", "4x4", "5x5", "4x4,3x3", "5x5,3x3", "4x8,3x3")
+
+
+def cell_edges(start, length, count):
+    """count + 1 evenly spaced edges splitting [start, start + length]."""
+    return [start + i * length / count for i in range(count + 1)]
+
+
+# Adaptive grids: least share of the mass spread uniformly (more while there
+# are only a few clicks' worth of history), and the narrowest cell relative
+# to an evenly spaced one
+ADAPTIVE_PRIOR = 0.3
+ADAPTIVE_EVIDENCE = 3.0
+ADAPTIVE_MIN_CELL = 0.25
+
+
+def density_edges(start, length, count, points):
+    """count + 1 edges splitting [start, start + length] into cells of equal click mass.
+
+    points is [(position, weight)]. Each click is spread over one even
+    cell width around it and mixed with a uniform prior, so frequently
+    clicked stretches get narrow cells (and are reached in fewer levels)
+    while the rest stays reachable.
+    """
+    total = sum(weight for _, weight in points)
+    if total <= 0:
+        return cell_edges(start, length, count)
+    end = start + length
+    half = length / count / 2
+    prior = max(ADAPTIVE_PRIOR, ADAPTIVE_EVIDENCE / (ADAPTIVE_EVIDENCE + total))
+    prior_mass = total * prior / (1 - prior)
+
+    # Piecewise constant density as (position, change) steps
+    steps = [(start, prior_mass / length), (end, -prior_mass / length)]
+    for position, weight in points:
+        low, high = max(start, position - half), min(end, position + half)
+        if high > low:
+            steps += [(low, weight / (high - low)), (high, -weight / (high - low))]
+    steps.sort()
+    share = (prior_mass + total) / count
+
+    # Walk the cumulative mass, placing an edge at each multiple of share
+    edges = [start]
+    density = cumulative = 0.0
+    position = start
+    for x, change in steps:
+        if x > position:
+            reached = cumulative + density * (x - position)
+            while len(edges) < count and reached >= len(edges) * share:
+                edges.append(position + (len(edges) * share - cumulative) / density)
+            cumulative, position = reached, x
+        density += change
+    edges += [end] * (count + 1 - len(edges))
+
+    # Keep every cell wide enough to see and select
+    minimum = length / count * ADAPTIVE_MIN_CELL
+    for i in range(1, count):
+        edges[i] = max(edges[i], edges[i - 1] + minimum)
+    for i in range(count - 1, 0, -1):
+        edges[i] = min(edges[i], edges[i + 1] - minimum)
+    return edges
+
+
+def physical_key_layout(rows, cols):
+    """Default cell keys for a rows x cols grid, mirroring the keyboard.
+
+    Up to three rows use the letter rows (3x3 is Q/W/E, A/S/D, Z/X/C), four
+    add the number row. Grids that don't fit the key matrix take keys in
+    reading order.
+    """
+    if rows <= len(KEY_MATRIX) and cols <= len(KEY_MATRIX[0]):
+        matrix = KEY_MATRIX[1:] if rows < len(KEY_MATRIX) else KEY_MATRIX
+        return {
+            keyboard.KeyCode.from_char(matrix[row][col]): (row, col)
+            for row in range(rows) for col in range(cols)
+        }
+    chars = "".join(KEY_MATRIX)
+    return {
+        keyboard.KeyCode.from_char(chars[row * cols + col]): (row, col)
+        for row in range(rows) for col in range(cols)
+    }
+
+
+def hint_labels(count, chars=HINT_CHARS):
+    """count prefix-free labels, as short as possible.
+
+    Breadth-first expansion of the label tree: the first label still short
+    enough is replaced by its children until there are enough leaves, so
+    no label is a prefix of another and the first targets get the shortest
+    labels.
+    """
+    labels = [""]
+    offset = 0
+    while len(labels) - offset < count or offset == 0:
+        label = labels[offset]
+        offset += 1
+        labels.extend(label + char for char in chars)
+    return labels[offset:offset + count]
+
+
+def keystroke_cost(width, height, grid_layouts, precision):
+    """Keystrokes to reach a cell of at most precision px, including confirm.
+
+    Returns (keystrokes, final cell width, final cell height).
+    """
+    depth = 0
+    while width > precision or height > precision:
+        rows, cols = layout_at(grid_layouts, depth)
+        width, height = width / cols, height / rows
+        depth += 1
+    return depth + 1, width, height
+
+
+def grid_cost_report(monitors, precision, grid_layouts):
+    """Table of keystroke costs per monitor for the current and candidate layouts."""
+    candidates = [grid_layouts] + [
+        layouts for layouts in map(parse_grid_layouts, CANDIDATE_GRID_LAYOUTS)
+        if layouts != grid_layouts
+    ]
+    lines = [f"Keystrokes to reach a {precision:g} px target (cells + confirm):"]
+    for monitor in monitors:
+        lines.append(f"\n  {monitor.name or 'monitor'} {monitor.width}x{monitor.height}")
+        for layouts in candidates:
+            keystrokes, width, height = keystroke_cost(monitor.width, monitor.height, layouts, precision)
+            current = "  (current)" if layouts == grid_layouts else ""
+            lines.append(f"    {format_grid_layouts(layouts):<10} {keystrokes:>3}  "
+                         f"final cell {width:.1f}x{height:.1f} px{current}")
+    return "\n".join(lines)
+
+
+def bookmark_slot(key):
+    """Bookmark name for a key: its virtual key code, so Shift doesn't change it."""
+    vk = getattr(key, 'vk', None)
+    if vk is not None:
+        return f"vk{vk}"
+    char = getattr(key, 'char', None)
+    return char.lower() if char else None
+
+
+def modifier_mask(modifiers):
+    """Bitmask for a collection of modifier keys."""
+    mask = 0
+    for key in modifiers:
+        mask |= MODIFIER_BITS.get(key, 0)
+    return mask
+
+
+class KeyBindings:
+    """Key bindings compiled into direct lookups for the key event handlers.
+
+    Immutable once built; OverlayManager swaps in a new instance whenever
+    settings change, so a handler never sees a partial update.
+    """
+
+    def __init__(self, key_map, selection_key, activation_modifiers, activation_key,
+                 grid_layouts=DEFAULT_GRID_LAYOUTS):
+        self.activation_mask = modifier_mask(activation_modifiers)
+        self.activation_key = activation_key
+        self.grid_layouts = tuple(grid_layouts)
+
+        # (rows, cols) -> {key: (row, col)}; key_map is the (customizable) 3x3 layout
+        self.cell_maps = {layout: physical_key_layout(*layout) for layout in self.grid_layouts}
+        self.cell_maps[(3, 3)] = dict(key_map)
+
+        # key -> ACTION_SELECT | ACTION_CONFIRM | ACTION_BACK | ACTION_HINTS | ACTION_CLICK_MODE | ACTION_DRAG
+        self.overlay_actions = dict.fromkeys(
+            (keyboard.KeyCode.from_char(char)
+             for char in HINT_CHARS + LIKELY_TARGET_KEYS + LIKELY_TARGET_SPARE_KEYS), ACTION_SELECT
+        )
+        for layout in self.grid_layouts:
+            self.overlay_actions.update(dict.fromkeys(self.cell_maps[layout], ACTION_SELECT))
+        self.overlay_actions[keyboard.Key.tab] = ACTION_HINTS
+        self.overlay_actions.update(dict.fromkeys(CLICK_MODE_KEYS, ACTION_CLICK_MODE))
+        self.overlay_actions[DRAG_KEY] = ACTION_DRAG
+        self.overlay_actions[selection_key] = ACTION_CONFIRM
+        self.overlay_actions[keyboard.Key.esc] = ACTION_BACK
+
+        # (rows, cols) -> likely target recall keys not taken by that grid's cells, best first
+        self.recall_keys = {
+            layout: "".join(char for char in LIKELY_TARGET_KEYS + LIKELY_TARGET_SPARE_KEYS
+                            if keyboard.KeyCode.from_char(char) not in cell_map)[:len(LIKELY_TARGET_KEYS)]
+            for layout, cell_map in self.cell_maps.items()
+        }
 
+        # (row, col) -> key, for remapping a cell in settings
+        self.cell_keys = {cell: key for key, cell in key_map.items()}
 
-def choose_screen():
-    """Get the screen where the mouse cursor is currently located."""
-    monitors = get_monitors()
-    mouse = MouseController()
-    mouse_x, mouse_y = mouse.position
+    def cell_for(self, depth, key):
+        """(row, col) selected by key at the given depth, or None."""
+        return self.cell_maps[layout_at(self.grid_layouts, depth)].get(key)
 
-    print(f"\nMouse position: ({mouse_x}, {mouse_y})")
+    def recall_keys_at(self, depth):
+        """Keys recalling the likely targets at the given depth (fewer, or none, if cells take them)."""
+        return self.recall_keys[layout_at(self.grid_layouts, depth)]
 
-    # Find which monitor contains the mouse cursor
-    for monitor in monitors:
-        if (monitor.x <= mouse_x < monitor.x + monitor.width and
-            monitor.y <= mouse_y < monitor.y + monitor.height):
-            primary = " (primary)" if monitor.is_primary else ""
-            print(f"Selected screen: {monitor.name}{primary}")
-            print(f"  Resolution: {monitor.width}x{monitor.height}")
-            print(f"  Position: ({monitor.x}, {monitor.y})")
-            return monitor
-
-    # Fallback to primary monitor if mouse position is outside all monitors
-    print("Mouse outside all monitors, using primary monitor")
-    for monitor in monitors:
-        if monitor.is_primary:
-            return monitor
 
-    # Last resort: return first monitor
-    return monitors[0]
+DEFAULT_BINDINGS = KeyBindings(physical_key_layout(3, 3), keyboard.Key.enter, (), None)
+
+
+class ConfigError(ValueError):
+    """Invalid or conflicting configuration."""
+
+
+def key_to_spec(key):
+    """Config string for a key, in pynput's hotkey notation: 'q', '<enter>', '<76>'."""
+    if isinstance(key, keyboard.Key):
+        return f"<{key.name}>"
+    if getattr(key, 'char', None):
+        return key.char
+    return f"<{key.vk}>"
+
+
+def spec_to_key(spec):
+    """Inverse of key_to_spec; raises ConfigError."""
+    if not isinstance(spec, str) or not spec:
+        raise ConfigError(f"invalid key {spec!r}")
+    if len(spec) > 2 and spec[0] == '<' and spec[-1] == '>':
+        name = spec[1:-1]
+        if name.isdigit():
+            return keyboard.KeyCode.from_vk(int(name))
+        try:
+            return keyboard.Key[name]
+        except KeyError:
+            raise ConfigError(f"unknown key {spec!r}") from None
+    if len(spec) == 1:
+        return keyboard.KeyCode.from_char(spec)
+    raise ConfigError(f"invalid key {spec!r}")
+
+
+class DragPacing:
+    """Timing of a drag's events, in ms.
+
+    The button is held for hold_ms before the first move, then the cursor
+    moves every interval_ms for duration_ms, and the button is released one
+    interval after the last move. Some apps drop drags whose moves come too
+    fast or too slow, so all three are configurable.
+    """
+
+    __slots__ = ('hold_ms', 'interval_ms', 'duration_ms')
+
+    # name -> (min, max)
+    LIMITS = {'hold_ms': (0, 1000), 'interval_ms': (1, 100), 'duration_ms': (0, 5000)}
+
+    def __init__(self, hold_ms=50, interval_ms=8, duration_ms=160):
+        self.hold_ms = hold_ms
+        self.interval_ms = interval_ms
+        self.duration_ms = duration_ms
+
+    @property
+    def steps(self):
+        """Number of moves between mouse-down and mouse-up."""
+        return max(1, round(self.duration_ms / self.interval_ms))
+
+    def validate(self):
+        for name, (low, high) in self.LIMITS.items():
+            value = getattr(self, name)
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not low <= value <= high:
+                raise ConfigError(f"drag {name} must be a number from {low} to {high}")
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class HotkeyConfig:
+    """Key bindings, grid layouts and drag pacing, as stored in the config file."""
+
+    __slots__ = ('key_map', 'selection_key', 'activation_modifiers', 'activation_key', 'grid_layouts',
+                 'drag_pacing')
+
+    def __init__(self, key_map, selection_key, activation_modifiers, activation_key, grid_layouts,
+                 drag_pacing=None):
+        self.key_map = dict(key_map)
+        self.selection_key = selection_key
+        self.activation_modifiers = set(activation_modifiers)
+        self.activation_key = activation_key
+        self.grid_layouts = tuple(grid_layouts)
+        self.drag_pacing = drag_pacing or DragPacing()
+
+    @classmethod
+    def defaults(cls):
+        return cls(physical_key_layout(3, 3), keyboard.Key.enter,
+                   {keyboard.Key.ctrl, keyboard.Key.alt}, None, DEFAULT_GRID_LAYOUTS)
+
+    def validate(self):
+        """Raise ConfigError for incomplete or conflicting bindings."""
+        cells = sorted(self.key_map.values())
+        if cells != [(row, col) for row in range(3) for col in range(3)]:
+            raise ConfigError("every 3x3 cell needs exactly one key")
+        reserved = {keyboard.Key.esc: "Escape", keyboard.Key.tab: "Tab (hint mode)"}
+        reserved.update(dict.fromkeys(CLICK_MODE_KEYS, "Arrow keys (click mode)"))
+        reserved[DRAG_KEY] = "Space (drag mode)"
+        for key, name in reserved.items():
+            if key in self.key_map or key == self.selection_key:
+                raise ConfigError(f"{name} is reserved")
+        if self.selection_key in self.key_map:
+            raise ConfigError(f"selection key {key_to_spec(self.selection_key)} is also a cell key")
+        if not self.activation_modifiers and self.activation_key is None:
+            raise ConfigError("activation hotkey is empty")
+        if any(key not in MODIFIER_BITS for key in self.activation_modifiers):
+            raise ConfigError("activation modifiers must be modifier keys")
+        if not self.activation_modifiers and (self.activation_key in self.key_map or
+                                              self.activation_key == self.selection_key):
+            raise ConfigError("activation key without modifiers conflicts with an overlay key")
+        # Other grids take their cell keys from the keyboard (see KeyBindings)
+        for rows, cols in sorted(set(self.grid_layouts) - {(3, 3)}):
+            cell_keys = physical_key_layout(rows, cols)
+            for key, name in reserved.items():
+                if key in cell_keys:
+                    raise ConfigError(f"{name} is reserved but a cell key of the {rows}x{cols} grid")
+            if self.selection_key in cell_keys:
+                raise ConfigError(f"selection key {key_to_spec(self.selection_key)} is also a cell key "
+                                  f"of the {rows}x{cols} grid")
+            if not self.activation_modifiers and self.activation_key in cell_keys:
+                raise ConfigError(f"activation key without modifiers conflicts with the {rows}x{cols} grid")
+        self.drag_pacing.validate()
+
+    def to_json(self):
+        import json
+        cells = {cell: key for key, cell in self.key_map.items()}
+        return json.dumps({
+            'version': 1,
+            'activation': {
+                'modifiers': sorted(key_to_spec(key) for key in self.activation_modifiers),
+                'key': key_to_spec(self.activation_key) if self.activation_key is not None else None,
+            },
+            'selection_key': key_to_spec(self.selection_key),
+            'cells': [[key_to_spec(cells[(row, col)]) for col in range(3)] for row in range(3)],
+            'grid': format_grid_layouts(self.grid_layouts),
+            'drag': self.drag_pacing.to_dict(),
+        }, indent=2) + "\n"
+
+    @classmethod
+    def from_json(cls, text):
+        """Parse and validate a config file's contents; raises ConfigError."""
+        import json
+        try:
+            data = json.loads(text)
+            activation = data['activation']
+            key_map = {}
+            for row, keys in enumerate(data['cells']):
+                for col, spec in enumerate(keys):
+                    key = spec_to_key(spec)
+                    if key in key_map:
+                        raise ConfigError(f"key {spec!r} is bound to more than one cell")
+                    key_map[key] = (row, col)
+            config = cls(
+                key_map,
+                spec_to_key(data['selection_key']),
+                {spec_to_key(spec) for spec in activation['modifiers']},
+                spec_to_key(activation['key']) if activation.get('key') is not None else None,
+                parse_grid_layouts(data.get('grid', '3x3')),
+                DragPacing(**data['drag']) if 'drag' in data else None,
+            )
+        except ConfigError:
+            raise
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            raise ConfigError(f"malformed config: {e}") from None
+        config.validate()
+        return config
+
+
+class ConfigStore(QObject):
+    """The config file: atomic writes, and a file watch for outside edits.
+
+    changed is emitted (debounced) when the file is modified by anyone but
+    this store, e.g. by hand or by deployment tooling. The file is watched
+    together with its directory, since atomic replacement swaps the file.
+    """
+
+    RELOAD_DELAY_MS = 20
+
+    changed = pyqtSignal()
+
+    def __init__(self, path=None):
+        super().__init__()
+        self.path = Path(path) if path else DATA_DIR / "config.json"
+        self.last_text = None  # Contents last read or written by this store
+        self.watcher = None
+        self.reload_timer = QtCore.QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(self.RELOAD_DELAY_MS)
+        self.reload_timer.timeout.connect(self.check_changed)
+
+    def read(self):
+        try:
+            return self.path.read_text()
+        except FileNotFoundError:
+            return None
+
+    def load(self):
+        """Config from the file, or the defaults if there is none; raises ConfigError."""
+        text = self.read()
+        self.last_text = text
+        if text is None:
+            return HotkeyConfig.defaults()
+        return HotkeyConfig.from_json(text)
+
+    def save(self, config):
+        config.validate()
+        text = config.to_json()
+        write_atomic(self.path, text)
+        self.last_text = text
+
+    def watch(self):
+        """Start emitting changed for outside edits."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.watcher = QtCore.QFileSystemWatcher(self)
+        self.watcher.addPath(str(self.path.parent))
+        if self.path.exists():
+            self.watcher.addPath(str(self.path))
+        self.watcher.fileChanged.connect(self.reload_timer.start)
+        self.watcher.directoryChanged.connect(self.reload_timer.start)
+
+    def check_changed(self):
+        # A replaced file drops out of the watch list
+        if self.path.exists() and str(self.path) not in self.watcher.files():
+            self.watcher.addPath(str(self.path))
+        if self.read() != self.last_text:
+            self.changed.emit()
+
+
+class MonitorInfo:
+    """Geometry (global points, top-left origin) and scale factor of one monitor."""
+
+    __slots__ = ('x', 'y', 'width', 'height', 'name', 'is_primary', 'scale')
+
+    def __init__(self, x, y, width, height, name=None, is_primary=False, scale=1.0):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.name = name
+        self.is_primary = is_primary
+        self.scale = scale
+
+    @property
+    def key(self):
+        """Identity of this monitor within a topology."""
+        return (self.name, self.x, self.y, self.width, self.height, self.scale)
+
+    @property
+    def label(self):
+        """Readable identity, e.g. for scoping saved state."""
+        return f"{self.name}:{self.width}x{self.height}@{self.x},{self.y}x{self.scale:g}"
+
+    def contains(self, x, y):
+        return (self.x <= x < self.x + self.width and
+                self.y <= y < self.y + self.height)
+
+
+class ScreeninfoMonitorProvider:
+    """Monitor geometry from screeninfo, scale factors and change notifications from Qt."""
+
+    def monitors(self):
+        scales = {}
+        for screen in QApplication.screens():
+            geometry = screen.geometry()
+            scales[(geometry.x(), geometry.y(), geometry.width(), geometry.height())] = screen.devicePixelRatio()
+        return [
+            MonitorInfo(
+                monitor.x, monitor.y, monitor.width, monitor.height,
+                monitor.name, bool(monitor.is_primary),
+                scales.get((monitor.x, monitor.y, monitor.width, monitor.height), 1.0)
+            )
+            for monitor in get_monitors()
+        ]
+
+    def watch(self, callback):
+        """Call callback() whenever displays are added, removed or reconfigured."""
+        app = QApplication.instance()
+
+        def watch_screen(screen):
+            screen.geometryChanged.connect(lambda *args: callback())
+
+        def screen_added(screen):
+            watch_screen(screen)
+            callback()
+
+        for screen in app.screens():
+            watch_screen(screen)
+        app.screenAdded.connect(screen_added)
+        app.screenRemoved.connect(lambda *args: callback())
+        app.primaryScreenChanged.connect(lambda *args: callback())
+
+
+class MonitorTopology(QObject):
+    """Cached monitor layout, refreshed only on display-change notifications.
+
+    Bursts of notifications (e.g. docking a laptop) are coalesced into one
+    re-read of the provider after REFRESH_DELAY_MS. monitor_at() finds the
+    monitor under a point through a coarse bucket grid, so the per-activation
+    lookup does not depend on the number of monitors.
+    """
+
+    REFRESH_DELAY_MS = 100
+    BUCKET_SIZE = 1024
+
+    # Emitted after a refresh that changed the layout
+    changed = pyqtSignal()
+
+    def __init__(self, provider=None):
+        super().__init__()
+        self.provider = provider or ScreeninfoMonitorProvider()
+        self.monitors = []
+        self.buckets = {}
+        self.primary = None
+        self.signature = ()
+        self.stale = False
+        self.refresh_count = 0
+
+        self.refresh_timer = QtCore.QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(self.REFRESH_DELAY_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+        self.refresh()
+        self.provider.watch(self.invalidate)
+
+    def invalidate(self):
+        """Display configuration changed: refresh soon (coalescing bursts)."""
+        self.stale = True
+        self.refresh_timer.start()
+
+    def refresh(self):
+        """Re-read monitors from the provider and rebuild the lookup grid."""
+        self.refresh_timer.stop()
+        self.stale = False
+        self.refresh_count += 1
+
+        monitors = self.provider.monitors()
+        signature = tuple(monitor.key for monitor in monitors)
+        if signature == self.signature:
+            return
+
+        size = self.BUCKET_SIZE
+        buckets = {}
+        for monitor in monitors:
+            for bx in range(monitor.x // size, (monitor.x + monitor.width - 1) // size + 1):
+                for by in range(monitor.y // size, (monitor.y + monitor.height - 1) // size + 1):
+                    buckets.setdefault((bx, by), []).append(monitor)
+
+        self.monitors = monitors
+        self.buckets = buckets
+        self.primary = next((m for m in monitors if m.is_primary), monitors[0] if monitors else None)
+        self.signature = signature
+        log.debug("Monitor topology: %s", signature)
+        self.changed.emit()
+
+    @property
+    def layout_id(self):
+        """Readable identifier of the current monitor layout, e.g. for scoping saved state."""
+        return "+".join(monitor.label for monitor in self.monitors)
+
+    def monitor_at(self, x, y):
+        """Monitor containing (x, y), falling back to the primary monitor."""
+        if self.stale:
+            self.refresh()
+        size = self.BUCKET_SIZE
+        for monitor in self.buckets.get((int(x // size), int(y // size)), ()):
+            if monitor.contains(x, y):
+                return monitor
+
+        # Fallback to primary monitor if mouse position is outside all monitors
+        log.debug("Point (%s, %s) outside all monitors, using primary monitor", x, y)
+        return self.primary
+
+
+# Kinds of KeyEventRing records
+KEY_PRESS = 0
+KEY_RELEASE = 1
+
+
+class KeyEventRing:
+    """Bounded queue of (kind, key, time) records from listener threads to the main thread.
+
+    push() never blocks or takes a lock: it relies on deque.append and
+    len() being atomic. When the ring is full the event is dropped and
+    counted; a producer racing another at the boundary may overshoot
+    capacity by one. wake() is called when a push finds no drain pending,
+    so the consumer runs once per batch rather than once per event.
+
+    Counters are kept per producer thread (each thread only writes its own
+    entries): pushed, dropped, and overflows (runs of consecutive drops).
+    """
+
+    CAPACITY = 1024
+
+    def __init__(self, wake, capacity=CAPACITY):
+        import threading
+        self.get_ident = threading.get_ident
+        self.current_thread = threading.current_thread
+        self.wake = wake
+        self.capacity = capacity
+        self.events = deque()
+        self.wake_pending = False
+        self.pushed = {}  # thread ident -> count
+        self.dropped = {}
+        self.overflows = {}
+        self.overflowing = {}
+        self.thread_names = {}
+        self.drained = 0
+        self.batches = 0
+        self.max_batch = 0
+
+    def push(self, kind, key, at):
+        """Queue an event (any thread); returns False if it was dropped."""
+        tid = self.get_ident()
+        events = self.events
+        if len(events) >= self.capacity:
+            self.dropped[tid] = self.dropped.get(tid, 0) + 1
+            if not self.overflowing.get(tid):
+                self.overflowing[tid] = True
+                self.overflows[tid] = self.overflows.get(tid, 0) + 1
+            return False
+
+        events.append((kind, key, at))
+        count = self.pushed.get(tid)
+        if count is None:
+            self.thread_names[tid] = self.current_thread().name
+            count = 0
+        self.pushed[tid] = count + 1
+        if self.overflowing.get(tid):
+            self.overflowing[tid] = False
+
+        # The pending flag is cleared before draining, so an event appended
+        # while a drain runs is either drained by it or triggers a new wake
+        if not self.wake_pending:
+            self.wake_pending = True
+            self.wake()
+        return True
+
+    def drain(self):
+        """Remove and return all queued events, oldest first (consumer thread only)."""
+        self.wake_pending = False
+        events = self.events
+        batch = []
+        while events:
+            batch.append(events.popleft())
+        if batch:
+            self.drained += len(batch)
+            self.batches += 1
+            self.max_batch = max(self.max_batch, len(batch))
+        return batch
+
+    def stats(self):
+        """Totals and per-thread counters."""
+        threads = {
+            self.thread_names.get(tid, str(tid)): {
+                'pushed': self.pushed.get(tid, 0),
+                'dropped': self.dropped.get(tid, 0),
+                'overflows': self.overflows.get(tid, 0),
+            }
+            for tid in set(self.pushed) | set(self.dropped)
+        }
+        return {
+            'pushed': sum(self.pushed.values()),
+            'dropped': sum(self.dropped.values()),
+            'overflows': sum(self.overflows.values()),
+            'drained': self.drained,
+            'batches': self.batches,
+            'max_batch': self.max_batch,
+            'threads': threads,
+        }
+
+    def report(self):
+        stats = self.stats()
+        return (f"Key events: {stats['pushed']} queued, {stats['dropped']} dropped "
+                f"({stats['overflows']} overflows), {stats['batches']} batches, "
+                f"largest {stats['max_batch']}")
 
 
 class HotkeySignals(QObject):
     """Signals for communicating from hotkey thread to main thread."""
-    create_and_show_overlay = pyqtSignal()
-    highlight_cell = pyqtSignal(int, int)  # row, col
+    create_and_show_overlay = pyqtSignal(float)  # perf_counter() at hotkey press
+    select_keys = pyqtSignal(object)  # burst of cell/hint keys, resolved by the visible overlay
+    toggle_hints = pyqtSignal()
+    bookmark = pyqtSignal(str, str)  # slot, BOOKMARK_* action
+    key_events = pyqtSignal()  # KeyEventRing has events to drain
+    click_mode = pyqtSignal(int, int)  # button step, click count step
+    mark_drag = pyqtSignal()
     go_back = pyqtSignal()
-    confirm = pyqtSignal()
+    confirm = pyqtSignal(int)  # MOD_* modifiers held for the click
     cancel = pyqtSignal()
     quit_app = pyqtSignal()
 
 
+class WindowLevelObserver(NSObject):
+    """Forwards Cocoa notifications to a Python callback."""
+
+    def initWithCallback_(self, callback):
+        self = objc.super(WindowLevelObserver, self).init()
+        if self:
+            self.callback = callback
+        return self
+
+    def notified_(self, notification):
+        self.callback()
+
+
+class CocoaWindowPlatform:
+    """Native window-level operations for the overlay on macOS.
+
+    Kept behind a small interface (resolve_window, is_at_target_level,
+    raise_window, is_on_screen, watch_demotions, unwatch) so it can be
+    replaced by a fake.
+    """
+
+    def __init__(self):
+        from AppKit import NSScreenSaverWindowLevel
+
+        # Use the highest practical level (screen saver level = 1000)
+        # Other levels: NSStatusWindowLevel=25, NSMainMenuWindowLevel=24
+        self.target_level = NSScreenSaverWindowLevel
+
+    def resolve_window(self, win_id):
+        """Return the NSWindow for a Qt winId, or None."""
+        # Try to get NSWindow via NSView
+        ns_view = objc.objc_object(c_void_p=win_id)
+        if hasattr(ns_view, 'window'):
+            ns_window = ns_view.window()
+            if ns_window:
+                return ns_window
+
+        # Fallback: search through all windows
+        for ns_window in NSApp.windows():
+            if ns_window.windowNumber() == win_id:
+                return ns_window
+        return None
+
+    def is_at_target_level(self, ns_window):
+        return ns_window.level() >= self.target_level and ns_window.isOnActiveSpace()
+
+    def raise_window(self, ns_window):
+        """Apply level, collection behavior and mouse passthrough, then order front."""
+        ns_window.setLevel_(self.target_level)
+        ns_window.setCollectionBehavior_(
+            NSWindowCollectionBehaviorCanJoinAllSpaces |
+            NSWindowCollectionBehaviorStationary
+        )
+        ns_window.setIgnoresMouseEvents_(True)
+        ns_window.setHasShadow_(False)  # Remove shadow/border
+        ns_window.orderFrontRegardless()  # Force to front
+
+    def is_on_screen(self, ns_window):
+        """Whether the window server still shows part of the window.
+
+        Hiding orders the window out at once, but the occlusion state only
+        drops once the window server has removed it from the screen.
+        """
+        from AppKit import NSWindowOcclusionStateVisible
+        return bool(ns_window.occlusionState() & NSWindowOcclusionStateVisible)
+
+    def watch_demotions(self, ns_window, callback):
+        """Call callback on events that can demote the window.
+
+        Space changes, app activations and occlusion changes of the window.
+        Returns a token for unwatch().
+        """
+        from AppKit import (
+            NSNotificationCenter,
+            NSWorkspaceActiveSpaceDidChangeNotification,
+            NSWorkspaceDidActivateApplicationNotification,
+            NSWindowDidChangeOcclusionStateNotification,
+        )
+        observer = WindowLevelObserver.alloc().initWithCallback_(callback)
+        workspace_center = NSWorkspace.sharedWorkspace().notificationCenter()
+        for name in (NSWorkspaceActiveSpaceDidChangeNotification,
+                     NSWorkspaceDidActivateApplicationNotification):
+            workspace_center.addObserver_selector_name_object_(observer, 'notified:', name, None)
+        NSNotificationCenter.defaultCenter().addObserver_selector_name_object_(
+            observer, 'notified:', NSWindowDidChangeOcclusionStateNotification, ns_window
+        )
+        return observer
+
+    def unwatch(self, observer):
+        from AppKit import NSNotificationCenter
+        NSWorkspace.sharedWorkspace().notificationCenter().removeObserver_(observer)
+        NSNotificationCenter.defaultCenter().removeObserver_(observer)
+
+
+def quartz_window_list():
+    """Front-to-back list of on-screen window info dicts from Quartz."""
+    Quartz = timed_import('Quartz')
+    return Quartz.CGWindowListCopyWindowInfo(
+        Quartz.kCGWindowListOptionOnScreenOnly,
+        Quartz.kCGNullWindowID
+    )
+
+
+class WindowInfo:
+    """Bounds and owner of one on-screen window."""
+
+    __slots__ = ('left', 'top', 'right', 'bottom', 'owner_pid', 'owner_name')
+
+    def __init__(self, left, top, right, bottom, owner_pid, owner_name):
+        self.left = left
+        self.top = top
+        self.right = right
+        self.bottom = bottom
+        self.owner_pid = owner_pid
+        self.owner_name = owner_name
+
+    def contains(self, x, y):
+        return self.left <= x <= self.right and self.top <= y <= self.bottom
+
+
+class WindowSnapshot:
+    """Z-ordered spatial index over a window list.
+
+    Windows are bucketed into a uniform grid of BUCKET_SIZE pixel cells;
+    each bucket keeps its windows front-to-back, so a point query only
+    tests the handful of windows overlapping that cell.
+    """
+
+    BUCKET_SIZE = 256
+
+    def __init__(self, window_list, exclude_pid=None):
+        self.windows = []
+        self.buckets = {}
+        size = self.BUCKET_SIZE
+
+        for window in window_list:
+            # Skip our own Python process windows
+            owner_pid = window.get('kCGWindowOwnerPID')
+            if not owner_pid or owner_pid == exclude_pid:
+                continue
+
+            bounds = window.get('kCGWindowBounds', {})
+            left = bounds.get('X', 0)
+            top = bounds.get('Y', 0)
+            info = WindowInfo(
+                left, top,
+                left + bounds.get('Width', 0), top + bounds.get('Height', 0),
+                owner_pid, window.get('kCGWindowOwnerName', 'Unknown')
+            )
+            self.windows.append(info)
+
+            for bx in range(int(info.left // size), int(info.right // size) + 1):
+                for by in range(int(info.top // size), int(info.bottom // size) + 1):
+                    self.buckets.setdefault((bx, by), []).append(info)
+
+    def windows_at(self, x, y):
+        """Yield the windows containing (x, y), frontmost first."""
+        size = self.BUCKET_SIZE
+        for info in self.buckets.get((int(x // size), int(y // size)), ()):
+            if info.contains(x, y):
+                yield info
+
+
+class WindowSnapshotService:
+    """Caches the on-screen window list and running-application handles.
+
+    refresh() is called once per overlay activation; confirm-time lookups
+    are then served from memory. window_source and app_lookup are
+    pluggable so a synthetic window list can be used off macOS.
+    """
+
+    def __init__(self, window_source=None, app_lookup=None):
+        self.window_source = window_source or quartz_window_list
+        self.app_lookup = app_lookup or NSRunningApplication.runningApplicationWithProcessIdentifier_
+        self.snapshot = None
+        self.apps = {}  # pid -> NSRunningApplication
+
+    def refresh(self):
+        """Take a new snapshot of the on-screen windows."""
+        import os
+        self.snapshot = WindowSnapshot(self.window_source(), exclude_pid=os.getpid())
+
+    def invalidate(self):
+        """Drop the snapshot; the next query or activation takes a new one."""
+        self.snapshot = None
+
+    def app_for_pid(self, pid):
+        """Running application for pid, cached across activations."""
+        app = self.apps.get(pid)
+        if app is None or app.isTerminated():
+            app = self.app_lookup(pid)
+            if app:
+                self.apps[pid] = app
+            else:
+                self.apps.pop(pid, None)
+        return app
+
+    def app_at_point(self, x, y):
+        """Return (app, WindowInfo) for the frontmost app window at (x, y), or None."""
+        if self.snapshot is None:
+            self.refresh()
+        for window in self.snapshot.windows_at(x, y):
+            app = self.app_for_pid(window.owner_pid)
+            if app:
+                return app, window
+        return None
+
+
+class WindowTargetSource:
+    """Hint targets from the on-screen windows in the shared snapshot.
+
+    Any object with a targets(left, top, right, bottom) method can replace
+    it, e.g. a synthetic target list off macOS.
+    """
+
+    MIN_SIZE = 24
+
+    def __init__(self, window_snapshots):
+        self.window_snapshots = window_snapshots
+
+    def targets(self, left, top, right, bottom):
+        """(left, top, right, bottom) of visible windows within the area, frontmost first."""
+        if self.window_snapshots.snapshot is None:
+            self.window_snapshots.refresh()
+        snapshot = self.window_snapshots.snapshot
+
+        targets = []
+        for window in snapshot.windows:
+            box = (max(window.left, left), max(window.top, top),
+                   min(window.right, right), min(window.bottom, bottom))
+            if box[2] - box[0] < self.MIN_SIZE or box[3] - box[1] < self.MIN_SIZE:
+                continue
+            # Skip windows hidden behind others at their center
+            center_x, center_y = (box[0] + box[2]) / 2, (box[1] + box[3]) / 2
+            if next(snapshot.windows_at(center_x, center_y), None) is window:
+                targets.append(box)
+        return targets
+
+
+def running_app_id(app):
+    """Bundle identifier (or name) of an NSRunningApplication, or '' if unknown."""
+    if not app:
+        return ''
+    return app.bundleIdentifier() or app.localizedName() or ''
+
+
+def frontmost_app_id():
+    """Bundle identifier of the frontmost application, or '' if unknown."""
+    return running_app_id(NSWorkspace.sharedWorkspace().frontmostApplication())
+
+
+class ClickFrequencyModel:
+    """Exponentially decaying click counts per scope (monitor + frontmost app).
+
+    Clicks are merged into QUANTUM pixel cells (monitor-local coordinates);
+    each cell keeps (score, time of last update, last click position), and
+    scores halve every HALF_LIFE seconds. Memory is bounded: each scope
+    keeps at most MAX_TARGETS cells, evicting the weakest, and at most
+    MAX_SCOPES scopes, evicting the least recently used.
+
+    Clicks are appended to a JSON-lines log as they happen. Once the log
+    is several times larger than the model it is compacted into one
+    snapshot line per cell.
+    """
+
+    QUANTUM = 16
+    HALF_LIFE = 3 * 24 * 3600
+    MAX_TARGETS = 64
+    MAX_SCOPES = 256
+    COMPACT_MIN_LINES = 1000
+
+    def __init__(self, path=None, clock=time.time):
+        self.path = Path(path) if path else DATA_DIR / "clicks.jsonl"
+        self.clock = clock
+        self.scopes = None  # scope -> {cell: [score, t, x, y]}, least recently used first
+        self.log_lines = 0
+
+    def decayed(self, entry, now):
+        return entry[0] * 0.5 ** ((now - entry[1]) / self.HALF_LIFE)
+
+    def load(self):
+        """Replay the log (snapshot lines, then clicks) into memory."""
+        import json
+        self.scopes = OrderedDict()
+        self.log_lines = 0
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    self.log_lines += 1
+                    try:
+                        record = json.loads(line)
+                        self.apply(record['scope'], record['x'], record['y'], record['t'], record.get('score'))
+                    except (ValueError, KeyError, TypeError):
+                        continue  # e.g. a line cut short by a crash
+        except FileNotFoundError:
+            pass
+        except OSError:
+            log_settings.warning("Could not read click history %s", self.path, exc_info=True)
+
+    def apply(self, scope, x, y, t, score=None):
+        """Add one click (or restore a snapshot score) to the in-memory model."""
+        cells = self.scopes.get(scope)
+        if cells is None:
+            cells = self.scopes[scope] = {}
+            if len(self.scopes) > self.MAX_SCOPES:
+                self.scopes.popitem(last=False)
+        else:
+            self.scopes.move_to_end(scope)
+
+        cell = (int(x // self.QUANTUM), int(y // self.QUANTUM))
+        entry = cells.get(cell)
+        if score is None:
+            score = (self.decayed(entry, t) if entry else 0.0) + 1.0
+        cells[cell] = [score, t, x, y]
+
+        if len(cells) > self.MAX_TARGETS:
+            weakest = min(cells, key=lambda c: self.decayed(cells[c], t))
+            del cells[weakest]
+
+    def record(self, scope, x, y):
+        """Count a confirmed click and append it to the log."""
+        import json
+        if self.scopes is None:
+            self.load()
+        now = self.clock()
+        self.apply(scope, x, y, now)
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a') as f:
+                f.write(json.dumps({'t': round(now, 3), 'scope': scope, 'x': x, 'y': y}) + "\n")
+            self.log_lines += 1
+            if self.log_lines > max(self.COMPACT_MIN_LINES, 4 * self.size()):
+                self.compact()
+        except OSError:
+            log_settings.warning("Could not write click history %s", self.path, exc_info=True)
+
+    def size(self):
+        return sum(len(cells) for cells in self.scopes.values())
+
+    def compact(self):
+        """Rewrite the log as one snapshot line per cell."""
+        import json
+        lines = [
+            json.dumps({'t': round(t, 3), 'scope': scope, 'x': x, 'y': y, 'score': round(score, 4)})
+            for scope, cells in self.scopes.items()
+            for score, t, x, y in cells.values()
+        ]
+        write_atomic(self.path, "".join(line + "\n" for line in lines))
+        self.log_lines = len(lines)
+
+    def top(self, scope, count):
+        """[(x, y)] of the count highest-scoring targets in scope, most recent position per cell."""
+        if self.scopes is None:
+            self.load()
+        cells = self.scopes.get(scope)
+        if not cells:
+            return []
+        now = self.clock()
+        best = sorted(cells.values(), key=lambda entry: self.decayed(entry, now), reverse=True)
+        return [(x, y) for _, _, x, y in best[:count]]
+
+    def weights(self, scope):
+        """[(x, y, decayed score)] of every target in scope."""
+        if self.scopes is None:
+            self.load()
+        cells = self.scopes.get(scope)
+        if not cells:
+            return []
+        now = self.clock()
+        return [(entry[2], entry[3], self.decayed(entry, now)) for entry in cells.values()]
+
+    def most_recent(self, scope):
+        """(x, y) of the latest click in scope, or None."""
+        if self.scopes is None:
+            self.load()
+        cells = self.scopes.get(scope)
+        if not cells:
+            return None
+        _, _, x, y = max(cells.values(), key=lambda entry: entry[1])
+        return x, y
+
+
+class BookmarkStore:
+    """Bookmarked regions, scoped per monitor layout and frontmost app.
+
+    Regions are (x, y, width, height) in global coordinates. The JSON file
+    is read on first use and rewritten atomically on every change.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else DATA_DIR / "bookmarks.json"
+        self.scopes = None  # scope -> {slot: [x, y, width, height]}
+
+    @staticmethod
+    def scope(layout_id, app_id):
+        return f"{layout_id}|{app_id}"
+
+    def load(self):
+        import json
+        try:
+            with open(self.path) as f:
+                self.scopes = json.load(f).get('scopes', {})
+        except FileNotFoundError:
+            self.scopes = {}
+        except (OSError, ValueError, AttributeError):
+            log_settings.warning("Ignoring unreadable bookmarks file %s", self.path, exc_info=True)
+            self.scopes = {}
+
+    def get(self, scope, slot):
+        if self.scopes is None:
+            self.load()
+        return self.scopes.get(scope, {}).get(slot)
+
+    def set(self, scope, slot, rect):
+        import json
+        if self.scopes is None:
+            self.load()
+        self.scopes.setdefault(scope, {})[slot] = [round(v, 2) for v in rect]
+        write_atomic(self.path, json.dumps({'version': 1, 'scopes': self.scopes}, indent=2))
+
+
+# Mouse buttons an overlay click can use, cycled with Left/Right
+MOUSE_BUTTONS = ('left', 'right', 'middle')
+
+# Most clicks (double, triple) one confirm can post, changed with Up/Down
+MAX_CLICK_COUNT = 3
+
+
+class QuartzEventSink:
+    """Posts mouse events straight to the HID event tap with CoreGraphics.
+
+    Quartz is imported on first use; it is normally loaded already by
+    pynput's keyboard listener.
+    """
+
+    def __init__(self):
+        self.Quartz = None
+        self.event_types = None
+        self.flag_bits = None
+
+    def load(self):
+        Quartz = self.Quartz = timed_import('Quartz')
+        # button -> (down event, up event, dragged event, CGMouseButton)
+        self.event_types = {
+            'left': (Quartz.kCGEventLeftMouseDown, Quartz.kCGEventLeftMouseUp,
+                     Quartz.kCGEventLeftMouseDragged, Quartz.kCGMouseButtonLeft),
+            'right': (Quartz.kCGEventRightMouseDown, Quartz.kCGEventRightMouseUp,
+                      Quartz.kCGEventRightMouseDragged, Quartz.kCGMouseButtonRight),
+            'middle': (Quartz.kCGEventOtherMouseDown, Quartz.kCGEventOtherMouseUp,
+                       Quartz.kCGEventOtherMouseDragged, Quartz.kCGMouseButtonCenter),
+        }
+        self.flag_bits = (
+            (MOD_CTRL, Quartz.kCGEventFlagMaskControl),
+            (MOD_ALT, Quartz.kCGEventFlagMaskAlternate),
+            (MOD_SHIFT, Quartz.kCGEventFlagMaskShift),
+            (MOD_CMD, Quartz.kCGEventFlagMaskCommand),
+        )
+        return Quartz
+
+    def position(self):
+        Quartz = self.Quartz or self.load()
+        location = Quartz.CGEventGetLocation(Quartz.CGEventCreate(None))
+        return location.x, location.y
+
+    def move(self, x, y):
+        Quartz = self.Quartz or self.load()
+        event = Quartz.CGEventCreateMouseEvent(None, Quartz.kCGEventMouseMoved, (x, y), Quartz.kCGMouseButtonLeft)
+        Quartz.CGEventPost(Quartz.kCGHIDEventTap, event)
+
+    def button(self, x, y, button, down, click_state, modifiers):
+        Quartz = self.Quartz or self.load()
+        down_type, up_type, _, cg_button = self.event_types[button]
+        event = Quartz.CGEventCreateMouseEvent(None, down_type if down else up_type, (x, y), cg_button)
+        Quartz.CGEventSetIntegerValueField(event, Quartz.kCGMouseEventClickState, click_state)
+        self.post(event, modifiers)
+
+    def drag(self, x, y, button, modifiers):
+        """Move the cursor with button held down."""
+        Quartz = self.Quartz or self.load()
+        _, _, drag_type, cg_button = self.event_types[button]
+        self.post(Quartz.CGEventCreateMouseEvent(None, drag_type, (x, y), cg_button), modifiers)
+
+    def post(self, event, modifiers):
+        Quartz = self.Quartz
+        if modifiers:
+            Quartz.CGEventSetFlags(event, sum(flag for bit, flag in self.flag_bits if modifiers & bit))
+        Quartz.CGEventPost(Quartz.kCGHIDEventTap, event)
+
+
+def wait_until(deadline, spin=0.002):
+    """Return at the perf_counter() deadline: sleep most of the way, then spin.
+
+    time.sleep() alone can overshoot by a millisecond or more; the final
+    spin yields the GIL on every iteration.
+    """
+    remaining = deadline - time.perf_counter()
+    if remaining > spin:
+        time.sleep(remaining - spin)
+    while time.perf_counter() < deadline:
+        time.sleep(0)
+
+
+class InputInjector:
+    """Cursor moves and clicks, posted through one event sink with no added pauses.
+
+    The sink (QuartzEventSink by default) is any object with position(),
+    move(x, y), button(x, y, button, down, click_state, modifiers) and
+    drag(x, y, button, modifiers), so a recording stand-in can replace it
+    off macOS.
+    """
+
+    def __init__(self, sink=None):
+        self.sink = sink or QuartzEventSink()
+        self.drag_pacing = DragPacing()
+        self.drag_thread = None
+        # (scheduled, posted) perf_counter() times of the last drag's moves and mouse-up
+        self.last_drag = None
+
+    @property
+    def position(self):
+        """Global cursor position; assigning moves the cursor."""
+        return self.sink.position()
+
+    @position.setter
+    def position(self, position):
+        self.sink.move(*position)
+
+    def click(self, x, y, button='left', count=1, modifiers=0):
+        """Click count times at (x, y) with button, holding MOD_* modifiers.
+
+        Each down/up pair carries its click state (1, 2, 3), which is how
+        macOS recognizes double and triple clicks without waiting.
+        """
+        sink = self.sink
+        sink.move(x, y)
+        for click_state in range(1, count + 1):
+            sink.button(x, y, button, True, click_state, modifiers)
+            sink.button(x, y, button, False, click_state, modifiers)
+
+    def drag(self, start, end, button='left', modifiers=0, pacing=None):
+        """Drag from start to end on a background thread, paced by drag_pacing.
+
+        Returns False (and does nothing) while a previous drag is still running.
+        """
+        if self.drag_thread is not None and self.drag_thread.is_alive():
+            log_input.warning("Drag ignored: previous drag still running")
+            return False
+        import threading
+        self.drag_thread = threading.Thread(
+            target=self.run_drag, args=(start, end, button, modifiers, pacing or self.drag_pacing),
+            name="kbnav-drag", daemon=True
+        )
+        self.drag_thread.start()
+        return True
+
+    def run_drag(self, start, end, button, modifiers, pacing):
+        """Mouse-down at start, moves along the line to end, mouse-up at end."""
+        sink = self.sink
+        (start_x, start_y), (end_x, end_y) = start, end
+        steps = pacing.steps
+        interval = pacing.interval_ms / 1000
+        timings = []
+
+        sink.move(start_x, start_y)
+        sink.button(start_x, start_y, button, True, 1, modifiers)
+        deadline = time.perf_counter() + pacing.hold_ms / 1000
+        for step in range(1, steps + 2):
+            wait_until(deadline)
+            if step <= steps:
+                t = step / steps
+                sink.drag(start_x + (end_x - start_x) * t, start_y + (end_y - start_y) * t, button, modifiers)
+            else:
+                sink.button(end_x, end_y, button, False, 1, modifiers)
+            posted = time.perf_counter()
+            timings.append((deadline, posted))
+            # If the thread was preempted, shift the rest of the schedule rather
+            # than post the backlog in a burst: events stay at least half an interval apart
+            deadline = max(deadline + interval, posted + interval / 2)
+
+        self.last_drag = timings
+        log_input.debug("Dragged %s -> %s in %d moves, latest event %.3f ms late", start, end, steps,
+                        max(posted - scheduled for scheduled, posted in timings) * 1000)
+
+
+class ClickPipeline(QObject):
+    """Posts the confirm click once the overlay is gone and the target app is active.
+
+    Readiness is polled from a QTimer on the event loop, so the Qt main
+    thread never sleeps; after TIMEOUT_MS the click is posted regardless.
+    Per-stage durations of the last click are kept in last_timings.
+    """
+
+    POLL_INTERVAL_MS = 2
+    TIMEOUT_MS = 150
+
+    # Emitted with the stage timings (ms) after each click
+    finished = pyqtSignal(dict)
+
+    def __init__(self, post_click, post_drag=None):
+        super().__init__()
+        self.post_click = post_click  # (x, y, button, count, modifiers)
+        self.post_drag = post_drag  # (start, end, button, modifiers)
+        self.poll_timer = QtCore.QTimer(self)
+        self.poll_timer.setInterval(self.POLL_INTERVAL_MS)
+        self.poll_timer.timeout.connect(self.poll)
+        self.pending = None
+        self.last_timings = None
+
+    def start(self, overlay, x, y, app=None, stages=None, started_at=None, click=('left', 1, 0),
+              drag_from=None):
+        """Begin waiting for overlay and app readiness, then click at (x, y).
+
+        click is the (button, count, modifiers) passed on to post_click; with
+        drag_from, the pipeline drags from there to (x, y) instead.
+        """
+        now = time.perf_counter()
+        self.pending = {
+            'overlay': overlay,
+            'position': (x, y),
+            'click': click,
+            'drag_from': drag_from,
+            'app': app,
+            'started_at': started_at if started_at is not None else now,
+            'waiting_since': now,
+            'stages': dict(stages or {}),
+        }
+        self.poll_timer.start()
+
+    def poll(self):
+        """Check readiness signals; click when all are met or on timeout."""
+        pending = self.pending
+        if pending is None:
+            self.poll_timer.stop()
+            return
+
+        now = time.perf_counter()
+        stages = pending['stages']
+        waited_ms = (now - pending['waiting_since']) * 1000
+
+        if 'overlay_hidden_ms' not in stages and not pending['overlay'].is_on_screen():
+            stages['overlay_hidden_ms'] = waited_ms
+
+        app = pending['app']
+        if 'app_active_ms' not in stages and (app is None or app.isActive()):
+            stages['app_active_ms'] = waited_ms
+
+        ready = 'overlay_hidden_ms' in stages and 'app_active_ms' in stages
+        timed_out = waited_ms >= self.TIMEOUT_MS
+        if not (ready or timed_out):
+            return
+
+        self.poll_timer.stop()
+        self.pending = None
+
+        x, y = pending['position']
+        click_started = time.perf_counter()
+        try:
+            if pending['drag_from'] is not None:
+                button, _, modifiers = pending['click']
+                self.post_drag(pending['drag_from'], (x, y), button, modifiers)
+                log_input.debug("Dragging %s -> (%s, %s)", pending['drag_from'], x, y)
+            else:
+                self.post_click(x, y, *pending['click'])
+                log_input.debug("Clicked at (%s, %s): %s", x, y, pending['click'])
+            latency_tracer.mark('click')
+        except Exception as e:
+            log_input.warning("Click failed: %s", e)
+        done = time.perf_counter()
+
+        stages['click_ms'] = (done - click_started) * 1000
+        stages['total_ms'] = (done - pending['started_at']) * 1000
+        stages['timed_out'] = timed_out and not ready
+        self.last_timings = stages
+        if log_input.isEnabledFor(logging.DEBUG):
+            log_input.debug("Confirm stages: %s", ", ".join(
+                f"{name}={value:.1f}" if isinstance(value, float) else f"{name}={value}"
+                for name, value in stages.items()
+            ))
+        self.finished.emit(stages)
+
+
+class QuartzFrameSource:
+    """Screen captures through CoreGraphics, leaving out the overlay window itself.
+
+    Without the Screen Recording permission macOS returns only the desktop
+    and menu bar.
+    """
+
+    def grab(self, monitor, window=None):
+        """QImage of the monitor in device pixels, as seen below window (if given), or None."""
+        Quartz = timed_import('Quartz')
+        rect = Quartz.CGRectMake(monitor.x, monitor.y, monitor.width, monitor.height)
+        if window is not None:
+            option, relative_to = Quartz.kCGWindowListOptionOnScreenBelowWindow, window.windowNumber()
+        else:
+            option, relative_to = Quartz.kCGWindowListOptionOnScreenOnly, Quartz.kCGNullWindowID
+        image = Quartz.CGWindowListCreateImage(rect, option, relative_to, Quartz.kCGWindowImageDefault)
+        if image is None:
+            return None
+        data = Quartz.CGDataProviderCopyData(Quartz.CGImageGetDataProvider(image))
+        frame = QtGui.QImage(
+            bytes(data), Quartz.CGImageGetWidth(image), Quartz.CGImageGetHeight(image),
+            Quartz.CGImageGetBytesPerRow(image), QtGui.QImage.Format_ARGB32_Premultiplied
+        )
+        return frame.copy()  # Own the pixels; the QImage above only borrows them
+
+
+class FramePyramid:
+    """A captured frame and its successively halved copies, built on demand.
+
+    crop() resamples from the smallest level that still has the requested
+    output resolution, so no zoom level re-grabs the screen or resamples
+    more pixels than it needs.
+    """
+
+    def __init__(self, frame):
+        self.levels = [frame]
+
+    def level(self, index):
+        while len(self.levels) <= index:
+            previous = self.levels[-1]
+            self.levels.append(previous.scaled(
+                max(1, previous.width() // 2), max(1, previous.height() // 2),
+                Qt.IgnoreAspectRatio, Qt.SmoothTransformation
+            ))
+        return self.levels[index]
+
+    def crop(self, x, y, width, height, out_width, out_height, built_only=False):
+        """(x, y, width, height) of the full-resolution frame, resampled to out_width x out_height.
+
+        With built_only, only levels that already exist are used, so the
+        call never pays for halving a full frame.
+        """
+        index = 0
+        shrink = min(width / out_width, height / out_height)
+        while shrink >= 2 and min(self.levels[0].width(), self.levels[0].height()) >> (index + 1) > 0:
+            shrink /= 2
+            index += 1
+        if built_only:
+            index = min(index, len(self.levels) - 1)
+        scale = 0.5 ** index
+        source = self.level(index).copy(
+            int(x * scale), int(y * scale), max(1, round(width * scale)), max(1, round(height * scale))
+        )
+        # Magnified crops keep hard pixel edges, which make small targets easier to judge
+        mode = Qt.SmoothTransformation if source.width() > out_width else Qt.FastTransformation
+        return source.scaled(out_width, out_height, Qt.IgnoreAspectRatio, mode)
+
+
+class ContentSnap:
+    """Finds the most clickable-looking feature in a grayscale capture of a region.
+
+    Pixels that differ from the background (the most common gray level) or
+    sit on a strong edge are grouped into 4-connected components; each is
+    scored by edge density, contrast and size, weighted toward the region's
+    center. All steps are vectorized NumPy operations on an image of at most
+    max_side pixels per side. max_side adapts so an analysis stays within
+    budget_ms; one that runs over is abandoned (the caller keeps the center).
+
+    Needs numpy (the "snap" extra); the constructor raises ImportError without it.
+    """
+
+    BUDGET_MS = 4.0
+    MAX_SIDE = 160
+    MIN_SIDE = 48
+
+    # Regions larger than this (points) are too coarse to snap within
+    MAX_REGION = 480
+
+    # Gray level difference from the background, and edge strength, marking a feature
+    CONTRAST_MIN = 24
+    EDGE_MIN = 48
+
+    # Components smaller than this (analysis pixels) are noise; larger than
+    # this fraction of the region they are panels or background
+    MIN_AREA = 4
+    MAX_AREA_FRACTION = 0.35
+
+    def __init__(self, budget_ms=BUDGET_MS):
+        self.np = timed_import('numpy')
+        self.budget_ms = budget_ms
+        self.max_side = self.MAX_SIDE
+        self.last_ms = None
+        self.runs = 0
+        self.over_budget = 0
+
+    def analysis_size(self, width, height):
+        """Analysis image size for a width x height (device pixel) region: never upscaled."""
+        scale = min(1.0, self.max_side / max(width, height))
+        return max(1, round(width * scale)), max(1, round(height * scale))
+
+    def gray_array(self, image):
+        """uint8 (height, width) array of a QImage's luminance."""
+        gray = image.convertToFormat(QtGui.QImage.Format_Grayscale8)
+        bits = gray.constBits()
+        bits.setsize(gray.sizeInBytes())
+        rows = self.np.frombuffer(bits, self.np.uint8).reshape(gray.height(), gray.bytesPerLine())
+        return rows[:, :gray.width()].copy()
+
+    def find(self, gray, started_at=None):
+        """(x, y) of the best feature in a uint8 image, in its pixel coordinates, or None.
+
+        started_at (perf_counter()) lets the budget include the caller's capture work.
+        """
+        started_at = started_at if started_at is not None else time.perf_counter()
+        deadline = started_at + self.budget_ms / 1000
+        point = self.analyze(gray, deadline)
+
+        # Adapt the resolution to the budget: shrink after an overrun, grow back when well under
+        elapsed_ms = (time.perf_counter() - started_at) * 1000
+        self.last_ms = elapsed_ms
+        self.runs += 1
+        if elapsed_ms > self.budget_ms:
+            self.over_budget += 1
+            self.max_side = max(self.MIN_SIDE, int(self.max_side * 0.8))
+        elif elapsed_ms < self.budget_ms / 4:
+            self.max_side = min(self.MAX_SIDE, self.max_side + 8)
+        return point
+
+    def analyze(self, gray, deadline):
+        np = self.np
+        height, width = gray.shape
+        if height < 3 or width < 3:
+            return None
+        image = gray.astype(np.float32)
+
+        # Edge magnitude: absolute differences to the 4 neighbors
+        dx = np.abs(np.diff(image, axis=1))
+        dy = np.abs(np.diff(image, axis=0))
+        edges = np.zeros_like(image)
+        edges[:, :-1] += dx
+        edges[:, 1:] += dx
+        edges[:-1, :] += dy
+        edges[1:, :] += dy
+
+        # Contrast against the background, taken as the most common gray level
+        background = np.bincount((gray >> 3).ravel(), minlength=32).argmax() * 8 + 4
+        contrast = np.abs(image - background)
+
+        mask = (contrast > self.CONTRAST_MIN) | (edges > self.EDGE_MIN)
+        if not mask.any():
+            return None
+        labels = self.components(mask, deadline)
+        if labels is None:
+            return None
+
+        ys, xs = np.nonzero(mask)
+        _, component = np.unique(labels[mask], return_inverse=True)
+        area = np.bincount(component)
+        edge_density = np.bincount(component, weights=edges[mask]) / area
+        mean_contrast = np.bincount(component, weights=contrast[mask]) / area
+        center_x = np.bincount(component, weights=xs) / area
+        center_y = np.bincount(component, weights=ys) / area
+
+        # Prefer dense, contrasting features of control size near where the user aimed
+        offset = ((center_x - width / 2) / (width / 2)) ** 2 + ((center_y - height / 2) / (height / 2)) ** 2
+        score = edge_density * (1 + mean_contrast / 64) * np.sqrt(area) * np.exp(-offset)
+        score[(area < self.MIN_AREA) | (area > self.MAX_AREA_FRACTION * mask.size)] = 0
+        best = score.argmax()
+        if score[best] <= 0:
+            return None
+        return float(center_x[best]), float(center_y[best])
+
+    def components(self, mask, deadline):
+        """Connected component labels of mask (each the flat index of a member pixel), or None past deadline.
+
+        Each pass takes the smallest label among the 4 neighbors, also
+        hooks the pixel's old label onto it, then jumps every label to its
+        pixel's label. Labels halve their distance to the component's root
+        per pass, so even long thin components (borders, underlines)
+        converge in a handful of passes.
+        """
+        np = self.np
+        size = mask.size
+        members = mask.ravel()
+        # labels[size] is a sentinel for pixels outside the mask
+        labels = np.append(np.where(members, np.arange(size, dtype=np.int64), size), size)
+        while True:
+            grid = labels[:size].reshape(mask.shape)
+            spread = grid.copy()
+            np.minimum(spread[1:, :], grid[:-1, :], out=spread[1:, :])
+            np.minimum(spread[:-1, :], grid[1:, :], out=spread[:-1, :])
+            np.minimum(spread[:, 1:], grid[:, :-1], out=spread[:, 1:])
+            np.minimum(spread[:, :-1], grid[:, 1:], out=spread[:, :-1])
+            seen = spread.ravel()[members]
+            updated = labels.copy()
+            np.minimum.at(updated, labels[:size][members], seen)
+            updated[:size][members] = np.minimum(updated[:size][members], seen)
+            updated = updated[updated]
+            if np.array_equal(updated, labels):
+                return labels[:size].reshape(mask.shape)
+            labels = updated
+            if time.perf_counter() > deadline:
+                return None
+
+
 class GridOverlay(QMainWindow):
-    def __init__(self, monitor, signals):
+    """Warm overlay for one monitor.
+
+    Built once at startup and reused: activate() resets the navigation state
+    and shows the window, deactivate() hides it again. The window is never
+    destroyed while the app is running.
+    """
+
+    # Emitted after the overlay has been hidden (confirm or cancel)
+    deactivated = pyqtSignal()
+
+    # Global position of a confirmed click, once the click has been posted
+    confirmed = pyqtSignal(int, int)
+
+    GRID_PEN_WIDTH = 2
+
+    # Upper bound on cached region layers, in device pixels (~32 MB)
+    LAYER_CACHE_PIXELS = 8_000_000
+
+    # Zoom inset: longest side (points), gap to the region, and the least
+    # magnification at which it is shown
+    INSET_SIZE = 200
+    INSET_MARGIN = 12
+    INSET_MIN_ZOOM = 2
+
+    def __init__(self, monitor, signals, window_platform=None, window_snapshots=None, bindings=None,
+                 target_source=None, injector=None, frame_source=None, snap=None, journal=None):
         super().__init__()
         self.monitor = monitor
-        self.mouse = MouseController()
+        self.mouse = injector or InputInjector()
         self.signals = signals
-
-        # Connect signals
-        self.signals.highlight_cell.connect(self.subdivide_to_cell)
-        self.signals.go_back.connect(self.go_back)
-        self.signals.confirm.connect(self.confirm_selection)
-        self.signals.cancel.connect(self.cancel_selection)
-
-        # Key to cell mapping (row, col)
-        self.key_map = {
-            'q': (0, 0), 'w': (0, 1), 'e': (0, 2),  # top row
-            'a': (1, 0), 's': (1, 1), 'd': (1, 2),  # middle row
-            'z': (2, 0), 'x': (2, 1), 'c': (2, 2),  # bottom row
-        }
+        self.bindings = bindings or DEFAULT_BINDINGS
+        self.signals_connected = False
+        self.window_platform = window_platform or CocoaWindowPlatform()
+        self.window_snapshots = window_snapshots or WindowSnapshotService()
+        self.click_pipeline = ClickPipeline(self.mouse.click, self.mouse.drag)
+        self.click_pipeline.finished.connect(self.on_click_posted)
+        self.confirmed_click = None  # (x, y) of the click in the pipeline, for confirmed
+
+        # Click posted on confirm; reset to a single left click per activation
+        self.click_button = MOUSE_BUTTONS[0]
+        self.click_count = 1
+        self.drag_start = None  # Global position marked with DRAG_KEY; confirm then drags from it
+
+        # Activation latency tracking (hotkey signal -> first paintEvent)
+        self.activation_requested_at = None
+        self.last_activation_latency = None
 
         # Current active region (starts as full screen) - use floats to avoid rounding errors
         self.region_x = 0.0
@@ -114,6 +1941,42 @@ class GridOverlay(QMainWindow):
         # History stack for going back
         self.history = []
 
+        # Rendered region layers, see region_layer()
+        self.layer_cache = OrderedDict()
+        self.layer_cache_pixels = 0
+
+        # Hint mode: label -> (x, y, width, height) of its target, local coordinates
+        self.target_source = target_source or WindowTargetSource(self.window_snapshots)
+        self.hint_mode = False
+        self.hints = {}
+        self.hint_prefixes = set()
+        self.hint_typed = ""
+        self.hint_font = QtGui.QFont()
+        self.hint_font.setPixelSize(13)
+        self.hint_font.setBold(True)
+        self.hint_texts = {}  # label -> prepared QStaticText, kept across activations
+
+        # Frequent click targets [(x, y)] in local coordinates, best first; set per activation
+        self.likely_targets = []
+
+        # Adaptive grid: past clicks [(x, y, weight)] in local coordinates, set per
+        # activation (empty: even cells), and the cell edges computed from them
+        self.click_density = []
+        self.edge_cache = {}
+
+        # Zoom inset: one capture per activation (after the first paint), as a FramePyramid
+        self.frame_source = frame_source or QuartzFrameSource()
+        self.frame = None
+        self.inset_drawn = QtCore.QRect()  # Where the inset was last painted
+        self.inset_cache = (None, None)  # (region and size, image) of the last inset drawn
+
+        # Optional ContentSnap: move the cursor to the region's most clickable feature
+        self.snap = snap
+        self.snap_target = None  # Snapped cursor position (local coordinates), or None at the center
+
+        # Optional EventJournal: cells, jumps, go_back, confirm and cancel are recorded
+        self.journal = journal
+
         # Original mouse position when overlay was shown
         self.original_mouse_pos = None
 
@@ -131,87 +1994,80 @@ class GridOverlay(QMainWindow):
         # Position on selected monitor
         self.setGeometry(monitor.x, monitor.y, monitor.width, monitor.height)
 
-        # Timer to keep window on top
-        self.raise_timer = QtCore.QTimer()
-        self.raise_timer.timeout.connect(self.keep_on_top)
-
-        # Initialize and show immediately
-        self.initialize_overlay()
+        # Native window handle, resolved on first show and then cached
+        self.native_window = None
+        self.level_watch = None
 
-    def keep_on_top(self):
-        """Periodically ensure window stays at correct level without stealing focus."""
-        # Just ensure window level is correct - don't call raise_() as it steals focus
-        self.set_window_level_above_menubar()
+        # Create the native window now so activation only has to show it
+        self.winId()
+        self.ensurePolished()
 
     def set_window_level_above_menubar(self):
-        """Set window level to appear above menu bar using PyObjC."""
-        try:
-            from AppKit import NSScreenSaverWindowLevel, NSMainMenuWindowLevel, NSStatusWindowLevel
-            from Cocoa import NSView
-            import objc
-
-            # Use the highest practical level (screen saver level = 1000)
-            # Other levels: NSStatusWindowLevel=25, NSMainMenuWindowLevel=24
-            target_level = NSScreenSaverWindowLevel
-
-            print(f"[DEBUG] Target window level: {target_level}")
-            print(f"[DEBUG] NSApp windows count: {len(NSApp.windows())}")
-
-            # Force window to be native
-            win_id = self.winId()
-
-            # Try to get NSWindow via NSView
-            ns_view = objc.objc_object(c_void_p=int(win_id))
-            if hasattr(ns_view, 'window'):
-                ns_window = ns_view.window()
-                if ns_window:
-                    print(f"[DEBUG] Found NSWindow via NSView, current level: {ns_window.level()}")
-                    ns_window.setLevel_(target_level)
-                    ns_window.setCollectionBehavior_(
-                        NSWindowCollectionBehaviorCanJoinAllSpaces |
-                        NSWindowCollectionBehaviorStationary
-                    )
-                    ns_window.setIgnoresMouseEvents_(True)
-                    ns_window.setHasShadow_(False)  # Remove shadow/border
-                    ns_window.orderFrontRegardless()  # Force to front
-                    print(f"[DEBUG] Set window level to {target_level}, new level: {ns_window.level()}")
-                    return
+        """Raise the overlay above the menu bar if something demoted it.
 
-            # Fallback: search through all windows
-            for i, ns_window in enumerate(NSApp.windows()):
-                print(f"[DEBUG] Window {i}: number={ns_window.windowNumber()}, level={ns_window.level()}, visible={ns_window.isVisible()}")
-                if ns_window.windowNumber() == int(win_id):
-                    print(f"[DEBUG] Found NSWindow via windowNumber, current level: {ns_window.level()}")
-                    ns_window.setLevel_(target_level)
-                    ns_window.setCollectionBehavior_(
-                        NSWindowCollectionBehaviorCanJoinAllSpaces |
-                        NSWindowCollectionBehaviorStationary
-                    )
-                    ns_window.setIgnoresMouseEvents_(True)
-                    ns_window.setHasShadow_(False)  # Remove shadow/border
-                    ns_window.orderFrontRegardless()
-                    print(f"[DEBUG] Set window level to {target_level}, new level: {ns_window.level()}")
+        The native window handle is resolved once and cached; the level is
+        only re-applied when the platform reports it below the target.
+        """
+        try:
+            if self.native_window is None:
+                self.native_window = self.window_platform.resolve_window(int(self.winId()))
+                if self.native_window is None:
+                    log_window.warning("Could not find NSWindow! win_id=%s", int(self.winId()))
                     return
 
-            print(f"[DEBUG] Could not find NSWindow! win_id={win_id}")
+            if not self.window_platform.is_at_target_level(self.native_window):
+                self.window_platform.raise_window(self.native_window)
+                log_window.debug("Re-asserted overlay window level")
 
-        except Exception as e:
-            import traceback
-            print(f"[DEBUG] Failed to set window level: {e}")
-            traceback.print_exc()
+        except Exception:
+            log_window.exception("Failed to set window level")
 
     def showEvent(self, event):
         """When window is shown, set macOS window level."""
         super().showEvent(event)
-        # Process events to ensure native window is created
-        QApplication.processEvents()
         self.set_window_level_above_menubar()
         # Force to front
         self.activateWindow()
         self.raise_()
 
-    def initialize_overlay(self):
-        """Initialize the overlay when first created."""
+    def connect_signals(self):
+        """Route hotkey signals to this overlay while it is visible."""
+        if self.signals_connected:
+            return
+        self.signals.select_keys.connect(self.select_keys)
+        self.signals.toggle_hints.connect(self.toggle_hints)
+        self.signals.click_mode.connect(self.adjust_click)
+        self.signals.mark_drag.connect(self.mark_drag)
+        self.signals.go_back.connect(self.go_back)
+        self.signals.confirm.connect(self.confirm_selection)
+        self.signals.cancel.connect(self.cancel_selection)
+        self.signals_connected = True
+
+    def disconnect_signals(self):
+        """Stop receiving hotkey signals (overlay is hidden)."""
+        if not self.signals_connected:
+            return
+        self.signals.select_keys.disconnect(self.select_keys)
+        self.signals.toggle_hints.disconnect(self.toggle_hints)
+        self.signals.click_mode.disconnect(self.adjust_click)
+        self.signals.mark_drag.disconnect(self.mark_drag)
+        self.signals.go_back.disconnect(self.go_back)
+        self.signals.confirm.disconnect(self.confirm_selection)
+        self.signals.cancel.disconnect(self.cancel_selection)
+        self.signals_connected = False
+
+    def activate(self, requested_at=None, start_rect=None):
+        """Reset navigation state and show the overlay.
+
+        Args:
+            requested_at: time.perf_counter() value of the hotkey press, used
+                to measure latency until the first paintEvent
+            start_rect: optional (x, y, width, height) in local coordinates to
+                start zoomed into (Escape goes back to the full screen)
+        """
+        self.activation_requested_at = requested_at if requested_at is not None else time.perf_counter()
+        self.connect_signals()
+
         # Save original mouse position
         self.original_mouse_pos = self.mouse.position
 
@@ -222,27 +2078,179 @@ class GridOverlay(QMainWindow):
         self.region_height = float(self.monitor.height)
         self.region_active = False
         self.history.clear()
-
-        # Show window first (without activating)
+        self.edge_cache.clear()
+        self.hint_mode = False
+        self.click_button = MOUSE_BUTTONS[0]
+        self.click_count = 1
+        self.drag_start = None
+        if start_rect is not None:
+            self.zoom_to_rect(*start_rect)
+            self.move_mouse_to_region_center()
+
+        # Show window (without activating); showEvent sets the window level
         self.show()
 
-        # Process events to ensure window is created
-        QApplication.processEvents()
+        # Re-assert the level only when the system may have demoted it
+        if self.native_window is not None and self.level_watch is None:
+            self.level_watch = self.window_platform.watch_demotions(
+                self.native_window, self.set_window_level_above_menubar
+            )
 
-        # Set window level immediately - this will keep it on top without focus
-        self.set_window_level_above_menubar()
+        self.update()
+        log.debug("Overlay shown")
+
+    def deactivate(self):
+        """Hide the overlay and keep it around for the next activation."""
+        if self.level_watch is not None:
+            self.window_platform.unwatch(self.level_watch)
+            self.level_watch = None
+        self.window_snapshots.invalidate()
+        self.disconnect_signals()
+        self.frame = None  # A full-resolution capture is too large to keep around
+        self.inset_cache = (None, None)
+        self.hide()
+        self.deactivated.emit()
+
+
+    def grid_layout(self):
+        """(rows, cols) of the grid drawn over the current region."""
+        return layout_at(self.bindings.grid_layouts, len(self.history))
+
+    def select_key(self, key):
+        """Type a hint label character, zoom into the cell bound to key, or recall a likely target."""
+        self.select_keys([key])
+
+    def select_keys(self, keys):
+        """Apply a burst of cell/hint keys in one step.
+
+        Every level still goes on the history stack, so go_back steps back
+        through them one at a time, but the cursor moves and the overlay
+        repaints only once, for the final region.
+        """
+        latency_tracer.mark('subdivide')
+        old_rect = self.region_rect()
+        depth = len(self.history)
+        repaint_all = self.hint_mode
+        for key in keys:
+            if self.apply_key(key) == 'jump':
+                repaint_all = True
+
+        if len(self.history) != depth:
+            self.move_mouse_to_region_center()
+        if repaint_all:
+            self.update()
+        elif len(self.history) != depth:
+            self.update(old_rect.united(self.region_rect()))
+            self.update_inset()
 
-        # Also set it again after a tiny delay to ensure it sticks
-        QtCore.QTimer.singleShot(50, self.set_window_level_above_menubar)
-        QtCore.QTimer.singleShot(100, self.set_window_level_above_menubar)
+    def apply_key(self, key):
+        """Update navigation state for one key, without moving the cursor or repainting.
 
-        self.raise_timer.start(100)
+        Returns 'cell' for a zoom into a cell of the current region, 'jump'
+        for any other change, or None.
+        """
+        char = getattr(key, 'char', None)
+        if self.hint_mode:
+            self.type_hint(char)
+            return 'jump'
+        cell = self.bindings.cell_for(len(self.history), key)
+        if cell is not None:
+            return 'cell' if self.enter_cell(*cell) else None
+        recall_keys = self.bindings.recall_keys_at(len(self.history))
+        if char and char in recall_keys:
+            return 'jump' if self.recall_likely_target(recall_keys.index(char)) else None
+        return None
+
+    def recall_likely_target(self, index):
+        """Zoom to a small square around the index-th likely target; False if there is none."""
+        if index >= len(self.likely_targets):
+            return False
+        x, y = self.likely_targets[index]
+        half = LIKELY_TARGET_SIZE / 2
+        self.zoom_to_rect(x - half, y - half, LIKELY_TARGET_SIZE, LIKELY_TARGET_SIZE)
+        return True
+
+    def toggle_hints(self):
+        """Switch between hint labels for the targets in the current region and the grid."""
+        if self.hint_mode:
+            self.hint_mode = False
+            self.update()
+            return
+
+        left = self.monitor.x + self.region_x
+        top = self.monitor.y + self.region_y
+        boxes = self.target_source.targets(left, top, left + self.region_width, top + self.region_height)
+        labels = hint_labels(len(boxes))
+
+        self.hints = {
+            label: (box[0] - self.monitor.x, box[1] - self.monitor.y, box[2] - box[0], box[3] - box[1])
+            for label, box in zip(labels, boxes)
+        }
+        self.hint_prefixes = {label[:i] for label in labels for i in range(len(label))}
+        self.hint_typed = ""
+        self.hint_mode = True
+        log_input.debug("Hint mode: %d targets", len(self.hints))
         self.update()
-        print("[DEBUG] Overlay shown")
 
+    def type_hint(self, char):
+        """Extend the typed label; a complete label zooms into its target."""
+        if not char:
+            return
+        typed = self.hint_typed + char.lower()
+        target = self.hints.get(typed)
+        if target is not None:
+            self.hint_mode = False
+            self.zoom_to_rect(*target)
+        elif typed in self.hint_prefixes:
+            self.hint_typed = typed
+
+    def zoom_to_rect(self, x, y, width, height):
+        """Make a rect (local coordinates) the current region, so grid keys can refine it."""
+        self.history.append((
+            self.region_x, self.region_y,
+            self.region_width, self.region_height,
+            self.region_active
+        ))
+        self.region_x, self.region_y = float(x), float(y)
+        self.region_width, self.region_height = float(width), float(height)
+        self.region_active = True
+        if self.journal is not None:
+            self.journal_region(JOURNAL_JUMP)
+
+    def bookmark_rect(self):
+        """Current region, or a small square around the cursor at the top level, in global coordinates."""
+        if self.region_active:
+            return (self.monitor.x + self.region_x, self.monitor.y + self.region_y,
+                    self.region_width, self.region_height)
+        x, y = self.mouse.position
+        half = BOOKMARK_POINT_SIZE / 2
+        return (x - half, y - half, BOOKMARK_POINT_SIZE, BOOKMARK_POINT_SIZE)
+
+    def jump_to(self, x, y, width, height):
+        """Zoom straight to a region given in global coordinates."""
+        self.hint_mode = False
+        self.zoom_to_rect(x - self.monitor.x, y - self.monitor.y, width, height)
+        self.move_mouse_to_region_center()
+        self.update()
 
     def subdivide_to_cell(self, row, col):
         """Subdivide current region and zoom into the specified cell."""
+        latency_tracer.mark('subdivide')
+        if not self.enter_cell(row, col):
+            return
+
+        # Move mouse to center of new region
+        self.move_mouse_to_region_center()
+        self.update(self.region_rect(self.history[-1]).united(self.region_rect()))
+        self.update_inset()
+
+    def enter_cell(self, row, col):
+        """Push the current region and make one of its cells current; False if out of range."""
+        rows, cols = self.grid_layout()
+        if not (0 <= row < rows and 0 <= col < cols):
+            return False
+        xs, ys = self.region_edges()
+
         # Save current state to history
         self.history.append((
             self.region_x, self.region_y,
@@ -250,475 +2258,805 @@ class GridOverlay(QMainWindow):
             self.region_active
         ))
 
-        # Calculate new region dimensions (1/3 of current)
-        new_width = self.region_width / 3
-        new_height = self.region_height / 3
-
-        # Calculate new region position
-        self.region_x = self.region_x + (col * new_width)
-        self.region_y = self.region_y + (row * new_height)
-        self.region_width = new_width
-        self.region_height = new_height
+        # Zoom into the cell
+        self.region_x = xs[col]
+        self.region_y = ys[row]
+        self.region_width = xs[col + 1] - xs[col]
+        self.region_height = ys[row + 1] - ys[row]
         self.region_active = True
+        if self.journal is not None:
+            self.journal_region(JOURNAL_CELL, row, col)
+        return True
 
-        # Move mouse to center of new region
-        self.move_mouse_to_region_center()
-        self.update()
+    def journal_region(self, kind, row=0, col=0):
+        """Record entering the current region: its depth and global center."""
+        self.journal.record(kind, len(self.history), row, col,
+                            self.monitor.x + self.region_x + self.region_width / 2,
+                            self.monitor.y + self.region_y + self.region_height / 2)
+
+    def region_edges(self):
+        """(column edges, row edges) of the current region's grid, even or weighted by click_density."""
+        rx, ry, rw, rh = self.region_x, self.region_y, self.region_width, self.region_height
+        layout = self.grid_layout()
+        key = (rx, ry, rw, rh, layout)
+        edges = self.edge_cache.get(key)
+        if edges is None:
+            rows, cols = layout
+            inside = [(x, y, weight) for x, y, weight in self.click_density
+                      if rx <= x < rx + rw and ry <= y < ry + rh]
+            edges = (density_edges(rx, rw, cols, [(x, weight) for x, _, weight in inside]),
+                     density_edges(ry, rh, rows, [(y, weight) for _, y, weight in inside]))
+            self.edge_cache[key] = edges
+        return edges
 
     def go_back(self):
-        """Go back one subdivision level."""
-        if self.history:
+        """Go back one subdivision level (in hint mode: clear typing, then leave it)."""
+        if self.hint_mode:
+            if self.hint_typed:
+                self.hint_typed = ""
+            else:
+                self.hint_mode = False
+            self.update()
+        elif self.history:
+            old_rect = self.region_rect()
             state = self.history.pop()
             self.region_x, self.region_y, self.region_width, self.region_height, self.region_active = state
+            if self.journal is not None:
+                self.journal.record(JOURNAL_BACK, len(self.history))
             if self.region_active:
                 self.move_mouse_to_region_center()
             else:
                 self.mouse.position = self.original_mouse_pos
-            self.update()
+            self.update(old_rect.united(self.region_rect()))
+            self.update_inset()
 
-    def move_mouse_to_region_center(self):
-        """Move mouse to center of current region."""
-        center_x = self.monitor.x + self.region_x + (self.region_width / 2)
-        center_y = self.monitor.y + self.region_y + (self.region_height / 2)
-        self.mouse.position = (int(center_x), int(center_y))
+    def region_rect(self, state=None):
+        """Pixel rect covered by a region's highlight and grid lines.
 
-    def find_and_activate_app_at_point(self, x, y):
-        """Find the application at the given point and activate it."""
-        try:
-            import os
-
-            # Get our own PID to exclude it
-            our_pid = os.getpid()
+        Args:
+            state: (x, y, width, height, active) tuple, defaults to the current region
+        """
+        if state is None:
+            x, y, width, height = self.region_x, self.region_y, self.region_width, self.region_height
+        else:
+            x, y, width, height = state[:4]
+        pad = self.GRID_PEN_WIDTH
+        return QtCore.QRect(
+            int(x) - pad, int(y) - pad,
+            int(width) + 2 * pad + 1, int(height) + 2 * pad + 1
+        )
 
-            # Get all on-screen windows
-            window_list = CGWindowListCopyWindowInfo(
-                kCGWindowListOptionOnScreenOnly,
-                kCGNullWindowID
+    def inset_rect(self):
+        """Where the zoom inset goes, beside the current region; empty when not shown."""
+        if self.frame is None or not self.region_active or self.hint_mode:
+            return QtCore.QRect()
+        zoom = min(self.INSET_SIZE / self.region_width, self.INSET_SIZE / self.region_height)
+        if zoom < self.INSET_MIN_ZOOM:
+            return QtCore.QRect()
+        width, height = round(self.region_width * zoom), round(self.region_height * zoom)
+        x = self.region_x + self.region_width + self.INSET_MARGIN
+        if x + width > self.monitor.width:
+            x = self.region_x - self.INSET_MARGIN - width
+        y = self.region_y + (self.region_height - height) / 2
+        y = min(max(y, 0), self.monitor.height - height)
+        return QtCore.QRect(int(x), int(y), width, height)
+
+    def update_inset(self):
+        """Repaint the inset where it was and where it goes for the current region."""
+        self.update(self.inset_drawn)
+        self.update(self.inset_rect())
+
+    def capture_frame(self):
+        """Grab this monitor for the zoom inset; once per activation."""
+        if self.frame is not None or not self.isVisible():
+            return
+        started = time.perf_counter()
+        try:
+            frame = self.frame_source.grab(self.monitor, self.native_window)
+        except Exception:
+            log_window.exception("Screen capture failed")
+            return
+        if frame is None or frame.isNull():
+            return
+        self.frame = FramePyramid(frame)
+        log_window.debug("Captured %dx%d in %.1f ms", frame.width(), frame.height(),
+                         (time.perf_counter() - started) * 1000)
+        self.update_inset()
+
+    def inset_image(self, width, height):
+        """Magnified capture of the current region at width x height device pixels."""
+        key = (self.region_x, self.region_y, self.region_width, self.region_height, width, height)
+        cached_key, image = self.inset_cache
+        if cached_key == key:
+            return image
+        full = self.frame.levels[0]
+        scale = full.width() / self.monitor.width
+        image = self.frame.crop(self.region_x * scale, self.region_y * scale,
+                                self.region_width * scale, self.region_height * scale, width, height)
+        self.inset_cache = (key, image)
+        return image
+
+    def draw_inset(self, painter, rect):
+        """Draw the zoom inset with a crosshair at the cursor (the region's center)."""
+        dpr = self.devicePixelRatioF()
+        painter.drawImage(rect, self.inset_image(round(rect.width() * dpr), round(rect.height() * dpr)))
+        painter.setBrush(Qt.NoBrush)
+        painter.setPen(QPen(QColor(67, 122, 255), 2))
+        painter.drawRect(rect)
+        center = rect.center()
+        if self.snap_target is not None:
+            center = QtCore.QPoint(
+                rect.x() + round((self.snap_target[0] - self.region_x) * rect.width() / self.region_width),
+                rect.y() + round((self.snap_target[1] - self.region_y) * rect.height() / self.region_height),
             )
+        painter.setPen(QPen(QColor(255, 59, 48), 1))
+        painter.drawLine(center.x() - 8, center.y(), center.x() + 8, center.y())
+        painter.drawLine(center.x(), center.y() - 8, center.x(), center.y() + 8)
 
-            # Find windows at this point (skip our own process)
-            for window in window_list:
-                # Skip our own Python process windows
-                owner_pid = window.get('kCGWindowOwnerPID')
-                if owner_pid == our_pid:
-                    continue
-
-                bounds = window.get('kCGWindowBounds', {})
-                win_x = bounds.get('X', 0)
-                win_y = bounds.get('Y', 0)
-                win_width = bounds.get('Width', 0)
-                win_height = bounds.get('Height', 0)
-
-                # Check if point is within window bounds
-                if (win_x <= x <= win_x + win_width and
-                    win_y <= y <= win_y + win_height):
-
-                    # Get the owner PID
-                    if owner_pid:
-                        # Get the running application
-                        app = NSRunningApplication.runningApplicationWithProcessIdentifier_(owner_pid)
-                        if app:
-                            app_name = window.get('kCGWindowOwnerName', 'Unknown')
-                            print(f"[DEBUG] Found app at point: {app_name} (PID: {owner_pid})")
-
-                            # Activate the application
-                            app.activateWithOptions_(0)  # 0 = NSApplicationActivateIgnoringOtherApps
-                            print(f"[DEBUG] Activated {app_name}")
-                            return True
-
-            print(f"[DEBUG] No window found at ({x}, {y})")
-            return False
-
-        except Exception as e:
-            import traceback
-            print(f"[DEBUG] Failed to find/activate app: {e}")
-            traceback.print_exc()
-            return False
-
-    def confirm_selection(self):
-        """Confirm selection, close overlay, and click."""
-        click_x, click_y = int(self.mouse.position[0]), int(self.mouse.position[1])
-        print(f"[DEBUG] Confirming - will click at ({click_x}, {click_y})")
-
-        # Find and activate the application at the click point BEFORE closing overlay
-        activated = self.find_and_activate_app_at_point(click_x, click_y)
-        print(f"[DEBUG] App activation result: {activated}")
+    def move_mouse_to_region_center(self):
+        """Move mouse to center of current region (or to the snap target in it)."""
+        self.snap_target = self.find_snap_target() if self.snap is not None else None
+        if self.snap_target is not None:
+            center_x = self.monitor.x + self.snap_target[0]
+            center_y = self.monitor.y + self.snap_target[1]
+        else:
+            center_x = self.monitor.x + self.region_x + (self.region_width / 2)
+            center_y = self.monitor.y + self.region_y + (self.region_height / 2)
+        self.mouse.position = (int(center_x), int(center_y))
+        latency_tracer.mark('mouse_move')
+
+    def find_snap_target(self):
+        """Local position of the strongest feature in the current region, from this activation's capture."""
+        if (self.frame is None or not self.region_active or
+                max(self.region_width, self.region_height) > self.snap.MAX_REGION):
+            return None
+        started = time.perf_counter()
+        scale = self.frame.levels[0].width() / self.monitor.width
+        width, height = self.snap.analysis_size(self.region_width * scale, self.region_height * scale)
+        image = self.frame.crop(self.region_x * scale, self.region_y * scale,
+                                self.region_width * scale, self.region_height * scale, width, height,
+                                built_only=True)
+        point = self.snap.find(self.snap.gray_array(image), started)
+        latency_tracer.mark('snap')
+        if point is None:
+            return None
+        return (self.region_x + (point[0] + 0.5) * self.region_width / width,
+                self.region_y + (point[1] + 0.5) * self.region_height / height)
 
-        # Stop the raise timer and close window
-        self.raise_timer.stop()
-        self.close()
+    def find_and_activate_app_at_point(self, x, y):
+        """Find the application at the given point and activate it.
 
-        # Process events to ensure window is gone
-        QApplication.processEvents()
+        Returns the activated NSRunningApplication, or None.
+        """
+        try:
+            hit = self.window_snapshots.app_at_point(x, y)
+            if hit is None:
+                log_hit.debug("No window found at (%s, %s)", x, y)
+                return None
+
+            app, window = hit
+            log_hit.debug("Found app at point: %s (PID: %s)", window.owner_name, window.owner_pid)
+
+            # Activate the application
+            app.activateWithOptions_(0)  # 0 = NSApplicationActivateIgnoringOtherApps
+            log_hit.debug("Activated %s", window.owner_name)
+            return app
+
+        except Exception:
+            log_hit.exception("Failed to find/activate app")
+            return None
+
+    def adjust_click(self, button_step, count_step):
+        """Cycle the click button and change the click count (1 to MAX_CLICK_COUNT)."""
+        index = MOUSE_BUTTONS.index(self.click_button)
+        self.click_button = MOUSE_BUTTONS[(index + button_step) % len(MOUSE_BUTTONS)]
+        self.click_count = min(max(self.click_count + count_step, 1), MAX_CLICK_COUNT)
+        self.update(self.click_mode_rect())
+
+    def mark_drag(self):
+        """Mark the cursor position as the start of a drag (again to move the mark)."""
+        old = self.drag_marker_rect()
+        self.drag_start = tuple(int(v) for v in self.mouse.position)
+        self.update(old)
+        self.update(self.drag_marker_rect())
+        self.update(self.click_mode_rect())
+        log_input.debug("Drag start at %s", self.drag_start)
+
+    def confirm_selection(self, modifiers=0):
+        """Confirm selection, hide overlay, and click once the target is ready.
+
+        With a drag start marked, drags from it to the cursor instead.
 
-        # Small delay to ensure window is fully closed and app is focused
-        time.sleep(0.1)
+        Args:
+            modifiers: MOD_* flags held down during the click
+        """
+        click_x, click_y = int(self.mouse.position[0]), int(self.mouse.position[1])
+        drag_from = self.drag_start
+        log_input.debug("Confirming - will %s at (%s, %s)", "drag" if drag_from else "click", click_x, click_y)
+
+        # Find and activate the application at the click (or drag start) point BEFORE hiding overlay
+        started_at = time.perf_counter()
+        app = self.find_and_activate_app_at_point(*(drag_from or (click_x, click_y)))
+        log_hit.debug("App activation result: %s", app is not None)
+        activated_at = time.perf_counter()
+
+        if self.journal is not None:
+            self.journal.record(JOURNAL_CONFIRM, len(self.history), MOUSE_BUTTONS.index(self.click_button),
+                                self.click_count, click_x, click_y, running_app_id(app), modifiers,
+                                JOURNAL_DRAG if drag_from else 0)
+
+        # Hide the overlay; only clicks train the likely-target model (once posted)
+        self.deactivate()
+        self.confirmed_click = (click_x, click_y) if drag_from is None else None
+
+        # Click without blocking: the pipeline waits for readiness on the event loop
+        self.click_pipeline.start(
+            self, click_x, click_y, app,
+            stages={
+                'activate_ms': (activated_at - started_at) * 1000,
+                'hide_ms': (time.perf_counter() - activated_at) * 1000,
+            },
+            started_at=started_at,
+            click=(self.click_button, self.click_count, modifiers),
+            drag_from=drag_from
+        )
 
-        # Use pyautogui to click
-        try:
-            pyautogui.click(click_x, click_y)
-            print(f"[DEBUG] Clicked at ({click_x}, {click_y}) using pyautogui")
-        except Exception as e:
-            print(f"[DEBUG] pyautogui click failed: {e}")
+    def is_on_screen(self):
+        """Whether the overlay is still shown, as the window server sees it once the native window is known."""
+        if self.native_window is None:
+            return self.isVisible()
+        return self.window_platform.is_on_screen(self.native_window)
 
-        # Destroy this window instance completely
-        self.deleteLater()
+    def on_click_posted(self, stages):
+        """Report the confirmed click after the pipeline posted it, so its bookkeeping never delays it."""
+        if self.confirmed_click is not None:
+            x, y = self.confirmed_click
+            self.confirmed_click = None
+            self.confirmed.emit(x, y)
 
     def cancel_selection(self):
         """Cancel selection and restore mouse position."""
         if self.original_mouse_pos:
             self.mouse.position = self.original_mouse_pos
+        if self.journal is not None:
+            self.journal.record(JOURNAL_CANCEL, len(self.history))
 
-        # Stop timer and close
-        self.raise_timer.stop()
-        self.close()
+        # Hide the overlay
+        self.deactivate()
 
-        print("[DEBUG] Cancelled - mouse restored")
+        log_input.debug("Cancelled - mouse restored")
 
-        # Destroy this window instance completely
-        self.deleteLater()
+    def draw_region(self, painter, origin_x=0, origin_y=0):
+        """Draw the highlight and grid of the current region.
 
-    def paintEvent(self, event):
-        """Draw the 3x3 grid on current region."""
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
+        Coordinates are shifted by (-origin_x, -origin_y) so the same code
+        draws into the window or into a cached layer.
+        """
+        rx, ry = self.region_x, self.region_y
+        rw, rh = self.region_width, self.region_height
 
         # Draw highlighted region if active
         if self.region_active:
             painter.fillRect(
-                int(self.region_x), int(self.region_y),
-                int(self.region_width), int(self.region_height),
+                int(rx) - origin_x, int(ry) - origin_y,
+                int(rw), int(rh),
                 QColor(67, 122, 255, 100)  # #437AFF with alpha 100
             )
 
         # Draw grid lines on current region
         pen = QPen(QColor(89, 90, 94, 179))  # #595A5E with 70% opacity
-        pen.setWidth(2)
+        pen.setWidth(self.GRID_PEN_WIDTH)
         painter.setPen(pen)
 
+        xs, ys = self.region_edges()
+
+        # Vertical lines (cols + 1 lines)
+        for edge in xs:
+            x = int(edge) - origin_x
+            painter.drawLine(x, int(ry) - origin_y, x, int(ry + rh) - origin_y)
+
+        # Horizontal lines (rows + 1 lines)
+        for edge in ys:
+            y = int(edge) - origin_y
+            painter.drawLine(int(rx) - origin_x, y, int(rx + rw) - origin_x, y)
+
+    def hint_text(self, label):
+        """Laid-out QStaticText for a label, reused across activations."""
+        text = self.hint_texts.get(label)
+        if text is None:
+            text = QtGui.QStaticText(label.upper())
+            text.setTextFormat(Qt.PlainText)
+            text.prepare(QtGui.QTransform(), self.hint_font)
+            self.hint_texts[label] = text
+        return text
+
+    def draw_hints(self, painter):
+        """Draw the labels still matching the typed prefix at their targets' top-left corners."""
+        painter.setFont(self.hint_font)
+        painter.setPen(QColor(30, 30, 30))
+        background = QColor(255, 214, 10, 230)
+        typed = self.hint_typed
+        for label, (x, y, width, height) in self.hints.items():
+            if typed and not label.startswith(typed):
+                continue
+            text = self.hint_text(label)
+            size = text.size()
+            painter.fillRect(int(x) + 4, int(y) + 4, int(size.width()) + 8, int(size.height()) + 4, background)
+            painter.drawStaticText(int(x) + 8, int(y) + 6, text)
+
+    def draw_likely_targets(self, painter):
+        """Draw the recall keys of the likely targets inside the current region.
+
+        Targets without a recall key at this depth (cell keys took them) get no label.
+        """
+        painter.setFont(self.hint_font)
+        painter.setPen(QColor(255, 255, 255))
+        background = QColor(67, 122, 255, 220)
         rx, ry = self.region_x, self.region_y
         rw, rh = self.region_width, self.region_height
+        for char, (x, y) in zip(self.bindings.recall_keys_at(len(self.history)), self.likely_targets):
+            if not (rx <= x < rx + rw and ry <= y < ry + rh):
+                continue
+            text = self.hint_text(char)
+            size = text.size()
+            left, top = int(x - size.width() / 2) - 4, int(y - size.height() / 2) - 2
+            painter.fillRect(left, top, int(size.width()) + 8, int(size.height()) + 4, background)
+            painter.drawStaticText(left + 4, top + 2, text)
+
+    def click_mode_rect(self):
+        """Where the click mode label is drawn: bottom center of the monitor."""
+        return QtCore.QRect(self.monitor.width // 2 - 80, self.monitor.height - 64, 160, 32)
+
+    def click_mode_label(self):
+        """What confirm will do, or None for a plain left click."""
+        if self.drag_start is not None:
+            return f"drag {self.click_button}"
+        if self.click_button == MOUSE_BUTTONS[0] and self.click_count == 1:
+            return None
+        if self.click_count > 1:
+            return f"{self.click_button} x{self.click_count}"
+        return self.click_button
+
+    def drag_marker_rect(self):
+        """Local rect of the drag start marker (empty if none is marked)."""
+        if self.drag_start is None:
+            return QtCore.QRect()
+        x, y = self.drag_start
+        return QtCore.QRect(x - self.monitor.x - 8, y - self.monitor.y - 8, 17, 17)
+
+    def draw_click_mode(self, painter, label):
+        """Label what confirm will do at the bottom of the monitor."""
+        text = self.hint_text(label)
+        size = text.size()
+        rect = self.click_mode_rect()
+        left = rect.center().x() - int(size.width() / 2) - 6
+        top = rect.center().y() - int(size.height() / 2) - 3
+        painter.setFont(self.hint_font)
+        painter.setPen(QColor(255, 255, 255))
+        painter.fillRect(left, top, int(size.width()) + 12, int(size.height()) + 6, QColor(30, 30, 30, 220))
+        painter.drawStaticText(left + 6, top + 3, text)
+
+    def region_layer(self, rect):
+        """Cached pixmap of the current region's highlight and grid, or None.
+
+        Layers are keyed by region, cell edges and device pixel ratio and kept in a
+        small LRU bounded by LAYER_CACHE_PIXELS device pixels. Layers too
+        large to cache (the top levels) return None and are drawn directly.
+        """
+        dpr = self.devicePixelRatioF()
+        if rect.width() * rect.height() * dpr * dpr > self.LAYER_CACHE_PIXELS // 4:
+            return None
+
+        xs, ys = self.region_edges()
+        key = (int(self.region_x), int(self.region_y),
+               int(self.region_width), int(self.region_height),
+               self.region_active, tuple(map(int, xs)), tuple(map(int, ys)), dpr)
+        layer = self.layer_cache.get(key)
+        if layer is not None:
+            self.layer_cache.move_to_end(key)
+            return layer
+
+        layer = QtGui.QPixmap(int(rect.width() * dpr), int(rect.height() * dpr))
+        layer.setDevicePixelRatio(dpr)
+        layer.fill(Qt.transparent)
+        painter = QPainter(layer)
+        painter.setRenderHint(QPainter.Antialiasing)
+        self.draw_region(painter, rect.x(), rect.y())
+        painter.end()
 
-        # Vertical lines (4 lines = 3 columns)
-        for i in range(4):
-            x = int(rx + (i * rw / 3))
-            painter.drawLine(x, int(ry), x, int(ry + rh))
-
-        # Horizontal lines (4 lines = 3 rows)
-        for i in range(4):
-            y = int(ry + (i * rh / 3))
-            painter.drawLine(int(rx), y, int(rx + rw), y)
-
-
-class HotkeyButton(NSButton):
-    """Custom button for hotkey recording."""
-
-    def initWithFrame_callback_(self, frame, callback):
-        self = objc.super(HotkeyButton, self).initWithFrame_(frame)
-        if self:
-            self.callback = callback
-            self.setButtonType_(0)  # Momentary push button
-            self.setBordered_(True)
-            self.setBezelStyle_(1)  # Rounded
-            self.setTarget_(self)
-            self.setAction_('buttonClicked:')
-        return self
-
-    @objc.python_method
-    def buttonClicked_(self, sender):
-        if self.callback:
-            self.callback(self)
-
-
-class SettingsView(NSView):
-    """Custom view that swallows key events to prevent beeps."""
-
-    def acceptsFirstResponder(self):
-        return True
-
-    def keyDown_(self, event):
-        # Swallow all key events to prevent beep
-        pass
-
-    def keyUp_(self, event):
-        # Swallow all key events
-        pass
-
+        self.layer_cache[key] = layer
+        self.layer_cache_pixels += layer.width() * layer.height()
+        while self.layer_cache_pixels > self.LAYER_CACHE_PIXELS:
+            _, evicted = self.layer_cache.popitem(last=False)
+            self.layer_cache_pixels -= evicted.width() * evicted.height()
+        return layer
 
-class SettingsViewController(NSViewController):
-    """View controller for the settings popover."""
+    def paintEvent(self, event):
+        """Draw the grid on current region, only within the dirty rect."""
+        painter = QPainter(self)
 
-    def init(self):
-        self = objc.super(SettingsViewController, self).init()
-        if self:
-            self.manager = None
-            self.recording_button = None
-            self.button_positions = {}  # Maps button object to (row, col)
-            self.recording_modifiers = set()  # Track modifiers when recording activation hotkey
-        return self
+        rect = self.region_rect()
+        if event.rect().intersects(rect):
+            layer = self.region_layer(rect)
+            if layer is not None:
+                painter.drawPixmap(rect.topLeft(), layer)
+            else:
+                painter.setRenderHint(QPainter.Antialiasing)
+                self.draw_region(painter)
+
+        inset = self.inset_rect()
+        if not inset.isEmpty() and event.rect().intersects(inset):
+            self.draw_inset(painter, inset)
+        self.inset_drawn = inset
+
+        if self.hint_mode:
+            self.draw_hints(painter)
+        elif self.likely_targets:
+            self.draw_likely_targets(painter)
+        if self.drag_start is not None:
+            painter.setRenderHint(QPainter.Antialiasing)
+            painter.setPen(QPen(QColor(255, 255, 255), 2))
+            painter.setBrush(QColor(255, 59, 48, 220))
+            painter.drawEllipse(self.drag_marker_rect().adjusted(2, 2, -2, -2))
+        label = self.click_mode_label()
+        if label is not None:
+            self.draw_click_mode(painter, label)
+
+        painter.end()
+        latency_tracer.mark('paint')
+
+        # First paint after activation: record hotkey-to-visible latency
+        if self.activation_requested_at is not None:
+            self.last_activation_latency = time.perf_counter() - self.activation_requested_at
+            self.activation_requested_at = None
+            latency_tracer.record('activation', self.last_activation_latency)
+            log.debug("Activation latency: %.1f ms", self.last_activation_latency * 1000)
+
+            # Snapshot the window list and capture the screen once the grid is
+            # visible, off the keystroke and confirm paths
+            QtCore.QTimer.singleShot(0, self.window_snapshots.refresh)
+            QtCore.QTimer.singleShot(0, self.capture_frame)
+
+
+_settings_controller_class = None
+
+
+def settings_controller_class():
+    """Define the settings popover's Cocoa classes on first use.
+
+    Keeps their imports and Objective-C class registration out of startup.
+    PyObjC classes can only be registered once, so the result is cached.
+    """
+    global _settings_controller_class
+    if _settings_controller_class is not None:
+        return _settings_controller_class
+
+    from AppKit import NSViewController, NSView, NSButton, NSFont, NSMakeRect
+
+    class HotkeyButton(NSButton):
+        """Custom button for hotkey recording."""
+
+        def initWithFrame_callback_(self, frame, callback):
+            self = objc.super(HotkeyButton, self).initWithFrame_(frame)
+            if self:
+                self.callback = callback
+                self.setButtonType_(0)  # Momentary push button
+                self.setBordered_(True)
+                self.setBezelStyle_(1)  # Rounded
+                self.setTarget_(self)
+                self.setAction_('buttonClicked:')
+            return self
+
+        @objc.python_method
+        def buttonClicked_(self, sender):
+            if self.callback:
+                self.callback(self)
+
+
+    class SettingsView(NSView):
+        """Custom view that swallows key events to prevent beeps."""
+
+        def acceptsFirstResponder(self):
+            return True
+
+        def keyDown_(self, event):
+            # Swallow all key events to prevent beep
+            pass
+
+        def keyUp_(self, event):
+            # Swallow all key events
+            pass
+
+
+    class SettingsViewController(NSViewController):
+        """View controller for the settings popover."""
+
+        def init(self):
+            self = objc.super(SettingsViewController, self).init()
+            if self:
+                self.manager = None
+                self.recording_button = None
+                self.button_positions = {}  # Maps button object to (row, col)
+                self.recording_modifiers = set()  # Track modifiers when recording activation hotkey
+            return self
+
+        def loadView(self):
+            """Create the settings view."""
+            # Create main view - smaller, more compact, using custom view to prevent beeps
+            view = SettingsView.alloc().initWithFrame_(NSMakeRect(0, 0, 300, 390))
+
+            # 3x3 Grid of hotkey buttons - packed tightly
+            self.grid_buttons = {}
+            button_size = 100
+            spacing = 0  # No spacing - buttons touch
+            start_x = 0
+            start_y = 90
+
+            positions = [
+                ('q', 0, 0), ('w', 0, 1), ('e', 0, 2),
+                ('a', 1, 0), ('s', 1, 1), ('d', 1, 2),
+                ('z', 2, 0), ('x', 2, 1), ('c', 2, 2),
+            ]
+
+            for key, row, col in positions:
+                x = start_x + col * button_size
+                y = start_y + (2 - row) * button_size  # Flip y-axis
+
+                button = NSButton.alloc().initWithFrame_(NSMakeRect(x, y, button_size, button_size))
+                button.setTitle_(key.upper())
+                button.setButtonType_(0)
+                button.setBordered_(True)
+                button.setBezelStyle_(4)  # Recessed bezel - square buttons that fill space
+                button.setFont_(NSFont.systemFontOfSize_(24))  # Larger font
+                button.setTarget_(self)
+                button.setAction_('gridButtonClicked:')
+                button.setIdentifier_(f"{row},{col}")  # Store position as identifier
+                view.addSubview_(button)
+                self.grid_buttons[(row, col)] = button
+                self.button_positions[button] = (row, col)
+
+            # Activation hotkey button (full width at top)
+            self.activation_button = NSButton.alloc().initWithFrame_(NSMakeRect(0, 45, 150, 40))
+            self.activation_button.setTitle_("Ctrl + Option")
+            self.activation_button.setButtonType_(0)
+            self.activation_button.setBordered_(True)
+            self.activation_button.setBezelStyle_(4)
+            self.activation_button.setTarget_(self)
+            self.activation_button.setAction_('activationButtonClicked:')
+            view.addSubview_(self.activation_button)
+
+            # Selection/Confirm key button
+            self.selection_button = NSButton.alloc().initWithFrame_(NSMakeRect(150, 45, 150, 40))
+            self.selection_button.setTitle_("Enter")
+            self.selection_button.setButtonType_(0)
+            self.selection_button.setBordered_(True)
+            self.selection_button.setBezelStyle_(4)
+            self.selection_button.setTarget_(self)
+            self.selection_button.setAction_('selectionButtonClicked:')
+            view.addSubview_(self.selection_button)
+
+            # Quit button at bottom
+            quit_button = NSButton.alloc().initWithFrame_(NSMakeRect(100, 10, 100, 30))
+            quit_button.setTitle_("Quit")
+            quit_button.setButtonType_(0)
+            quit_button.setBordered_(True)
+            quit_button.setBezelStyle_(4)
+            quit_button.setTarget_(self)
+            quit_button.setAction_('quitClicked:')
+            view.addSubview_(quit_button)
+
+            self.setView_(view)
+
+        def quitClicked_(self, sender):
+            """Handle quit button click."""
+            # Finalize any recording in progress
+            if self.recording_button == self.activation_button:
+                self.finalizeActivationHotkey()
+            elif self.recording_button:
+                self.stopRecording()
 
-    def loadView(self):
-        """Create the settings view."""
-        # Create main view - smaller, more compact, using custom view to prevent beeps
-        view = SettingsView.alloc().initWithFrame_(NSMakeRect(0, 0, 300, 390))
-
-        # 3x3 Grid of hotkey buttons - packed tightly
-        self.grid_buttons = {}
-        button_size = 100
-        spacing = 0  # No spacing - buttons touch
-        start_x = 0
-        start_y = 90
-
-        positions = [
-            ('q', 0, 0), ('w', 0, 1), ('e', 0, 2),
-            ('a', 1, 0), ('s', 1, 1), ('d', 1, 2),
-            ('z', 2, 0), ('x', 2, 1), ('c', 2, 2),
-        ]
+            if self.manager:
+                self.manager.quit_app()
+            else:
+                QApplication.quit()
 
-        for key, row, col in positions:
-            x = start_x + col * button_size
-            y = start_y + (2 - row) * button_size  # Flip y-axis
-
-            button = NSButton.alloc().initWithFrame_(NSMakeRect(x, y, button_size, button_size))
-            button.setTitle_(key.upper())
-            button.setButtonType_(0)
-            button.setBordered_(True)
-            button.setBezelStyle_(4)  # Recessed bezel - square buttons that fill space
-            button.setFont_(NSFont.systemFontOfSize_(24))  # Larger font
-            button.setTarget_(self)
-            button.setAction_('gridButtonClicked:')
-            button.setIdentifier_(f"{row},{col}")  # Store position as identifier
-            view.addSubview_(button)
-            self.grid_buttons[(row, col)] = button
-            self.button_positions[button] = (row, col)
-
-        # Activation hotkey button (full width at top)
-        self.activation_button = NSButton.alloc().initWithFrame_(NSMakeRect(0, 45, 150, 40))
-        self.activation_button.setTitle_("Ctrl + Option")
-        self.activation_button.setButtonType_(0)
-        self.activation_button.setBordered_(True)
-        self.activation_button.setBezelStyle_(4)
-        self.activation_button.setTarget_(self)
-        self.activation_button.setAction_('activationButtonClicked:')
-        view.addSubview_(self.activation_button)
-
-        # Selection/Confirm key button
-        self.selection_button = NSButton.alloc().initWithFrame_(NSMakeRect(150, 45, 150, 40))
-        self.selection_button.setTitle_("Enter")
-        self.selection_button.setButtonType_(0)
-        self.selection_button.setBordered_(True)
-        self.selection_button.setBezelStyle_(4)
-        self.selection_button.setTarget_(self)
-        self.selection_button.setAction_('selectionButtonClicked:')
-        view.addSubview_(self.selection_button)
-
-        # Quit button at bottom
-        quit_button = NSButton.alloc().initWithFrame_(NSMakeRect(100, 10, 100, 30))
-        quit_button.setTitle_("Quit")
-        quit_button.setButtonType_(0)
-        quit_button.setBordered_(True)
-        quit_button.setBezelStyle_(4)
-        quit_button.setTarget_(self)
-        quit_button.setAction_('quitClicked:')
-        view.addSubview_(quit_button)
-
-        self.setView_(view)
-
-    def quitClicked_(self, sender):
-        """Handle quit button click."""
-        # Finalize any recording in progress
-        if self.recording_button == self.activation_button:
-            self.finalizeActivationHotkey()
-        elif self.recording_button:
-            self.stopRecording()
-
-        if self.manager:
-            self.manager.quit_app()
-        else:
-            QApplication.quit()
+        def gridButtonClicked_(self, sender):
+            """Handle grid button click to record new hotkey."""
+            # Prevent re-clicking while already recording
+            if self.recording_button == sender:
+                return
 
-    def gridButtonClicked_(self, sender):
-        """Handle grid button click to record new hotkey."""
-        # Prevent re-clicking while already recording
-        if self.recording_button == sender:
-            return
+            # If recording activation hotkey, finalize it first
+            if self.recording_button == self.activation_button:
+                self.finalizeActivationHotkey()
 
-        # If recording activation hotkey, finalize it first
-        if self.recording_button == self.activation_button:
-            self.finalizeActivationHotkey()
+            if self.recording_button:
+                # Stop recording previous button
+                self.stopRecording()
 
-        if self.recording_button:
-            # Stop recording previous button
-            self.stopRecording()
+            # Start recording this button
+            self.recording_button = sender
+            old_title = sender.title()
+            sender.setTitle_("...")
+            sender.setEnabled_(False)
 
-        # Start recording this button
-        self.recording_button = sender
-        old_title = sender.title()
-        sender.setTitle_("...")
-        sender.setEnabled_(False)
+            row, col = self.button_positions.get(sender, (None, None))
+            log_settings.debug("Recording hotkey for position (%s, %s)", row, col)
 
-        row, col = self.button_positions.get(sender, (None, None))
-        print(f"[DEBUG] Recording hotkey for position ({row}, {col})")
+        def activationButtonClicked_(self, sender):
+            """Handle activation button click to record new hotkey."""
+            # If already recording this button, finalize it
+            if self.recording_button == sender:
+                self.finalizeActivationHotkey()
+                return
 
-    def activationButtonClicked_(self, sender):
-        """Handle activation button click to record new hotkey."""
-        # If already recording this button, finalize it
-        if self.recording_button == sender:
-            self.finalizeActivationHotkey()
-            return
+            # If recording a different button, stop that first
+            if self.recording_button:
+                self.stopRecording()
 
-        # If recording a different button, stop that first
-        if self.recording_button:
-            self.stopRecording()
+            self.recording_button = sender
+            self.recording_modifiers.clear()
+            sender.setTitle_("Recording...")
+            # Keep button enabled so user can click again to finalize
 
-        self.recording_button = sender
-        self.recording_modifiers.clear()
-        sender.setTitle_("Recording...")
-        # Keep button enabled so user can click again to finalize
+            log_settings.debug("Recording activation hotkey - press modifiers then click again to save")
 
-        print("[DEBUG] Recording activation hotkey - press modifiers then click again to save")
+        def selectionButtonClicked_(self, sender):
+            """Handle selection button click to record new hotkey."""
+            # Prevent re-clicking while already recording
+            if self.recording_button == sender:
+                return
 
-    def selectionButtonClicked_(self, sender):
-        """Handle selection button click to record new hotkey."""
-        # Prevent re-clicking while already recording
-        if self.recording_button == sender:
-            return
+            # If recording activation hotkey, finalize it first
+            if self.recording_button == self.activation_button:
+                self.finalizeActivationHotkey()
 
-        # If recording activation hotkey, finalize it first
-        if self.recording_button == self.activation_button:
-            self.finalizeActivationHotkey()
+            if self.recording_button:
+                log_settings.debug("Already recording, ignoring click")
+                return
 
-        if self.recording_button:
-            print("[DEBUG] Already recording, ignoring click")
-            return
+            self.recording_button = sender
+            sender.setTitle_("Press key...")
+            sender.setEnabled_(False)
 
-        self.recording_button = sender
-        sender.setTitle_("Press key...")
-        sender.setEnabled_(False)
+            log_settings.debug("Recording selection hotkey")
 
-        print("[DEBUG] Recording selection hotkey")
+        @objc.python_method
+        def finalizeActivationHotkey(self):
+            """Finalize the activation hotkey recording with current modifiers."""
+            log_settings.debug("Finalizing activation hotkey with modifiers: %s", self.recording_modifiers)
 
-    @objc.python_method
-    def finalizeActivationHotkey(self):
-        """Finalize the activation hotkey recording with current modifiers."""
-        print(f"[DEBUG] Finalizing activation hotkey with modifiers: {self.recording_modifiers}")
-
-        if self.manager:
-            if self.recording_modifiers:
-                # Save the modifier combo
-                self.manager.activation_modifiers = self.recording_modifiers.copy()
-                self.manager.activation_key = None  # Just modifiers, no key
-
-                # Build display string
-                mod_names = [self.get_modifier_name(m) for m in sorted(self.recording_modifiers, key=str)]
-                full_combo = " + ".join(mod_names)
-                self.recording_button.setTitle_(full_combo)
-                print(f"[DEBUG] Set activation to: {full_combo}")
-            else:
-                # No modifiers recorded, revert to default
-                self.recording_button.setTitle_("Ctrl + Option")
-                print(f"[DEBUG] No modifiers recorded, keeping default")
+            if self.manager:
+                if self.recording_modifiers:
+                    # Save the modifier combo
+                    self.manager.activation_modifiers = self.recording_modifiers.copy()
+                    self.manager.activation_key = None  # Just modifiers, no key
+                    self.manager.save_config()
 
-        self.recording_modifiers.clear()
-        self.recording_button = None
+                    # Build display string
+                    mod_names = [self.get_modifier_name(m) for m in sorted(self.recording_modifiers, key=str)]
+                    full_combo = " + ".join(mod_names)
+                    self.recording_button.setTitle_(full_combo)
+                    log_settings.info("Set activation to: %s", full_combo)
+                else:
+                    # No modifiers recorded, revert to default
+                    self.recording_button.setTitle_("Ctrl + Option")
+                    log_settings.debug("No modifiers recorded, keeping default")
 
-    @objc.python_method
-    def stopRecording(self):
-        """Stop recording hotkey."""
-        if self.recording_button:
-            self.recording_button.setEnabled_(True)
+            self.recording_modifiers.clear()
             self.recording_button = None
-        self.recording_modifiers.clear()
-        print(f"[DEBUG] Stopped recording")
 
-    @objc.python_method
-    def get_modifier_name(self, key):
-        """Get display name for a modifier key."""
-        if key == keyboard.Key.ctrl or key == keyboard.Key.ctrl_l or key == keyboard.Key.ctrl_r:
-            return "Ctrl"
-        elif key == keyboard.Key.alt or key == keyboard.Key.alt_l or key == keyboard.Key.alt_r:
-            return "Option"
-        elif key == keyboard.Key.shift or key == keyboard.Key.shift_l or key == keyboard.Key.shift_r:
-            return "Shift"
-        elif key == keyboard.Key.cmd or key == keyboard.Key.cmd_l or key == keyboard.Key.cmd_r:
-            return "Cmd"
-        return str(key)
-
-    @objc.python_method
-    def recordKey(self, key_obj, display_name, is_modifier=False):
-        """Record a key for the currently recording button.
-
-        Args:
-            key_obj: The pynput key object (Key enum or KeyCode)
-            display_name: Human-readable name to display
-            is_modifier: Whether this is a modifier key
-        """
-        if not self.recording_button:
-            return
+        @objc.python_method
+        def stopRecording(self):
+            """Stop recording hotkey."""
+            if self.recording_button:
+                self.recording_button.setEnabled_(True)
+                self.recording_button = None
+            self.recording_modifiers.clear()
+            log_settings.debug("Stopped recording")
+
+        @objc.python_method
+        def refreshTitles(self):
+            """Show the manager's current bindings (they may come from the config file)."""
+            if self.manager is None or self.recording_button is not None:
+                return
+            display = self.manager.get_key_display_name
+            for cell, button in self.grid_buttons.items():
+                key = self.manager.bindings.cell_keys.get(cell)
+                button.setTitle_(display(key) if key is not None else "")
+            names = [self.get_modifier_name(m) for m in sorted(self.manager.activation_modifiers, key=str)]
+            if self.manager.activation_key is not None:
+                names.append(display(self.manager.activation_key))
+            self.activation_button.setTitle_(" + ".join(names))
+            self.selection_button.setTitle_(display(self.manager.selection_key))
+
+        @objc.python_method
+        def get_modifier_name(self, key):
+            """Get display name for a modifier key."""
+            if key == keyboard.Key.ctrl or key == keyboard.Key.ctrl_l or key == keyboard.Key.ctrl_r:
+                return "Ctrl"
+            elif key == keyboard.Key.alt or key == keyboard.Key.alt_l or key == keyboard.Key.alt_r:
+                return "Option"
+            elif key == keyboard.Key.shift or key == keyboard.Key.shift_l or key == keyboard.Key.shift_r:
+                return "Shift"
+            elif key == keyboard.Key.cmd or key == keyboard.Key.cmd_l or key == keyboard.Key.cmd_r:
+                return "Cmd"
+            return str(key)
+
+        @objc.python_method
+        def recordKey(self, key_obj, display_name, is_modifier=False):
+            """Record a key for the currently recording button.
+
+            Args:
+                key_obj: The pynput key object (Key enum or KeyCode)
+                display_name: Human-readable name to display
+                is_modifier: Whether this is a modifier key
+            """
+            if not self.recording_button:
+                return
 
-        if self.recording_button == self.activation_button:
-            # Track modifiers
-            if is_modifier:
-                # Normalize modifier keys (ctrl_l/ctrl_r -> ctrl)
-                normalized_key = key_obj
-                if key_obj in [keyboard.Key.ctrl_l, keyboard.Key.ctrl_r]:
-                    normalized_key = keyboard.Key.ctrl
-                elif key_obj in [keyboard.Key.alt_l, keyboard.Key.alt_r]:
-                    normalized_key = keyboard.Key.alt
-                elif key_obj in [keyboard.Key.shift_l, keyboard.Key.shift_r]:
-                    normalized_key = keyboard.Key.shift
-                elif key_obj in [keyboard.Key.cmd_l, keyboard.Key.cmd_r]:
-                    normalized_key = keyboard.Key.cmd
-
-                self.recording_modifiers.add(normalized_key)
-
-                # Show current modifiers
-                mod_names = [self.get_modifier_name(m) for m in sorted(self.recording_modifiers, key=str)]
-                if mod_names:
-                    title = " + ".join(mod_names) + " + ..."
-                    self.recording_button.setTitle_(title)
-                else:
-                    self.recording_button.setTitle_("Recording...")
-            else:
-                # Non-modifier key pressed - add to combo
-                # Save the key
-                if self.manager:
-                    self.manager.activation_key = key_obj
+            if self.recording_button == self.activation_button:
+                # Track modifiers
+                if is_modifier:
+                    # Normalize modifier keys (ctrl_l/ctrl_r -> ctrl)
+                    self.recording_modifiers.add(MODIFIER_KEYS[MODIFIER_BITS[key_obj]])
 
-                # Build display string with modifiers + key
-                if self.recording_modifiers:
+                    # Show current modifiers
                     mod_names = [self.get_modifier_name(m) for m in sorted(self.recording_modifiers, key=str)]
-                    full_combo = " + ".join(mod_names + [display_name])
-                    self.recording_button.setTitle_(full_combo)
+                    if mod_names:
+                        title = " + ".join(mod_names) + " + ..."
+                        self.recording_button.setTitle_(title)
+                    else:
+                        self.recording_button.setTitle_("Recording...")
                 else:
-                    # Just the key, no modifiers
-                    self.recording_button.setTitle_(display_name)
-        elif self.recording_button == self.selection_button:
-            # Handle selection/confirm key
-            if self.manager:
-                self.manager.selection_key = key_obj
-                print(f"[DEBUG] Set selection key to: {display_name}")
-            self.recording_button.setTitle_(display_name)
-            self.stopRecording()
-        else:
-            # Handle grid hotkey
-            row, col = self.button_positions.get(self.recording_button, (None, None))
-
-            if row is not None and self.manager:
-                # Remove any existing mapping for this position
-                old_key = None
-                for k, (r, c) in list(self.manager.key_map.items()):
-                    if r == row and c == col:
-                        old_key = k
-                        del self.manager.key_map[k]
-                        break
+                    # Non-modifier key pressed - add to combo
+                    # Save the key
+                    if self.manager:
+                        self.manager.activation_key = key_obj
+                        self.manager.save_config()
+
+                    # Build display string with modifiers + key
+                    if self.recording_modifiers:
+                        mod_names = [self.get_modifier_name(m) for m in sorted(self.recording_modifiers, key=str)]
+                        full_combo = " + ".join(mod_names + [display_name])
+                        self.recording_button.setTitle_(full_combo)
+                    else:
+                        # Just the key, no modifiers
+                        self.recording_button.setTitle_(display_name)
+            elif self.recording_button == self.selection_button:
+                # Handle selection/confirm key
+                if self.manager:
+                    self.manager.selection_key = key_obj
+                    self.manager.save_config()
+                    log_settings.info("Set selection key to: %s", display_name)
+                self.recording_button.setTitle_(display_name)
+                self.stopRecording()
+            else:
+                # Handle grid hotkey
+                row, col = self.button_positions.get(self.recording_button, (None, None))
+
+                if row is not None and self.manager:
+                    # Replace the position's key, leaving the bindings alone if that conflicts
+                    manager = self.manager
+                    config = manager.current_config()
+                    config.key_map = {key: cell for key, cell in manager.key_map.items() if cell != (row, col)}
+                    config.key_map[key_obj] = (row, col)
+                    try:
+                        config.validate()
+                    except ConfigError as e:
+                        log_settings.warning("Not mapping %s to position (%s, %s): %s", display_name, row, col, e)
+                        self.stopRecording()
+                        self.refreshTitles()
+                        return
+                    manager.key_map = config.key_map
+                    manager.save_config()
+                    log_settings.info("Mapped %s to position (%s, %s)", display_name, row, col)
 
-                # Add new mapping
-                self.manager.key_map[key_obj] = (row, col)
-                print(f"[DEBUG] Mapped {display_name} to position ({row}, {col})")
+                self.recording_button.setTitle_(display_name)
+                self.stopRecording()
 
-            self.recording_button.setTitle_(display_name)
-            self.stopRecording()
+    _settings_controller_class = SettingsViewController
+    return SettingsViewController
 
 
 class MenuBarManager(NSObject):
@@ -727,43 +3065,45 @@ class MenuBarManager(NSObject):
     def init(self):
         self = objc.super(MenuBarManager, self).init()
         if self:
-            print("[DEBUG] MenuBarManager.init() called")
+            log_settings.debug("MenuBarManager.init() called")
             self.overlay_manager = None
             self.setupMenuBar()
-            print("[DEBUG] MenuBarManager.init() complete")
+            log_settings.debug("MenuBarManager.init() complete")
         return self
 
     @objc.python_method
     def setupMenuBar(self):
         """Setup the menu bar status item."""
-        print("[DEBUG] setupMenuBar() called")
+        log_settings.debug("setupMenuBar() called")
         # Create status item
         self.status_bar = NSStatusBar.systemStatusBar()
-        print(f"[DEBUG] Got system status bar: {self.status_bar}")
+        log_settings.debug("Got system status bar: %s", self.status_bar)
 
         self.status_item = self.status_bar.statusItemWithLength_(40.0)  # Fixed width to ensure it shows
-        print(f"[DEBUG] Created status item: {self.status_item}")
+        log_settings.debug("Created status item: %s", self.status_item)
 
         # Force it to be visible by setting autosave name (this might reset hidden preference)
         try:
             self.status_item.setAutosaveName_("KeyboardNavigation")
-            print("[DEBUG] Set autosave name")
+            log_settings.debug("Set autosave name")
         except:
-            print("[DEBUG] Could not set autosave name")
+            log_settings.debug("Could not set autosave name")
 
         # Get the button and configure it
         button = self.status_item.button()
         if button:
-            print(f"[DEBUG] Got button: {button}")
+            log_settings.debug("Got button: %s", button)
             button.setTitle_("⌨️ KB")
-            print("[DEBUG] Set button title")
+            log_settings.debug("Set button title")
         else:
             # Fallback to old API
             self.status_item.setTitle_("⌨️ KB")
-            print("[DEBUG] Set status item title (no button)")
+            log_settings.debug("Set status item title (no button)")
 
-        print(f"[DEBUG] Status item is visible: {self.status_item.isVisible() if hasattr(self.status_item, 'isVisible') else 'N/A'}")
-        print(f"[DEBUG] Status item length: {self.status_item.length()}")
+        if log_settings.isEnabledFor(logging.DEBUG):
+            log_settings.debug("Status item is visible: %s",
+                               self.status_item.isVisible() if hasattr(self.status_item, 'isVisible') else 'N/A')
+            log_settings.debug("Status item length: %s", self.status_item.length())
 
         # Create menu
         menu = NSMenu.alloc().init()
@@ -777,6 +3117,23 @@ class MenuBarManager(NSObject):
         config_item.setTarget_(self)
         menu.addItem_(config_item)
 
+        # Latency items
+        report_item = NSMenuItem.alloc().initWithTitle_action_keyEquivalent_(
+            "Latency Report...",
+            "showLatencyReport:",
+            ""
+        )
+        report_item.setTarget_(self)
+        menu.addItem_(report_item)
+
+        export_item = NSMenuItem.alloc().initWithTitle_action_keyEquivalent_(
+            "Export Latency Data",
+            "exportLatency:",
+            ""
+        )
+        export_item.setTarget_(self)
+        menu.addItem_(export_item)
+
         menu.addItem_(NSMenuItem.separatorItem())
 
         # Quit item
@@ -789,18 +3146,28 @@ class MenuBarManager(NSObject):
         menu.addItem_(quit_item)
 
         self.status_item.setMenu_(menu)
-        print("[DEBUG] Menu set on status item")
+        log_settings.debug("Menu set on status item")
+
+        # Settings popover is created when first opened
+        self.popover = None
+        self.settings_controller = None
+        log_settings.debug("setupMenuBar() complete")
 
-        # Create popover for settings
+    @objc.python_method
+    def createSettingsPopover(self):
+        """Create the settings popover and its controller."""
+        from AppKit import NSPopover, NSPopoverBehaviorTransient
         self.popover = NSPopover.alloc().init()
-        self.settings_controller = SettingsViewController.alloc().init()
+        self.settings_controller = settings_controller_class().alloc().init()
         self.popover.setContentViewController_(self.settings_controller)
         self.popover.setBehavior_(NSPopoverBehaviorTransient)
-        print("[DEBUG] setupMenuBar() complete")
 
     def showSettings_(self, sender):
         """Show the settings popover."""
         try:
+            if self.popover is None:
+                self.createSettingsPopover()
+
             if self.popover.isShown():
                 self.popover.close()
             else:
@@ -810,6 +3177,7 @@ class MenuBarManager(NSObject):
 
                 # Ensure view is loaded
                 view = self.settings_controller.view()
+                self.settings_controller.refreshTitles()
 
                 # Show popover relative to status item
                 button = self.status_item.button()
@@ -823,10 +3191,29 @@ class MenuBarManager(NSObject):
                     # Make the view first responder to swallow key events
                     if hasattr(view, 'window') and view.window():
                         view.window().makeFirstResponder_(view)
-        except Exception as e:
-            import traceback
-            print(f"[DEBUG] Exception in showSettings_: {e}")
-            traceback.print_exc()
+        except Exception:
+            log_settings.exception("Exception in showSettings_")
+
+    def showLatencyReport_(self, sender):
+        """Show per-stage latency percentiles in an alert."""
+        from AppKit import NSAlert
+        alert = NSAlert.alloc().init()
+        alert.setMessageText_("Latency since keypress (ms)")
+        report = latency_tracer.report()
+        if self.overlay_manager:
+            report += "\n\n" + self.overlay_manager.event_ring.report()
+        alert.setInformativeText_(report)
+        NSApp.activateIgnoringOtherApps_(True)
+        alert.runModal()
+
+    def exportLatency_(self, sender):
+        """Write latency histograms to a JSON file and reveal it in Finder."""
+        try:
+            path = latency_tracer.export()
+            log.info("Exported latency data to %s", path)
+            NSWorkspace.sharedWorkspace().selectFile_inFileViewerRootedAtPath_(str(path), "")
+        except Exception:
+            log.exception("Failed to export latency data")
 
     def quitApp_(self, sender):
         """Quit the application."""
@@ -838,41 +3225,97 @@ class MenuBarManager(NSObject):
 class OverlayManager(QObject):
     """Manages the lifecycle of overlay windows and global hotkeys."""
 
-    def __init__(self, monitor):
+    def __init__(self, topology, grid_layouts=None, target_source=None,
+                 bookmarks=None, click_model=None, start_at_recent=False, config_store=None,
+                 injector=None, snap=None, adaptive=False, journal=None):
         super().__init__()
-        self.monitor = monitor
-        self.overlay = None
+        self.topology = topology
+        self.bookmarks = bookmarks or BookmarkStore()
+        self.frontmost_app_id = frontmost_app_id
+        self.active_app_id = ''  # Frontmost app when the overlay was shown
+
+        # Confirmed clicks, for likely-target recall; loaded once the event loop runs
+        self.click_model = click_model or ClickFrequencyModel()
+        self.start_at_recent = start_at_recent
+        self.snap = snap  # Shared ContentSnap, or None to keep the cursor at region centers
+        self.adaptive = adaptive  # Size cells by click history (see density_edges)
+        QtCore.QTimer.singleShot(0, self.load_click_model)
+        self.target_source = target_source  # None: each overlay hints on-screen windows
+        self.mouse = injector or InputInjector()  # Shared with every overlay
+        self.journal = journal or EventJournal(DATA_DIR / JOURNAL_FILE)  # Shared with every overlay
+        self.overlay = None  # Currently visible overlay, if any
         self.signals = HotkeySignals()
 
         # Connect signals
         self.signals.create_and_show_overlay.connect(self.create_and_show_overlay)
         self.signals.quit_app.connect(self.quit_app)
+        self.signals.bookmark.connect(self.on_bookmark)
+
+        # Listener callbacks only queue events; they are handled in batches on
+        # the main thread's event loop (queued even when pushed from it)
+        self.event_ring = KeyEventRing(self.signals.key_events.emit)
+        self.signals.key_events.connect(self.drain_key_events, Qt.QueuedConnection)
+
+        # Track modifier state as a bitmask of MOD_* flags
+        self.modifier_mask = 0
+
+        # Physical keys currently held (see bookmark_slot), to ignore auto-repeat
+        # of cell/hint keys, and cell/hint keys waiting to be applied as one burst
+        self.pressed_keys = set()
+        self.repeats_ignored = 0
+        self.dropped_seen = 0
+        self.pending_selects = []
+        self.menu_bar_manager = None
+
+        # Bindings from the config file (defaults: Q/W/E, A/S/D, Z/X/C cells,
+        # Enter to confirm, Ctrl + Option to activate, 3x3 grid)
+        self.config_store = config_store or ConfigStore()
+        started = time.perf_counter()
+        try:
+            config = self.config_store.load()
+        except ConfigError as e:
+            log_settings.warning("Ignoring invalid config %s: %s", self.config_store.path, e)
+            config = HotkeyConfig.defaults()
+        log_settings.debug("Config loaded in %.3f ms", (time.perf_counter() - started) * 1000)
 
-        # Track modifier state
-        self.ctrl_pressed = False
-        self.option_pressed = False
-        self.shift_pressed = False
-        self.cmd_pressed = False
-
-        # Key to cell mapping (row, col) - will store actual key objects
-        # Initialize with default character keys
-        from pynput.keyboard import KeyCode
-        self.key_map = {
-            KeyCode.from_char('q'): (0, 0), KeyCode.from_char('w'): (0, 1), KeyCode.from_char('e'): (0, 2),
-            KeyCode.from_char('a'): (1, 0), KeyCode.from_char('s'): (1, 1), KeyCode.from_char('d'): (1, 2),
-            KeyCode.from_char('z'): (2, 0), KeyCode.from_char('x'): (2, 1), KeyCode.from_char('c'): (2, 2),
-        }
+        # Key to cell mapping (row, col) of the 3x3 layout - stores actual key objects
+        self.key_map = config.key_map
+
+        # Grid (rows, cols) per depth, see DEFAULT_GRID_LAYOUTS; --grid overrides the config
+        self.grid_override = tuple(grid_layouts) if grid_layouts else None
+        self.config_grid_layouts = config.grid_layouts
+        self.grid_layouts = self.grid_override or config.grid_layouts
 
         # Selection/confirm key
-        self.selection_key = keyboard.Key.enter
+        self.selection_key = config.selection_key
+
+        # Activation hotkey combo (activation_key None: just modifiers)
+        self.activation_modifiers = config.activation_modifiers
+        self.activation_key = config.activation_key
+
+        # Event timing of keyboard drags
+        self.mouse.drag_pacing = config.drag_pacing
+
+        # On-screen window index shared by all overlays
+        self.window_snapshots = WindowSnapshotService()
+
+        # Warm overlays: one per monitor (keyed by MonitorInfo.key), reused
+        # across activations and rebuilt only when the topology changes
+        self.overlays = {}
 
-        # Activation hotkey combo
-        self.activation_modifiers = {keyboard.Key.ctrl, keyboard.Key.alt}  # Default: Ctrl + Option
-        self.activation_key = None  # Just modifiers, no key
+        # Compiled lookup tables used by the listener callbacks and overlays
+        self.rebuild_bindings()
+
+        self.sync_overlays()
+        self.topology.changed.connect(self.sync_overlays)
 
         # Start global hotkey listener
         self.start_hotkey_listener()
 
+        # Outside edits to the config apply immediately, without restarting the listener
+        self.config_store.changed.connect(self.reload_config)
+        self.config_store.watch()
+
     @staticmethod
     def get_key_display_name(key):
         """Get a human-readable display name for a key."""
@@ -886,8 +3329,8 @@ class OverlayManager(QObject):
                 return "Enter"
             return key.name.title()
 
-        # Handle character keys with vk codes
-        if hasattr(key, 'vk'):
+        # Handle character keys with vk codes (keys read from the config have none)
+        if getattr(key, 'vk', None) is not None:
             # Numpad Enter (vk 76 on macOS)
             if key.vk == 76:
                 return "NumEnter"
@@ -903,196 +3346,450 @@ class OverlayManager(QObject):
             return key.char.upper()
 
         # Fallback - show vk code if available
-        if hasattr(key, 'vk'):
+        if getattr(key, 'vk', None) is not None:
             return f"Key{key.vk}"
         return str(key)
 
-    def start_hotkey_listener(self):
-        """Start listening for global hotkeys."""
-        def get_current_modifiers():
-            """Get currently pressed modifiers as a normalized set."""
-            current_mods = set()
-            if self.ctrl_pressed:
-                current_mods.add(keyboard.Key.ctrl)
-            if self.option_pressed:
-                current_mods.add(keyboard.Key.alt)
-            if self.shift_pressed:
-                current_mods.add(keyboard.Key.shift)
-            if self.cmd_pressed:
-                current_mods.add(keyboard.Key.cmd)
-            return current_mods
-
-        def check_toggle():
-            """Check if the activation combo is pressed."""
-            current_mods = get_current_modifiers()
-
-            # Check if activation combo matches
-            if self.activation_key is None:
-                # Just modifiers, no key required
-                if current_mods == self.activation_modifiers and len(current_mods) > 0:
-                    if self.overlay is not None:
-                        self.signals.cancel.emit()
-                    else:
-                        self.signals.create_and_show_overlay.emit()
-            # If activation_key is set, we'd check for it too (handled in on_press)
-
-        def on_press(key):
-            # FIRST: Check if settings is recording a hotkey (highest priority)
-            if hasattr(self, 'menu_bar_manager') and self.menu_bar_manager:
-                controller = self.menu_bar_manager.settings_controller
-                if controller.recording_button:
-                    # Allow Escape to cancel recording
-                    if key == keyboard.Key.esc:
-                        # Restore previous value
-                        if controller.recording_button == controller.activation_button:
-                            controller.recording_button.setTitle_("Ctrl + Option")
-                        elif controller.recording_button == controller.selection_button:
-                            controller.recording_button.setTitle_("Enter")
-                        controller.stopRecording()
-                        return
+    def rebuild_bindings(self):
+        """Recompile the dispatch table after any binding changes."""
+        self.bindings = KeyBindings(
+            self.key_map, self.selection_key,
+            self.activation_modifiers, self.activation_key,
+            self.grid_layouts
+        )
+        for overlay in self.overlays.values():
+            overlay.bindings = self.bindings
+
+    def current_config(self):
+        return HotkeyConfig(self.key_map, self.selection_key, self.activation_modifiers,
+                            self.activation_key, self.config_grid_layouts, self.mouse.drag_pacing)
+
+    def apply_config(self, config):
+        """Switch to new bindings; the listener picks them up on its next event."""
+        self.key_map = dict(config.key_map)
+        self.selection_key = config.selection_key
+        self.activation_modifiers = set(config.activation_modifiers)
+        self.activation_key = config.activation_key
+        self.config_grid_layouts = config.grid_layouts
+        self.grid_layouts = self.grid_override or config.grid_layouts
+        self.mouse.drag_pacing = config.drag_pacing
+        self.rebuild_bindings()
+
+    def save_config(self):
+        """Apply and persist bindings edited in settings, or revert them if they conflict."""
+        config = self.current_config()
+        try:
+            self.config_store.save(config)
+        except ConfigError as e:
+            log_settings.warning("Not saving conflicting bindings: %s", e)
+            self.reload_config()
+            return
+        except OSError:
+            log_settings.exception("Could not save config")
+        self.rebuild_bindings()
 
-                    # Recording mode - capture the key with display name
-                    display_name = self.get_key_display_name(key)
-                    is_modifier = key in [
-                        keyboard.Key.ctrl, keyboard.Key.ctrl_l, keyboard.Key.ctrl_r,
-                        keyboard.Key.alt, keyboard.Key.alt_l, keyboard.Key.alt_r,
-                        keyboard.Key.shift, keyboard.Key.shift_l, keyboard.Key.shift_r,
-                        keyboard.Key.cmd, keyboard.Key.cmd_l, keyboard.Key.cmd_r
-                    ]
-
-                    # Also update our internal modifier tracking for display purposes
-                    if key in [keyboard.Key.ctrl, keyboard.Key.ctrl_l, keyboard.Key.ctrl_r]:
-                        self.ctrl_pressed = True
-                    elif key in [keyboard.Key.alt, keyboard.Key.alt_l, keyboard.Key.alt_r]:
-                        self.option_pressed = True
-                    elif key in [keyboard.Key.shift, keyboard.Key.shift_l, keyboard.Key.shift_r]:
-                        self.shift_pressed = True
-                    elif key in [keyboard.Key.cmd, keyboard.Key.cmd_l, keyboard.Key.cmd_r]:
-                        self.cmd_pressed = True
-
-                    controller.recordKey(key, display_name, is_modifier)
-                    return  # Don't process normal hotkeys while recording
-
-            # Track modifier keys (only if NOT recording)
-            if key in [keyboard.Key.ctrl, keyboard.Key.ctrl_l, keyboard.Key.ctrl_r]:
-                self.ctrl_pressed = True
-                check_toggle()
-                return
+    def reload_config(self):
+        """Re-read the config file, keeping the current bindings if it is invalid."""
+        try:
+            config = self.config_store.load()
+        except ConfigError as e:
+            log_settings.warning("Ignoring invalid config %s: %s", self.config_store.path, e)
+            return
+        except OSError:
+            log_settings.exception("Could not read config")
+            return
+        self.apply_config(config)
+        log_settings.info("Config reloaded from %s", self.config_store.path)
 
-            if key in [keyboard.Key.alt, keyboard.Key.alt_l, keyboard.Key.alt_r]:  # Option key on macOS
-                self.option_pressed = True
-                check_toggle()
-                return
+    def toggle_overlay(self, pressed_at):
+        """Show the overlay, or cancel it if already shown."""
+        if self.overlay is not None:
+            self.signals.cancel.emit()
+        else:
+            self.signals.create_and_show_overlay.emit(pressed_at)
 
-            if key in [keyboard.Key.shift, keyboard.Key.shift_l, keyboard.Key.shift_r]:
-                self.shift_pressed = True
-                check_toggle()
-                return
+    def on_press(self, key):
+        """Global key press callback (pynput listener thread): just queue it."""
+        self.event_ring.push(KEY_PRESS, key, time.perf_counter())
 
-            if key in [keyboard.Key.cmd, keyboard.Key.cmd_l, keyboard.Key.cmd_r]:
-                self.cmd_pressed = True
-                check_toggle()
-                return
+    def on_release(self, key):
+        """Global key release callback (pynput listener thread): just queue it."""
+        self.event_ring.push(KEY_RELEASE, key, time.perf_counter())
 
-            # Check if this key completes the activation combo
-            if self.activation_key is not None:
-                current_mods = get_current_modifiers()
+    def drain_key_events(self):
+        """Handle all queued key events (main thread).
 
-                if current_mods == self.activation_modifiers and key == self.activation_key:
-                    if self.overlay is not None:
-                        self.signals.cancel.emit()
-                    else:
-                        self.signals.create_and_show_overlay.emit()
-                    return
+        Consecutive cell/hint keys in a batch are applied by the overlay in
+        one step (see GridOverlay.select_keys).
+        """
+        for kind, key, at in self.event_ring.drain():
+            if kind == KEY_PRESS:
+                self.handle_press(key, at)
+            else:
+                self.handle_release(key)
+        self.flush_selects()
 
-            # Only process other keys if overlay is visible
-            if self.overlay is None:
-                return
+        # A dropped release would leave its key looking held forever
+        dropped = sum(self.event_ring.dropped.values())
+        if dropped != self.dropped_seen:
+            self.dropped_seen = dropped
+            self.pressed_keys.clear()
 
-            # Ctrl+Escape to quit app entirely
-            if key == keyboard.Key.esc and self.ctrl_pressed:
-                self.signals.quit_app.emit()
-                return
+    def flush_selects(self):
+        """Send the pending burst of cell/hint keys to the overlay."""
+        if self.pending_selects:
+            keys, self.pending_selects = self.pending_selects, []
+            self.signals.select_keys.emit(keys)
+            latency_tracer.mark('signal')
 
-            # Check for grid keys using key objects
-            if key in self.key_map:
-                row, col = self.key_map[key]
-                self.signals.highlight_cell.emit(row, col)
+    def handle_press(self, key, pressed_at):
+        """Key press, on the main thread.
 
-            # Check for selection/confirm key
-            if key == self.selection_key:
-                self.signals.confirm.emit()
+        Args:
+            pressed_at: time.perf_counter() when the listener received it
+        """
+        bindings = self.bindings
+
+        # Held cell/hint keys auto-repeat: only the first press counts (other
+        # keys, e.g. Escape, keep repeating). Keys are tracked by physical key,
+        # since Shift changes the character between press and release.
+        held = bookmark_slot(key) or key
+        if held in self.pressed_keys and bindings.overlay_actions.get(key) is ACTION_SELECT:
+            self.repeats_ignored += 1
+            return
+        self.pressed_keys.add(held)
+
+        # A burst of cell/hint keys is applied in one step; anything else ends it
+        if (self.pending_selects and (self.modifier_mask & MOD_CMD or
+                                      bindings.overlay_actions.get(key) is not ACTION_SELECT)):
+            self.flush_selects()
+
+        # FIRST: Check if settings is recording a hotkey (highest priority)
+        menu_bar_manager = self.menu_bar_manager
+        if menu_bar_manager is not None:
+            controller = menu_bar_manager.settings_controller
+            if controller is not None and controller.recording_button:
+                self.record_key(controller, key)
+                return  # Don't process normal hotkeys while recording
+
+        # Track modifier keys
+        bit = MODIFIER_BITS.get(key)
+        if bit:
+            self.modifier_mask |= bit
+            # Modifier-only activation combo
+            if (bindings.activation_key is None and bindings.activation_mask and
+                    self.modifier_mask == bindings.activation_mask):
+                self.toggle_overlay(pressed_at)
+            return
 
-            # Escape to go back one level
-            if key == keyboard.Key.esc:
+        # Check if this key completes the activation combo
+        if key == bindings.activation_key and self.modifier_mask == bindings.activation_mask:
+            self.toggle_overlay(pressed_at)
+            return
+
+        # Only process other keys if overlay is visible
+        if self.overlay is None:
+            return
+        self.journal.keys += 1
+
+        # Cmd+key: bookmarks (Cmd+selection key falls through to a Cmd-click)
+        if self.modifier_mask & MOD_CMD and bindings.overlay_actions.get(key) is not ACTION_CONFIRM:
+            slot = bookmark_slot(key)
+            if slot is not None:
+                if self.modifier_mask & MOD_SHIFT:
+                    action = BOOKMARK_SAVE
+                elif self.modifier_mask & MOD_ALT:
+                    action = BOOKMARK_CLICK
+                else:
+                    action = BOOKMARK_JUMP
+                latency_tracer.begin(pressed_at)
+                self.signals.bookmark.emit(slot, action)
+                latency_tracer.mark('signal')
+            return
+
+        action = bindings.overlay_actions.get(key)
+        if action is None:
+            return
+        latency_tracer.begin(pressed_at)
+        if action is ACTION_BACK:
+            # Ctrl+Escape to quit app entirely, Escape to go back one level
+            if self.modifier_mask & MOD_CTRL:
+                self.signals.quit_app.emit()
+            else:
                 self.signals.go_back.emit()
+        elif action is ACTION_CONFIRM:
+            # Modifiers held with the selection key are held for the click
+            self.signals.confirm.emit(self.modifier_mask)
+        elif action is ACTION_HINTS:
+            self.signals.toggle_hints.emit()
+        elif action is ACTION_CLICK_MODE:
+            self.signals.click_mode.emit(*CLICK_MODE_KEYS[key])
+        elif action is ACTION_DRAG:
+            self.signals.mark_drag.emit()
+        else:
+            self.pending_selects.append(key)
+            return  # Sent with the rest of the burst by flush_selects()
+        latency_tracer.mark('signal')
+
+    def handle_release(self, key):
+        """Key release, on the main thread."""
+        self.pressed_keys.discard(bookmark_slot(key) or key)
+        bit = MODIFIER_BITS.get(key)
+        if bit:
+            self.modifier_mask &= ~bit
+
+    def record_key(self, controller, key):
+        """Forward a key press to the settings controller while it records."""
+        # Allow Escape to cancel recording
+        if key == keyboard.Key.esc:
+            # Restore previous value
+            controller.stopRecording()
+            controller.refreshTitles()
+            return
+
+        # Recording mode - capture the key with display name
+        display_name = self.get_key_display_name(key)
+        bit = MODIFIER_BITS.get(key)
+
+        # Also update our internal modifier tracking for display purposes
+        if bit:
+            self.modifier_mask |= bit
 
-        def on_release(key):
-            if key in [keyboard.Key.ctrl, keyboard.Key.ctrl_l, keyboard.Key.ctrl_r]:
-                self.ctrl_pressed = False
-            if key in [keyboard.Key.alt, keyboard.Key.alt_l, keyboard.Key.alt_r]:
-                self.option_pressed = False
-            if key in [keyboard.Key.shift, keyboard.Key.shift_l, keyboard.Key.shift_r]:
-                self.shift_pressed = False
-            if key in [keyboard.Key.cmd, keyboard.Key.cmd_l, keyboard.Key.cmd_r]:
-                self.cmd_pressed = False
+        controller.recordKey(key, display_name, bool(bit))
 
+    def start_hotkey_listener(self):
+        """Start listening for global hotkeys."""
         self.listener = keyboard.Listener(
-            on_press=on_press,
-            on_release=on_release
+            on_press=self.on_press,
+            on_release=self.on_release
         )
         self.listener.start()
 
-    def create_and_show_overlay(self):
-        """Create a new overlay window."""
+    def create_and_show_overlay(self, requested_at=None):
+        """Show the warm overlay for the monitor under the cursor."""
         if self.overlay is not None:
             return
 
-        print("[DEBUG] Creating new overlay window")
-        self.overlay = GridOverlay(self.monitor, self.signals)
+        x, y = self.mouse.position
+        monitor = self.topology.monitor_at(x, y)
+        if monitor is None:
+            log.warning("No monitors available")
+            return
+        self.active_app_id = self.frontmost_app_id()
+        self.show_overlay(monitor, x, y, requested_at, self.start_at_recent)
+
+    def show_overlay(self, monitor, x, y, requested_at=None, start_at_recent=False):
+        """Activate monitor's overlay for the cursor at (x, y) and the active app, and journal it."""
+        overlay = self.overlays[monitor.key]
+        self.pressed_keys.clear()  # A release missed while hidden must not block a cell key
+
+        # Frequent targets on this monitor for this app, in local coordinates
+        scope = self.click_scope(monitor)
+        overlay.likely_targets = self.click_model.top(scope, len(LIKELY_TARGET_KEYS))
+        overlay.click_density = self.click_model.weights(scope) if self.adaptive else []
+        start_rect = None
+        if start_at_recent:
+            recent = self.click_model.most_recent(scope)
+            if recent is not None:
+                start_rect = self.recent_region(monitor, *recent)
+
+        self.overlay = overlay
+        self.journal.record(JOURNAL_ACTIVATE, x=x, y=y, app=self.active_app_id)
+        overlay.activate(requested_at, start_rect)
+        return overlay
+
+    def click_scope(self, monitor):
+        return f"{monitor.label}|{self.active_app_id}"
+
+    def load_click_model(self):
+        if self.click_model.scopes is None:
+            self.click_model.load()
 
-        # Connect destruction signal
-        self.overlay.destroyed.connect(self.on_overlay_destroyed)
+    @staticmethod
+    def recent_region(monitor, x, y):
+        """Local rect of a top-level 3x3 cell's size centered on (x, y), kept on the monitor."""
+        width, height = monitor.width / 3, monitor.height / 3
+        left = min(max(x - width / 2, 0), monitor.width - width)
+        top = min(max(y - height / 2, 0), monitor.height - height)
+        return (left, top, width, height)
+
+    def on_confirmed(self, x, y):
+        """Count a confirmed click for likely-target recall."""
+        monitor = self.topology.monitor_at(x, y)
+        if monitor is not None:
+            self.click_model.record(self.click_scope(monitor), x - monitor.x, y - monitor.y)
+
+    def on_bookmark(self, slot, action):
+        """Save the visible overlay's region under slot, or jump (and click) to the saved one."""
+        overlay = self.overlay
+        if overlay is None:
+            return
+        scope = BookmarkStore.scope(self.topology.layout_id, self.active_app_id)
+
+        if action == BOOKMARK_SAVE:
+            rect = overlay.bookmark_rect()
+            self.bookmarks.set(scope, slot, rect)
+            log_input.info("Saved bookmark %s for %s", slot, scope)
+            return
+
+        rect = self.bookmarks.get(scope, slot)
+        if rect is None:
+            log_input.info("No bookmark %s for %s", slot, scope)
+            return
 
-    def on_overlay_destroyed(self):
-        """Called when overlay window is destroyed."""
-        print("[DEBUG] Overlay window destroyed")
+        # The bookmark may be on another monitor than the visible overlay
+        x, y, width, height = rect
+        monitor = self.topology.monitor_at(x + width / 2, y + height / 2)
+        target = self.overlays.get(monitor.key, overlay)
+        if target is not overlay:
+            overlay.deactivate()
+            target = self.show_overlay(monitor, *self.mouse.position)
+
+        target.jump_to(x, y, width, height)
+        if action == BOOKMARK_CLICK:
+            target.confirm_selection()
+
+    def sync_overlays(self):
+        """Build overlays for new monitors and drop those of removed ones."""
+        current = {monitor.key: monitor for monitor in self.topology.monitors}
+
+        for key in list(self.overlays):
+            if key not in current:
+                overlay = self.overlays.pop(key)
+                if overlay is self.overlay:
+                    overlay.cancel_selection()
+                overlay.close()
+                overlay.deleteLater()
+
+        for key, monitor in current.items():
+            if key not in self.overlays:
+                overlay = GridOverlay(monitor, self.signals, window_snapshots=self.window_snapshots,
+                                      bindings=self.bindings, target_source=self.target_source,
+                                      injector=self.mouse, snap=self.snap, journal=self.journal)
+                overlay.deactivated.connect(self.on_overlay_deactivated)
+                overlay.confirmed.connect(self.on_confirmed)
+                self.overlays[key] = overlay
+
+    def on_overlay_deactivated(self):
+        """Called when the visible overlay has been hidden."""
+        log.debug("Overlay hidden")
         self.overlay = None
 
     def quit_app(self):
         """Quit the application entirely."""
-        print("[DEBUG] Quitting app")
+        log.info("Quitting app")
         self.listener.stop()
-        if self.overlay:
-            self.overlay.close()
+        for overlay in self.overlays.values():
+            overlay.close()
         QApplication.quit()
 
 
+def startup_report(milestones):
+    """Per-import cost and startup milestones as a printable table.
+
+    Args:
+        milestones: list of (name, seconds since process start)
+    """
+    lines = ["Startup report", "  imports (ms):"]
+    for name, seconds in sorted(IMPORT_TIMES.items(), key=lambda item: -item[1]):
+        lines.append(f"    {name:<24}{seconds * 1000:>8.1f}")
+    lines.append("  milestones (ms since start):")
+    for name, seconds in milestones:
+        lines.append(f"    {name:<24}{seconds * 1000:>8.1f}")
+    return "\n".join(lines)
+
+
 def main():
-    monitor = choose_screen()
-    print(f"\nStarting on {monitor.name}...")
+    import argparse
+    parser = argparse.ArgumentParser(description="Keyboard-driven mouse navigation overlay.")
+    parser.add_argument('--startup-report', action='store_true',
+                        help="print per-import cost and time to ready for hotkey")
+    parser.add_argument('--startup-budget', type=float, metavar='MS',
+                        help="warn when ready for hotkey takes longer than MS")
+    parser.add_argument('--exit-when-ready', action='store_true',
+                        help="quit as soon as ready (exit status 1 if over --startup-budget)")
+    parser.add_argument('--grid', type=parse_grid_layouts, metavar='LAYOUTS',
+                        help="grid per depth, e.g. 5x5,3x3 (the last one repeats; "
+                             "default: from the config file, 3x3)")
+    parser.add_argument('--start-at-recent', action='store_true',
+                        help="open the overlay zoomed around the most recent click target")
+    parser.add_argument('--adaptive', action='store_true',
+                        help="size grid cells by click history so frequent targets take fewer keys")
+    parser.add_argument('--snap', action='store_true',
+                        help="move the cursor to the most clickable feature of small regions (needs numpy)")
+    parser.add_argument('--grid-cost', type=float, metavar='PX',
+                        help="print keystrokes needed to reach a PX-sized target per grid layout and exit")
+    args, qt_args = parser.parse_known_args()
+    if args.grid_cost is not None and args.grid_cost <= 0:
+        parser.error("--grid-cost must be positive")
+    snap = None
+    if args.snap:
+        try:
+            snap = ContentSnap()
+        except ImportError:
+            parser.error("--snap needs numpy: pip install 'keyboard-navigation[snap]'")
+
+    milestones = [('imports', time.perf_counter() - STARTED_AT)]
+
+    configure_logging()
+    app = QApplication(sys.argv[:1] + qt_args)
+    milestones.append(('qapplication', time.perf_counter() - STARTED_AT))
+
+    topology = MonitorTopology()
+    if args.grid_cost is not None:
+        grid_layouts = args.grid
+        if grid_layouts is None:
+            try:
+                grid_layouts = ConfigStore().load().grid_layouts
+            except ConfigError:
+                grid_layouts = DEFAULT_GRID_LAYOUTS
+        print(grid_cost_report(topology.monitors, args.grid_cost, grid_layouts))
+        return
+
+    print(f"\nStarting on {len(topology.monitors)} monitor(s)...")
     print("\nControls:")
     print("  Ctrl+Option = show overlay (or cancel if already shown)")
-    print("  Q/W/E/A/S/D/Z/X/C = select grid cell")
+    print("  Q/W/E/A/S/D/Z/X/C = select grid cell (larger grids use the matching keyboard keys)")
     print("  Enter = confirm and click at current position")
+    print("  Space = mark drag start, then navigate to the end and Enter to drag")
+    print("  Left/Right = click button, Up/Down = double/triple click; hold Ctrl/Option/Shift/Cmd with Enter to modifier-click")
+    print("  1-5 = jump to a frequently clicked target (shown when the overlay opens; 4-row grids use free number keys)")
+    print("  Tab = toggle hint labels on windows, then type a label to jump")
+    print("  Cmd+Shift+key = bookmark region, Cmd+key = jump to it, Cmd+Option+key = jump and click")
     print("  Escape = go back one level (or cancel if at top level)")
     print("  ⌨️ Menu bar icon = configure hotkeys and quit")
 
-    app = QApplication(sys.argv)
-
     # Hide from dock (but keep menu bar icon)
     NSApp.setActivationPolicy_(NSApplicationActivationPolicyAccessory)
 
-    # Create the overlay manager (runs in background)
-    manager = OverlayManager(monitor)
+    # Create the overlay manager (runs in background, builds warm overlays)
+    manager = OverlayManager(topology, args.grid, start_at_recent=args.start_at_recent, snap=snap,
+                             adaptive=args.adaptive)
+    milestones.append(('overlays_and_listener', time.perf_counter() - STARTED_AT))
 
     # Create menu bar manager
     menu_bar_manager = MenuBarManager.alloc().init()
     menu_bar_manager.overlay_manager = manager
     manager.menu_bar_manager = menu_bar_manager
-
-    print("[DEBUG] App running in background. Press Ctrl+Option to show overlay.")
-    print("[DEBUG] Click ⌨️ in menu bar to configure hotkeys.")
+    milestones.append(('menu_bar', time.perf_counter() - STARTED_AT))
+
+    def on_ready():
+        """Event loop is running: hotkeys are now handled."""
+        ready = time.perf_counter() - STARTED_AT
+        milestones.append(('ready_for_hotkey', ready))
+        over_budget = args.startup_budget is not None and ready * 1000 > args.startup_budget
+        if args.startup_report:
+            print(startup_report(milestones))
+        if over_budget:
+            log.warning("Startup took %.1f ms, over the %.1f ms budget", ready * 1000, args.startup_budget)
+        if args.exit_when_ready:
+            manager.listener.stop()
+            app.exit(1 if over_budget else 0)
+
+    QtCore.QTimer.singleShot(0, on_ready)
+
+    log.info("App running in background. Press Ctrl+Option to show overlay.")
+    log.info("Click ⌨️ in menu bar to configure hotkeys.")
     sys.exit(app.exec_())
 
 
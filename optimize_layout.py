@@ -0,0 +1,451 @@
+"""Offline optimizer for grid layouts, from recorded clicks.
+
+Replays logged click positions through candidate layouts - grid per level,
+split ratios and the 3x3 key assignment - and reports the keystrokes each
+layout needs to bring the cursor into a --precision px box around every
+click: the mean, the tail (p90/p99/max) and the distribution. Each layout is
+evaluated for all clicks at once with NumPy (see LayoutEvaluator), on clicks
+merged per pixel, so thousands of layouts against millions of logged clicks
+take minutes.
+
+The click log is the app's clicks.jsonl (monitor-local positions; the
+monitor size is read from each line's scope) or CSV lines "x,y" together
+with --size. Needs numpy (the "optimize" extra); only --export needs the
+app's own dependencies.
+
+Usage:
+    python optimize_layout.py                             # the app's click log
+    python optimize_layout.py clicks.jsonl --precision 16 --top 20
+    python optimize_layout.py --scope Safari              # clicks in matching scopes only
+    python optimize_layout.py clicks.csv --size 2560x1440
+    python optimize_layout.py --layouts 3x3 5x5,3x3 4x8@1.5,3x3
+    python optimize_layout.py --export                    # write the winner into config.json
+"""
+
+import argparse
+import itertools
+import re
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from layout_config import DATA_DIR, KEY_MATRIX, format_grid_layouts, layout_at, parse_grid_layouts, read_grid_config
+
+# Candidate grids per level: up to this many rows, and per-level cell count
+# (the key matrix has 40 keys)
+MAX_ROWS = 6
+MAX_CELLS = sum(map(len, KEY_MATRIX))
+
+# Split ratios: weight of the middle cell(s) relative to the others; 1 is
+# an even split, the only one the app's grid config can express
+CENTER_WEIGHTS = (1.0, 1.5, 2.0)
+
+MAX_DEPTH = 32
+
+# Effort of pressing a key, by row of KEY_MATRIX (number, top, home, bottom)
+# plus column (pinky to pinky, index finger stretches in the middle)
+ROW_EFFORT = (2.0, 1.2, 1.0, 1.4)
+COLUMN_EFFORT = (0.6, 0.3, 0.1, 0.0, 0.2, 0.2, 0.0, 0.1, 0.3, 0.6)
+
+MONITOR_SIZE = re.compile(r":(\d+)x(\d+)@-?\d+,-?\d+x[\d.]+$")
+
+
+def parse_size(text):
+    """Parse "2560x1440" into (2560, 1440)."""
+    try:
+        width, height = (int(n) for n in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size {text!r}, expected WIDTHxHEIGHT") from None
+    if width <= 0 or height <= 0:
+        raise argparse.ArgumentTypeError(f"invalid size {text!r}")
+    return width, height
+
+
+def scope_size(scope):
+    """Monitor (width, height) from a click scope ("<monitor label>|<app>"), or None."""
+    match = MONITOR_SIZE.search(scope.rpartition('|')[0])
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def parse_layout(spec):
+    """Parse "5x5@1.5,3x3" into ((5, 5, 1.5), (3, 3, 1.0)); raises ValueError if invalid.
+
+    A level's "@weight" widens its middle row(s) and column(s) by that
+    factor relative to the others.
+    """
+    levels = []
+    for part in spec.split(','):
+        grid, _, weight = part.partition('@')
+        (rows, cols), = parse_grid_layouts(grid)
+        try:
+            center = float(weight) if weight else 1.0
+        except ValueError:
+            raise ValueError(f"invalid split weight {weight!r}") from None
+        if not 0 < center <= 10:
+            raise ValueError(f"unsupported split weight {weight!r}")
+        levels.append((rows, cols, center))
+    return tuple(levels)
+
+
+def format_layout(layout):
+    return ",".join(f"{rows}x{cols}" + (f"@{center:g}" if center != 1 else "")
+                    for rows, cols, center in layout)
+
+
+def exportable(layout):
+    """Whether the app's grid config can express the layout (even splits only)."""
+    return all(center == 1 for _, _, center in layout)
+
+
+def split_edges(count, center):
+    """count + 1 edges splitting [0, 1], the middle cell(s) center times as wide as the rest."""
+    widths = np.ones(count)
+    widths[(count - 1) // 2:count // 2 + 1] = center
+    return np.concatenate(([0.0], np.cumsum(widths) / widths.sum()))
+
+
+def candidate_layouts(max_cells=MAX_CELLS, centers=CENTER_WEIGHTS):
+    """Every first level followed by every repeating level, over grids and split weights."""
+    grids = [(rows, cols) for rows in range(2, MAX_ROWS + 1) for cols in range(2, len(KEY_MATRIX[0]) + 1)
+             if rows * cols <= max_cells]
+    levels = [(rows, cols, center) for rows, cols in grids for center in centers
+              if center == 1 or max(rows, cols) > 2]
+    layouts = []
+    for first, rest in itertools.product(levels, repeat=2):
+        layouts.append((first,) if first == rest else (first, rest))
+    return layouts
+
+
+def load_clicks(paths, scope=None, size=None):
+    """{(width, height): (xs, ys, weights)} of clicks merged per pixel, and the number of clicks.
+
+    Compacted log lines carry a score (the decayed click count of their
+    cell), used as that line's weight; other lines weigh one click. Lines
+    that can't be parsed, are outside their monitor or have no known
+    monitor size are skipped.
+    """
+    import json
+    columns = {}  # (width, height) -> ([x], [y], [weight])
+    clicks = 0
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                try:
+                    if line.startswith('{'):
+                        record = json.loads(line)
+                        if scope is not None and scope not in record['scope']:
+                            continue
+                        x, y = float(record['x']), float(record['y'])
+                        weight = float(record.get('score', 1.0))
+                        monitor = size or scope_size(record['scope'])
+                    elif line:
+                        x, y = (float(n) for n in line.split(',')[:2])
+                        weight, monitor = 1.0, size
+                    else:
+                        continue
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    continue  # a header, or a line cut short by a crash
+                if monitor is None or not (0 <= x < monitor[0] and 0 <= y < monitor[1]):
+                    continue
+                xs, ys, weights = columns.setdefault(monitor, ([], [], []))
+                xs.append(x)
+                ys.append(y)
+                weights.append(weight)
+                clicks += 1
+
+    merged = {}
+    for (width, height), (xs, ys, weights) in columns.items():
+        pixels = np.floor(xs).astype(np.int64) * height + np.floor(ys).astype(np.int64)
+        pixels, inverse = np.unique(pixels, return_inverse=True)
+        merged[(width, height)] = (
+            (pixels // height + 0.5).astype(float),
+            (pixels % height + 0.5).astype(float),
+            np.bincount(inverse, weights=weights),
+        )
+    return merged, clicks
+
+
+def simulate(layout, xs, ys, width, height, precision, usage=None, weights=None):
+    """Keystrokes (cells + confirm) to reach each click (xs, ys) on a width x height monitor.
+
+    The cursor moves to the center of each selected cell; a click is
+    reached once the cursor is within a precision px box around it. This is
+    the direct simulation: all clicks descend one level per step and those
+    reached drop out. With usage (a dict) and weights, the weighted number
+    of selections of each cell is added to usage[(rows, cols)], a flat array
+    in reading order.
+    """
+    count = xs.size
+    keys = np.full(count, MAX_DEPTH + 1, dtype=np.int64)
+    index = np.arange(count)
+    x, y = xs, ys
+    left, top = np.zeros(count), np.zeros(count)
+    w, h = np.full(count, float(width)), np.full(count, float(height))
+    for depth in range(MAX_DEPTH):
+        rows, cols, center = layout_at(layout, depth)
+        col_edges, row_edges = split_edges(cols, center), split_edges(rows, center)
+        col = np.clip(np.searchsorted(col_edges, (x - left) / w, side='right') - 1, 0, cols - 1)
+        row = np.clip(np.searchsorted(row_edges, (y - top) / h, side='right') - 1, 0, rows - 1)
+        left += w * col_edges[col]
+        top += h * row_edges[row]
+        w *= np.diff(col_edges)[col]
+        h *= np.diff(row_edges)[row]
+        if usage is not None:
+            cells = np.bincount(row * cols + col, weights=weights[index], minlength=rows * cols)
+            grid = usage.setdefault((rows, cols), np.zeros(rows * cols))
+            grid += cells
+
+        reached = (np.abs(left + w / 2 - x) <= precision / 2) & (np.abs(top + h / 2 - y) <= precision / 2)
+        keys[index[reached]] = depth + 2
+        active = ~reached
+        index, x, y = index[active], x[active], y[active]
+        left, top, w, h = left[active], top[active], w[active], h[active]
+        if not index.size:
+            break
+    return keys
+
+
+def axis_hits(length, splits, precision):
+    """Per pixel along one axis: bit d is set if the cursor is within precision / 2 of it after d + 1 levels.
+
+    splits is the (cells, center weight) per level along this axis, the
+    last one repeating. Once cells are at most precision wide every deeper
+    level hits.
+    """
+    position = np.arange(length) + 0.5
+    start, size = np.zeros(length), np.full(length, float(length))
+    hits = np.zeros(length, dtype=np.int64)
+    for depth in range(MAX_DEPTH):
+        count, center = splits[min(depth, len(splits) - 1)]
+        edges = split_edges(count, center)
+        cell = np.clip(np.searchsorted(edges, (position - start) / size, side='right') - 1, 0, count - 1)
+        start += size * edges[cell]
+        size *= np.diff(edges)[cell]
+        hits |= (np.abs(start + size / 2 - position) <= precision / 2).astype(np.int64) << depth
+        if size.max() <= precision:
+            hits |= -1 << depth
+            break
+    return hits
+
+
+class LayoutEvaluator:
+    """Keystroke histograms of layouts for a fixed set of clicks, vectorized over the clicks.
+
+    The rows and the columns of a layout split independently, so whether
+    the cursor is close enough to a click after each level is precomputed
+    per pixel column and per pixel row as a bitmask over levels (shared by
+    every layout with the same splits along that axis). A click is reached
+    at the lowest level set in both its column's and its row's mask, so
+    scoring a layout is two lookups, an AND and a histogram over the clicks.
+    """
+
+    def __init__(self, clicks, precision):
+        self.clicks = {
+            size: (xs.astype(np.intp), ys.astype(np.intp), weights)
+            for size, (xs, ys, weights) in clicks.items()
+        }
+        self.precision = precision
+        self.axis_cache = {}  # (length, splits) -> hit bitmask per pixel
+
+    def hits(self, length, splits):
+        key = (length, splits)
+        hits = self.axis_cache.get(key)
+        if hits is None:
+            hits = self.axis_cache[key] = axis_hits(length, splits, self.precision)
+        return hits
+
+    def histogram(self, layout):
+        """Weighted histogram of keystrokes (cells + confirm): counts[k] is the weight needing k keys."""
+        histogram = np.zeros(MAX_DEPTH + 2)
+        col_splits = tuple((cols, center) for _, cols, center in layout)
+        row_splits = tuple((rows, center) for rows, _, center in layout)
+        for (width, height), (xs, ys, weights) in self.clicks.items():
+            both = self.hits(width, col_splits)[xs] & self.hits(height, row_splits)[ys]
+            # Lowest set bit: frexp of a power of two is its exponent + 1
+            depth = np.frexp((both & -both).astype(float))[1]
+            depth[both == 0] = MAX_DEPTH
+            histogram += np.bincount(depth + 1, weights=weights, minlength=MAX_DEPTH + 2)
+        return histogram
+
+
+def summarize(histogram):
+    """{mean, p50, p90, p99, max} keystrokes from a weighted histogram."""
+    keys = np.arange(histogram.size)
+    total = histogram.sum()
+    cdf = np.cumsum(histogram) / total
+    stats = {'mean': float((histogram * keys).sum() / total)}
+    for name, q in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99)):
+        stats[name] = int(np.searchsorted(cdf, q - 1e-9))
+    stats['max'] = int(keys[histogram > 0][-1])
+    return stats
+
+
+def key_effort(char):
+    for row, chars in enumerate(KEY_MATRIX):
+        if char in chars:
+            return ROW_EFFORT[row] + COLUMN_EFFORT[chars.index(char)]
+    return None
+
+
+def keymap_candidates(current):
+    """3x3 key assignments to consider: each 3x3 block of the letter rows, and the current one.
+
+    Assignments map key specs ('q', '<76>') to cells. Blocks keep the
+    keyboard's shape, so the grid still mirrors the keys.
+    """
+    candidates = [{KEY_MATRIX[1 + row][start + col]: (row, col) for row in range(3) for col in range(3)}
+                  for start in range(len(KEY_MATRIX[1]) - 2)]
+    if current not in candidates:
+        candidates.insert(0, dict(current))
+    return candidates
+
+
+def keymap_effort(key_map, usage):
+    """Mean effort per 3x3 cell key for the given selections per cell, or None if unknown keys."""
+    efforts = [key_effort(spec) for spec in key_map]
+    if None in efforts or not usage.sum():
+        return None
+    return sum(effort * usage[row * 3 + col] for effort, (row, col) in zip(efforts, key_map.values())) / usage.sum()
+
+
+def keymap_label(key_map):
+    cells = {cell: spec for spec, cell in key_map.items()}
+    return " ".join("".join(cells[(row, col)] for col in range(3)) for row in range(3))
+
+
+def export(path, layout, key_map):
+    """Write the layout's grid (and key_map, if given) into the config file, keeping everything else.
+
+    Saving validates the whole config, so this imports the app (and its dependencies).
+    """
+    from main import ConfigError, ConfigStore, spec_to_key
+    store = ConfigStore(path)
+    try:
+        config = store.load()
+    except ConfigError as e:
+        sys.exit(f"Not exporting: {store.path} is invalid ({e})")
+    config.grid_layouts = tuple((rows, cols) for rows, cols, _ in layout)
+    if key_map is not None:
+        try:
+            config.key_map = {spec_to_key(spec): cell for spec, cell in key_map.items()}
+        except ConfigError as e:
+            sys.exit(f"Not exporting: {e}")
+    try:
+        store.save(config)
+    except ConfigError as e:
+        sys.exit(f"Not exporting: {e}")
+    return store.path
+
+
+def report_row(layout, stats, note=""):
+    return (f"  {format_layout(layout):<18}{stats['mean']:>7.3f}{stats['p50']:>6}{stats['p90']:>6}"
+            f"{stats['p99']:>6}{stats['max']:>6}{note}")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('logs', nargs='*', type=Path, metavar='LOG',
+                        help="click logs, JSON lines or CSV (default: the app's clicks.jsonl)")
+    parser.add_argument('--scope', metavar='TEXT',
+                        help="only clicks whose scope (monitor label|app) contains TEXT")
+    parser.add_argument('--size', type=parse_size, metavar='WxH',
+                        help="monitor size for all clicks (needed for CSV logs)")
+    parser.add_argument('--precision', type=float, default=16, metavar='PX',
+                        help="a click is reached once the cursor is in a PX box around it (default: 16)")
+    parser.add_argument('--layouts', nargs='+', type=parse_layout, metavar='LAYOUT',
+                        help="score only these layouts, e.g. 5x5,3x3 4x8@1.5,3x3 "
+                             "(default: every first level and repeating level up to --max-cells)")
+    parser.add_argument('--max-cells', type=int, default=MAX_CELLS, metavar='N',
+                        help=f"most cells per level among generated candidates (default: {MAX_CELLS})")
+    parser.add_argument('--even', action='store_true',
+                        help="generate even splits only, i.e. layouts that can be exported")
+    parser.add_argument('--top', type=int, default=10, metavar='N', help="layouts to list (default: 10)")
+    parser.add_argument('--export', nargs='?', type=Path, const=DATA_DIR / "config.json", metavar='CONFIG',
+                        help="write the best exportable layout and 3x3 keys into CONFIG "
+                             "(default: the app's config.json; a running app picks it up)")
+    args = parser.parse_args()
+    if args.precision <= 0:
+        parser.error("--precision must be positive")
+    if not 4 <= args.max_cells <= MAX_CELLS:
+        parser.error(f"--max-cells must be between 4 and {MAX_CELLS}")
+
+    start = time.perf_counter()
+    logs = args.logs or [DATA_DIR / "clicks.jsonl"]
+    try:
+        clicks, count = load_clicks(logs, args.scope, args.size)
+    except OSError as e:
+        parser.error(f"cannot read click log: {e}")
+    if not clicks:
+        parser.error("no usable clicks (CSV logs need --size)")
+    loaded = time.perf_counter() - start
+    distinct = sum(xs.size for xs, _, _ in clicks.values())
+    total = sum(weights.sum() for _, _, weights in clicks.values())
+    sizes = ", ".join(f"{w}x{h} ({weights.sum() / total:.0%})"
+                      for (w, h), (_, _, weights) in sorted(clicks.items(), key=lambda item: -item[1][2].sum()))
+    print(f"{count} clicks at {distinct} distinct positions, read in {loaded:.1f} s; monitors: {sizes}")
+
+    try:
+        current_grid, current_keys = read_grid_config(args.export)
+    except (OSError, ValueError) as e:
+        parser.error(f"cannot read config: {e}")
+    current_layout = tuple((rows, cols, 1.0) for rows, cols in current_grid)
+
+    layouts = args.layouts or candidate_layouts(args.max_cells, (1.0,) if args.even else CENTER_WEIGHTS)
+    if current_layout not in layouts:
+        layouts = [current_layout] + list(layouts)
+    start = time.perf_counter()
+    evaluator = LayoutEvaluator(clicks, args.precision)
+    results = []
+    for layout in layouts:
+        stats = summarize(evaluator.histogram(layout))
+        cells = sum(rows * cols for rows, cols, _ in layout)
+        results.append(((stats['mean'], stats['p99'], stats['max'], not exportable(layout), cells), layout, stats))
+    results.sort(key=lambda result: result[0])
+    elapsed = time.perf_counter() - start
+    print(f"Scored {len(layouts)} layouts in {elapsed:.1f} s "
+          f"({len(layouts) * distinct / elapsed / 1e6:.1f}M click evaluations/s), precision {args.precision:g} px\n")
+
+    print(f"  {'layout':<18}{'mean':>7}{'p50':>6}{'p90':>6}{'p99':>6}{'max':>6}")
+    for _, layout, stats in results[:args.top]:
+        print(report_row(layout, stats, "  (current)" if layout == current_layout else ""))
+    rank = next(i for i, (_, layout, _) in enumerate(results) if layout == current_layout)
+    if rank >= args.top:
+        print("  ...")
+        print(report_row(current_layout, results[rank][2], f"  (current, #{rank + 1})"))
+
+    best = next(((layout, stats) for _, layout, stats in results if exportable(layout)), None)
+    if best is None:
+        print("\nNo layout with even splits was scored; nothing to export.")
+        return
+    layout, stats = best
+    if layout != results[0][1]:
+        print(f"\nBest with even splits (the app's grid config can't express split weights): "
+              f"{format_layout(layout)}, mean {stats['mean']:.3f}")
+    histogram = evaluator.histogram(layout)
+    shares = "  ".join(f"{keys}: {weight / histogram.sum():.1%}" for keys, weight in enumerate(histogram) if weight)
+    print(f"\nKeystrokes for {format_layout(layout)}: {shares}")
+
+    # 3x3 keys: the assignment with the least effort for how often each cell is picked
+    key_map = None
+    usage = {}
+    for (width, height), (xs, ys, weights) in clicks.items():
+        simulate(layout, xs, ys, width, height, args.precision, usage, weights)
+    if (3, 3) in usage:
+        scored = [(effort, i, candidate) for i, candidate in enumerate(keymap_candidates(current_keys))
+                  if (effort := keymap_effort(candidate, usage[(3, 3)])) is not None]
+        if scored:
+            effort, _, key_map = min(scored, key=lambda item: item[:2])
+            current_effort = keymap_effort(current_keys, usage[(3, 3)])
+            baseline = f" (current {keymap_label(current_keys)}: {current_effort:.3f})" if current_effort else ""
+            print(f"3x3 keys: {keymap_label(key_map)}, effort {effort:.3f} per key{baseline}")
+
+    if args.export:
+        path = export(args.export, layout, key_map)
+        print(f"\nWrote grid {format_grid_layouts(tuple((r, c) for r, c, _ in layout))} to {path}")
+
+
+if __name__ == '__main__':
+    main_cli()